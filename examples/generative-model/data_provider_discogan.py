@@ -21,22 +21,16 @@ class DiscoGANSplitDataFlow(flow.SimpleDataFlowBase):
         super().__init__()
         self._kva = kva
         self._kvb = kvb
-        self._img_shape = get_env('dataset.img_shape', (64, 64))
-
-    def _crop_and_resize(self, img):
-        img = image.imdecode(img)
-        img = image.resize(img, self._img_shape)
-        return img
 
     def _gen(self):
         ita = iter(self._kva)
         itb = iter(self._kvb)
         while True:
-            res = dict(img_a=self._crop_and_resize(next(ita)), img_b=self._crop_and_resize(next(itb)))
+            res = dict(img_a=next(ita), img_b=next(itb))
             yield res
 
 
-def _make_dataflow(batch_size=1, use_prefetch=False):
+def _make_dataflow(batch_size=1, use_prefetch=False, nr_replicas=1):
     img_shape = get_env('dataset.img_shape', (64, 64))
 
     data_dir = get_env('dir.data')
@@ -48,14 +42,21 @@ def _make_dataflow(batch_size=1, use_prefetch=False):
         'in the corresponding position.'.format(db_a, db_b))
 
     dfs = []
-    dfa = flow.KVStoreRandomSampleDataFlow(lambda: kvstore.LMDBKVStore(db_a))
-    dfb = flow.KVStoreRandomSampleDataFlow(lambda: kvstore.LMDBKVStore(db_b))
+    # the images are decoded and resized only once, and then cached in the memory; the budget is the total one, split
+    # among the caches of both domains in each prefetching worker of each replica
+    nr_workers = 2 if use_prefetch else 1
+    cache_budget = get_env('dataset.cache_budget', 1024 ** 3) // (2 * nr_workers * nr_replicas)
+    cache_spill_dir = get_env('dataset.cache_spill_dir', None)
+    dfa = flow.KVStoreImageCacheDataFlow(lambda: kvstore.LMDBKVStore(db_a), target_shape=img_shape,
+                                         memory_budget=cache_budget, spill_dir=cache_spill_dir)
+    dfb = flow.KVStoreImageCacheDataFlow(lambda: kvstore.LMDBKVStore(db_b), target_shape=img_shape,
+                                         memory_budget=cache_budget, spill_dir=cache_spill_dir)
     df = DiscoGANSplitDataFlow(dfa, dfb)
     df = flow.BatchDataFlow(df, batch_size, sample_dict={
         'img_a': np.empty(shape=(batch_size, img_shape[0], img_shape[1], 3), dtype='float32'),
         'img_b': np.empty(shape=(batch_size, img_shape[0], img_shape[1], 3), dtype='float32'), })
     if use_prefetch:
-        df = flow.MPPrefetchDataFlow(df, nr_workers=2)
+        df = flow.MPPrefetchDataFlow(df, nr_workers=nr_workers)
     return df
 
     df = gan.GANDataFlow(dfs[0], dfs[1], get_env('trainer.nr_g_per_iter', 1), get_env('trainer.nr_d_per_iter', 1))
@@ -63,7 +64,7 @@ def _make_dataflow(batch_size=1, use_prefetch=False):
 
 def make_dataflow_train(env):
     batch_size = get_env('trainer.batch_size')
-    dfs = [_make_dataflow(batch_size, use_prefetch=True) for i in range(2)]
+    dfs = [_make_dataflow(batch_size, use_prefetch=True, nr_replicas=2) for i in range(2)]
 
     df = gan.GANDataFlow(dfs[0], dfs[1], get_env('trainer.nr_g_per_iter', 1), get_env('trainer.nr_d_per_iter', 1))
 
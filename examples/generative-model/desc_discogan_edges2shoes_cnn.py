@@ -34,6 +34,8 @@ __envs__ = {
         'nr_epochs': 200,
         'nr_g_per_iter': 1,
         'nr_d_per_iter': 1,
+        # run the d/g updates of an iteration in a single session run
+        'fused_step': False,
     }
 }
 
@@ -190,6 +192,9 @@ from data_provider_discogan import *
 
 
 def main_train(trainer):
+    if get_env('trainer.fused_step', False):
+        trainer.enable_fused_step()
+
     from tartist.plugins.trainer_enhancer import summary
     summary.enable_summary_history(trainer)
     summary.enable_echo_summary_scalar(trainer)
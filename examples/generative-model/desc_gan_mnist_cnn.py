@@ -31,6 +31,8 @@ __envs__ = {
         'batch_size': 128,
         'epoch_size': 390,
         'nr_epochs': 200,
+        # run the d/g updates of an iteration in a single session run
+        'fused_step': False,
 
         'env_flags': {
             'log_device_placement': False
@@ -149,6 +151,9 @@ from data_provider_gan_mnist import *
 
 
 def main_train(trainer):
+    if get_env('trainer.fused_step', False):
+        trainer.enable_fused_step()
+
     from tartist.plugins.trainer_enhancer import summary
     summary.enable_summary_history(trainer)
     summary.enable_echo_summary_scalar(trainer)
@@ -64,6 +64,8 @@ __envs__ = {
         # Parameters for PPO optimizer.
         'batch_size': 64,
         'data_repeat': 10,
+        # If true, upload the rollouts into the graph once per update, and feed only the minibatch indices.
+        'rollout_staging': False,
     }
 }
 
@@ -234,6 +236,8 @@ def main_train(trainer):
     from tartist.random.sampler import SimpleBatchSampler
     trainer.set_adv_computer(GAEComputer(get_env('ppo.gamma'), get_env('ppo.gae.lambda')))
     trainer.set_batch_sampler(SimpleBatchSampler(get_env('trainer.batch_size'), get_env('trainer.data_repeat')))
+    if get_env('trainer.rollout_staging', False):
+        trainer.enable_rollout_staging()
 
     # Register plugins.
     from tartist.plugins.trainer_enhancer import summary
@@ -38,7 +38,13 @@ __envs__ = {
 
         'max_kl': 0.01,
         'cg': {
-            'damping': 0.001
+            'damping': 0.001,
+            # Fraction of the batch for the Fisher-vector products (e.g. 0.2), None for the full batch.
+            'fvp_subsample': None
+        },
+        'line_search': {
+            # Number of backtracking line search steps (e.g. 10), 0 to disable.
+            'nr_steps': 0
         },
 
         'use_linear_vr': True,
@@ -144,7 +150,9 @@ def make_player(dump_dir=None):
 
 
 def make_optimizer(env):
-    opt = rl.train.TRPOOptimizer(env, max_kl=get_env('trpo.max_kl'), cg_damping=get_env('trpo.cg.damping'))
+    opt = rl.train.TRPOOptimizer(env, max_kl=get_env('trpo.max_kl'), cg_damping=get_env('trpo.cg.damping'),
+                                 fvp_subsample=get_env('trpo.cg.fvp_subsample'),
+                                 nr_line_search_steps=get_env('trpo.line_search.nr_steps'))
     env.set_policy_optimizer(opt)
 
     use_linear_vr = get_env('trpo.use_linear_vr')
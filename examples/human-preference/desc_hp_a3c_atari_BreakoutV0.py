@@ -69,6 +69,8 @@ __envs__ = {
         'epoch_size': 20,
         'nr_epochs': 100,
         'retrain_thresh': 25,
+        # build the ensemble as a single graph, with batched inference and fused training
+        'stacked': False,
     },
 
     'pcollector': {
@@ -425,7 +427,9 @@ def make_a3c_configs(env):
                                             None, None, None)
     scheduler = libhpref.ExponentialDecayCollectorScheduler(
         get_env('pcollector.nr_total'), get_env('pcollector.nr_pretrain'), get_env('trainer.nr_epochs'))
-    env.player_master.rpredictor = rpredictor = libhpref.EnsemblePredictor(
+    predictor_class = libhpref.StackedEnsemblePredictor if get_env('rpredictor.stacked', False) \
+        else libhpref.EnsemblePredictor
+    env.player_master.rpredictor = rpredictor = predictor_class(
         env, scheduler, predictor_desc,
         nr_ensembles=get_env('rpredictor.nr_ensembles'),
         devices=[env.master_device] * get_env('rpredictor.nr_ensembles'),
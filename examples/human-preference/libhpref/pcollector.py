@@ -7,6 +7,7 @@
 
 import os
 import collections
+import concurrent.futures
 import itertools
 import os.path as osp
 import threading
@@ -43,7 +44,8 @@ def _save_gif(traj, filename):
 class PreferenceCollector(object):
     """Preference collector is the interface for prefcol's front end."""
 
-    def __init__(self, rpredictor, web_configs, video_length=100, window_length=300, pool_size=100):
+    def __init__(self, rpredictor, web_configs, video_length=100, window_length=300, pool_size=100,
+                 nr_render_workers=1, render_backlog=4):
         """
         Initialize the preference collector.
 
@@ -53,9 +55,11 @@ class PreferenceCollector(object):
         :param window_length: window length, for video sampling. The video for labeling will be sampled by choosing
         the subsequent `video_length` frames with largest summed variance within every `window_length` frames.
         :param pool_size: cache pool size for labeling.
+        :param nr_render_workers: number of background workers rendering the demonstrations.
+        :param render_backlog: max number of pairs being rendered (or waiting for rendering) at the same time.
         """
         self._rpredictor = rpredictor
-        self._pool = TrajectoryPairPool(maxlen=pool_size)
+        self._pool = TrajectoryPairPool(maxlen=pool_size, nr_workers=nr_render_workers, max_backlog=render_backlog)
 
         self._webserver = WebServer(self, configs=web_configs)
         self._webserver_thread = None
@@ -173,18 +177,25 @@ class TrajectoryPairPool(object):
     """
     Trajectory pool is a simple pool contains a set of trajectories. In this implementation, we maintain a priority
     queue of given max size. When new trajectory comes in, we push it into the priority queue and pop out the one
-    with least priority.
+    with least priority. Pushing a pair involves no media work, so the collection path is never blocked by rendering.
 
     When pool.pop() method is called, the trajectory pair with highest priority is poped out. The program generates the
     demonstration file (e.g. GIF animation) and return an UID and the pair.
 
+    The demonstrations are generated lazily, only for the pairs requested by the front end. pool.pop_async() pops the
+    pair and submits the rendering to a background worker pool, returning the UID and a future of the pair. At most
+    `max_backlog` pairs can be rendered (or wait for rendering) at the same time; when the backlog is full, the pair is
+    kept in the pool and (None, None) is returned.
+
     See _dump method for details of dump.
     """
-    def __init__(self, maxlen=100, tformat='GIF'):
+    def __init__(self, maxlen=100, tformat='GIF', nr_workers=1, max_backlog=4):
         """
         Initialize an empty trajectory pair pool.
         :param maxlen: max size of the pool.
         :param tformat: trajectory format, default "GIF".
+        :param nr_workers: number of background workers for rendering.
+        :param max_backlog: max number of pairs being rendered (or waiting for rendering).
         """
         self._data_pool = sortedcollections.SortedList()
 
@@ -194,6 +205,15 @@ class TrajectoryPairPool(object):
         self._maxlen = maxlen
         self._tformat = tformat
 
+        self._render_executor = concurrent.futures.ThreadPoolExecutor(max_workers=nr_workers)
+        self._render_backlog = 0
+        self._max_render_backlog = max_backlog
+
+    @property
+    def busy(self):
+        """Whether the rendering backlog is full."""
+        return self._render_backlog >= self._max_render_backlog
+
     def push(self, t1_state, t1_observation, t1_action, t2_state, t2_observation, t2_action, priority):
         with self._data_pool_lock:
             wrapped = _TrajectoryPairWrapper(priority=priority, count=next(self._data_pool_counter),
@@ -208,10 +228,26 @@ class TrajectoryPairPool(object):
         with self._data_pool_lock:
             if len(self._data_pool) == 0:
                 return None, None
-            return self._process(self._data_pool.pop().pair)
+            pair = self._data_pool.pop().pair
+        return self._dump(uuid.uuid4().hex, pair)
+
+    def pop_async(self):
+        with self._data_pool_lock:
+            if len(self._data_pool) == 0 or self.busy:
+                return None, None
+            pair = self._data_pool.pop().pair
+            self._render_backlog += 1
 
-    def _process(self, pair):
         uid = uuid.uuid4().hex
+        future = self._render_executor.submit(lambda: self._dump(uid, pair)[1])
+        future.add_done_callback(self._on_render_done)
+        return uid, future
+
+    def _on_render_done(self, future):
+        with self._data_pool_lock:
+            self._render_backlog -= 1
+
+    def _dump(self, uid, pair):
         dirname = _compose_dir(uid)
         io.mkdir(dirname)
        
@@ -7,6 +7,7 @@
 # This file is part of TensorArtist.
 
 import json
+from tornado import gen
 from tornado.web import RequestHandler
 
 
@@ -34,16 +35,21 @@ class MainHandler(HPHandlerBase):
 
 
 class GetHandler(HPHandlerBase):
+    @gen.coroutine
     def get(self):
-        uid, info = self._pool.pop()
+        # the demonstration is rendered by the pool's workers, do not block the io loop
+        uid, future = self._pool.pop_async()
 
         if uid is not None:
+            yield future
             self.write(json.dumps({
                 'rc': 200,
                 'id': uid,
                 'traj1': '<img src="trajectories/{}/1.gif" />'.format(uid),
                 'traj2': '<img src="trajectories/{}/2.gif" />'.format(uid),
             }))
+        elif self._pool.busy:
+            self.write(json.dumps({'rc': 503}))
         else:
             self.write(json.dumps({'rc': 404}))
 
@@ -15,8 +15,9 @@ from tartist.nn.train import SimpleTrainerEnv, SimpleTrainer
 import threading
 import collections
 import numpy as np
+import tensorflow as tf
 
-__all__ = ['TrainingData', 'PredictorDesc', 'EnsemblePredictor']
+__all__ = ['TrainingData', 'PredictorDesc', 'EnsemblePredictor', 'StackedEnsemblePredictor']
 
 TrainingData = collections.namedtuple('TrainingData', ['t1_state', 't1_action', 't2_state', 't2_action', 'pref'])
 PredictorDesc = collections.namedtuple('PredictorDesc', ['make_network', 'make_optimizer',
@@ -43,6 +44,30 @@ def _compute_e_var(rs, ret_variance):
     return e_r
 
 
+def _compute_e_var_batch(rs, ret_variance):
+    """Compute the mean (and variance) over the ensemble for each sample, rs should be of shape (batch, nr_ensembles)."""
+    e_r = rs.mean(axis=1)
+
+    if ret_variance:
+        var_r = (rs ** 2).mean(axis=1) - e_r ** 2
+        return list(zip(e_r, var_r))
+
+    return list(e_r)
+
+
+def _need_early_stop(losses):
+    """Test whether the validation loss is keeping increasing: 2 out of the last 5 epochs."""
+    losses = losses[-6:]
+    if len(losses) <= 1:
+        return False
+
+    nr_loss_increase = 0
+    for a, b in zip(losses[:-1], losses[1:]):
+        if b > a:
+            nr_loss_increase += 1
+    return nr_loss_increase >= 2
+
+
 def _default_main_train(trainer):
     # TODO:: Early stop
     def on_optimization_before(trainer):
@@ -65,17 +90,7 @@ def _default_main_train(trainer):
         trainer.runtime['validation_losses'].append(avg_loss)
 
         # test whether early stop
-        losses = trainer.runtime['validation_losses'][-6:]
-        if len(losses) <= 1:
-            return
-
-        # 2 out of 5
-        nr_loss_increase = 0
-        for a, b in zip(losses[:-1], losses[1:]):
-            if b > a:
-                nr_loss_increase += 1
-
-        if nr_loss_increase >= 2:
+        if _need_early_stop(trainer.runtime['validation_losses']):
             # acquire early stop
             logger.critical('Validation loss is keeping increasing: acquire early stop.')
             trainer.stop()
@@ -200,10 +215,10 @@ class EnsemblePredictor(PredictorBase):
                 rs = []
                 for f in self._funcs:
                     r = f(state=state_batch, action=action_batch)
-                    rs.append(r)
+                    rs.append(np.reshape(r, (len(state_batch), 1)))
+                rs = np.concatenate(rs, axis=1)
 
-            result = [_compute_e_var(r, ret_variance=ret_variance) for r in rs]
-            return result
+            return _compute_e_var_batch(rs, ret_variance=ret_variance)
 
     def wait(self, epoch):
         target = self._scheduler.get_target(epoch)
@@ -252,7 +267,7 @@ class EnsemblePredictor(PredictorBase):
         # we already use rolling arrays due to some tensorflow bugs.
         # So here during training, we also acquire the lock.
         with self._funcs_lock:
-            self.__train()
+            self._train()
         logger.critical('Predictors training ends.')
 
     def __split_training_data(self):
@@ -279,7 +294,7 @@ class EnsemblePredictor(PredictorBase):
             df_validation = self._wrap_dataflow_validation(self._envs[i], df_validation)
             self._dataflows.append((df_train, df_validation))
 
-    def __train(self):
+    def _train(self):
         """Training step 2: run the trainers."""
 
         logger.critical('Predictor ensemble retraining started.')
@@ -331,3 +346,127 @@ class EnsemblePredictor(PredictorBase):
     def _main_train(self):
         return self._desc.main_train or _default_main_train
 
+
+
+class StackedEnsemblePredictor(EnsemblePredictor):
+    """
+    The ensemble predictor with all the members built into a single graph (each under its own variable scope), sharing
+    one session. The rewards of all members are computed by a single session.run with the inputs fed to all the
+    members, and the outputs are concatenated as a (batch, nr_ensembles) matrix.
+
+    The training runs as a fused step: a single session.run updates all the members, each with a minibatch from its own
+    (bootstrapped) training set. The validation losses of all members are also computed in one run, and the members
+    stop early individually. Note that the main_train of the desc is not used in this mode.
+    """
+
+    _member_scope_format = 'ensemble{}'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._train_ops = []
+        self._train_funcs = dict()
+        self._loss_func = None
+
+    def predict(self, state, action, ret_variance=False):
+        return self.predict_batch(state[np.newaxis], np.array(action)[np.newaxis], ret_variance=ret_variance)[0]
+
+    def predict_batch(self, state_batch, action_batch, ret_variance=False):
+        with self._funcs_lock:
+            if len(self._funcs) == 0:
+                rs = self._rng.random_sample(size=(len(state_batch), self._nr_ensembles))
+            else:
+                feed_dict = self._make_feed_dict([dict(state=state_batch, action=action_batch)] * self._nr_ensembles)
+                rs = self._funcs[0](**feed_dict)
+                rs = np.concatenate([np.reshape(r, (len(state_batch), 1)) for r in rs], axis=1)
+
+            return _compute_e_var_batch(rs, ret_variance=ret_variance)
+
+    def _initialize_envs(self):
+        master_env = SimpleTrainerEnv(SimpleTrainerEnv.Phase.TRAIN, self._devices[0])
+        master_env.share_func_lock_with(self._owner_env)
+
+        for eid in range(self._nr_ensembles):
+            if eid == 0:
+                env = master_env
+            else:
+                # share the graph, the session and the function lock with the master env
+                env = SimpleTrainerEnv(SimpleTrainerEnv.Phase.TRAIN, self._devices[eid], sync_with=master_env)
+
+            with env.as_default(), env.variable_scope(self._member_scope_format.format(eid)):
+                self._make_network(env)
+                self._make_optimizer(env)
+            self._envs.append(env)
+
+        with master_env.as_default():
+            for eid, env in enumerate(self._envs):
+                scope = self._member_scope_format.format(eid) + '/.*'
+                var_list = env.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, scope=scope)
+                self._train_ops.append(env.optimizer.minimize(env.network.loss, var_list=var_list))
+
+        # Initialize the fully random weights.
+        master_env.initialize_all_variables()
+
+        func = master_env.make_func()
+        func.compile([env.network.outputs[self._network_output_name] for env in self._envs])
+        self._funcs.append(func)
+
+        self._loss_func = master_env.make_func()
+        self._loss_func.compile([env.network.loss for env in self._envs])
+
+    def _make_feed_dict(self, members_data, members=None):
+        """Make a single feed dict for the members, from the list of their feed dicts (with the plain names)."""
+        members = members if members is not None else range(self._nr_ensembles)
+        feed_dict = dict()
+        for eid, data in zip(members, members_data):
+            data = dict(data)
+            # the data-parallel inputs are renamed by the splitters of the member (e.g., state => tower/0/state), the
+            # tower prefixes do not contain the member scope, which is added to all the names
+            for f in self._envs[eid].dpsplitters:
+                f(data)
+            prefix = self._member_scope_format.format(eid) + '/'
+            for k, v in data.items():
+                feed_dict[prefix + k] = v
+        return feed_dict
+
+    def _get_train_func(self, members):
+        members = tuple(members)
+        if members not in self._train_funcs:
+            func = self._envs[0].make_func()
+            for eid in members:
+                func.add_extra_op(self._train_ops[eid])
+            func.compile([self._envs[eid].network.loss for eid in members])
+            self._train_funcs[members] = func
+        return self._train_funcs[members]
+
+    def _train(self):
+        logger.critical('Predictor ensemble fused retraining started.')
+
+        # When you run train(), the parameters will be reset, as the SimpleTrainer does.
+        self._envs[0].initialize_all_variables()
+
+        data_iters = [iter(df_train) for df_train, _ in self._dataflows]
+        validation_losses = [[] for _ in range(self._nr_ensembles)]
+        members = list(range(self._nr_ensembles))
+
+        for epoch in range(1, self._nr_epochs + 1):
+            func = self._get_train_func(members)
+            for i in range(self._epoch_size):
+                func(**self._make_feed_dict([next(data_iters[eid]) for eid in members], members))
+
+            # compute the validation losses of all the members in one run
+            sum_losses, nr_data = 0, 0
+            for data in zip(*[df_validation for _, df_validation in self._dataflows]):
+                sum_losses += np.array(self._loss_func(**self._make_feed_dict(data)))
+                nr_data += 1
+            avg_losses = sum_losses / max(nr_data, 1)
+            logger.info('Epoch: {}: average validation losses = {}.'.format(epoch, avg_losses))
+
+            for eid in list(members):
+                validation_losses[eid].append(avg_losses[eid])
+                if _need_early_stop(validation_losses[eid]):
+                    logger.critical('Validation loss of predictor #{} is keeping increasing: early stop.'.format(eid))
+                    members.remove(eid)
+            if len(members) == 0:
+                break
+
+        logger.critical('Predictor ensemble fused retraining finished.')
@@ -0,0 +1,62 @@
+# -*- coding:utf8 -*-
+# File   : benchmark-dataflow.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+# 
+# This file is part of TensorArtist.
+
+from tartist.core import get_logger
+from tartist.core.utils.cli import load_desc
+from tartist.data.flow import DataFlowProfiler
+from tartist.nn import Env
+
+import argparse
+import json
+import time
+
+logger = get_logger(__file__)
+
+parser = argparse.ArgumentParser()
+parser.add_argument(dest='desc', help='The description file module')
+parser.add_argument('-f', '--func', dest='func', default='make_dataflow_train', help='The dataflow maker in the desc')
+parser.add_argument('-n', '--nr-samples', dest='nr_samples', default=1000, type=int,
+                    help='Number of samples (from the final stage) to benchmark')
+parser.add_argument('--warmup', dest='nr_warmup', default=10, type=int, help='Number of samples to warm up')
+parser.add_argument('--interval', dest='interval', default=5, type=float, help='Report interval in seconds')
+parser.add_argument('--json', dest='json', default=None, help='Dump the final report to the json file')
+args = parser.parse_args()
+
+
+def main():
+    desc = load_desc(args.desc)
+
+    env = Env(Env.Phase.TRAIN, master_dev='/cpu:0')
+    df = getattr(desc, args.func)(env)
+
+    profiler = DataFlowProfiler(df)
+    it = iter(profiler.dataflow)
+    for i in range(args.nr_warmup):
+        next(it)
+    profiler.reset()
+
+    last_report = time.time()
+    for i in range(args.nr_samples):
+        try:
+            next(it)
+        except StopIteration:
+            logger.warn('Dataflow exhausted after {} samples.'.format(i))
+            break
+        if time.time() - last_report > args.interval:
+            logger.info(profiler.format_report())
+            last_report = time.time()
+
+    logger.info(profiler.format_report())
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(profiler.report(), f, indent=2)
+        logger.info('Report dumped to {}.'.format(args.json))
+
+
+if __name__ == '__main__':
+    main()
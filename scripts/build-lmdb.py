@@ -0,0 +1,72 @@
+# -*- coding:utf8 -*-
+# File   : build-lmdb.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist import image
+from tartist.core import get_logger
+from tartist.data.kvstore import lmdb_bulk_build, sharded_lmdb_bulk_build
+
+import argparse
+import glob
+import json
+import os.path as osp
+
+logger = get_logger(__file__)
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-i', '--input', dest='input_dir', required=True, help='The directory of the source files')
+parser.add_argument('-o', '--output', dest='output', required=True, help='The target LMDB path')
+parser.add_argument('-p', '--pattern', dest='pattern', default='*.jpg',
+                    help='The glob pattern of the source files, relative to the input directory')
+parser.add_argument('--size', dest='size', default=None, type=int,
+                    help='If given, resize (by the shorter edge) and center crop the images to size x size, and '
+                         're-encode them as JPEG; otherwise the files are stored as is')
+parser.add_argument('--quality', dest='quality', default=90, type=int, help='JPEG quality for re-encoding')
+parser.add_argument('--codec', dest='codec', default=None, choices=['zlib', 'lzma'], help='Value compression codec')
+parser.add_argument('-j', '--nr-workers', dest='nr_workers', default=None, type=int, help='Number of workers')
+parser.add_argument('--batch-size', dest='batch_size', default=1024, type=int, help='Records per transaction')
+parser.add_argument('--shards', dest='nr_shards', default=None, type=int,
+                    help='If given, build a ShardedLMDBKVStore with the number of shards')
+parser.add_argument('--route', dest='route', default='hash', choices=['hash', 'range'], help='Shard routing method')
+parser.add_argument('--json', dest='json', default=None, help='Dump the statistics to the json file')
+args = parser.parse_args()
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def read_and_encode_image(path):
+    img = image.imread(path)
+    img = image.resize_minmax(img, args.size, 10000)
+    img = image.center_crop(img, args.size)
+    return image.jpeg_encode(img, quality=args.quality)
+
+
+def main():
+    files = sorted(glob.glob(osp.join(args.input_dir, args.pattern), recursive=True))
+    records = [(osp.splitext(osp.relpath(f, args.input_dir))[0], f) for f in files]
+
+    logger.critical('Building lmdb:')
+    logger.critical('  Source files   : {} ({} files)'.format(osp.join(args.input_dir, args.pattern), len(files)))
+    logger.critical('  Target database: {}'.format(args.output))
+
+    kwargs = dict(encode_func=read_file if args.size is None else read_and_encode_image,
+                  codec=args.codec, nr_workers=args.nr_workers, batch_size=args.batch_size)
+    if args.nr_shards is None:
+        stat = lmdb_bulk_build(osp.realpath(args.output), records, **kwargs)
+    else:
+        stat = sharded_lmdb_bulk_build(osp.realpath(args.output), records, args.nr_shards, route=args.route, **kwargs)
+
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(stat, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,7 @@
 # This file is part of TensorArtist.
 
 from tartist.core import get_logger
-from tartist.data.rflow.name_server import NameServer
+from tartist.data.rflow.name_server import NameServer, ReactorNameServer
 from tartist.data.rflow import configs
 import argparse
 
@@ -17,9 +17,11 @@ parser = argparse.ArgumentParser()
 parser.add_argument('-s', '--host', dest='host', default=configs.NS_CTL_HOST)
 parser.add_argument('-p', '--port', dest='port', default=configs.NS_CTL_PORT)
 parser.add_argument('--protocal', dest='protocal', default=configs.NS_CTL_PROTOCAL)
+parser.add_argument('--reactor', dest='reactor', action='store_true', help='use the single-threaded reactor server')
 args = parser.parse_args()
 
 
 if __name__ == '__main__':
     logger.critical('Starting name server at {}://{}:{}.'.format(args.protocal, args.host, args.port))
-    NameServer(host=args.host, port=args.port, protocal=args.protocal).mainloop()
+    server_class = ReactorNameServer if args.reactor else NameServer
+    server_class(host=args.host, port=args.port, protocal=args.protocal).mainloop()
@@ -11,6 +11,7 @@ from tartist.core.utils.cli import load_desc, parse_devices, parse_args
 from tartist.nn import Env, train
 
 import os
+import os.path as osp
 import argparse
 import tensorflow as tf
 
@@ -29,6 +30,16 @@ parser.add_argument('--continue', dest='continue_flag', default=False, action='s
 parser.add_argument('--continue-from', dest='continue_from', default=-1, type=int,
                     help='Continue from the given epoch')
 parser.add_argument('--queue', dest='use_queue', default=False, action='store_true', help='Use input queues')
+parser.add_argument('--queue-size', dest='queue_size', default=None, type=int,
+                    help='Capacity of the input queue, default value can be set in env')
+parser.add_argument('--queue-threads', dest='queue_nr_threads', default=None, type=int,
+                    help='Number of threads feeding the input queue, default value can be set in env')
+parser.add_argument('--profile', dest='profile_interval', default=None, type=int,
+                    help='Enable the trainer profiler, aggregating every given number of iterations')
+parser.add_argument('--trace', dest='trace_interval', default=None, type=int,
+                    help='Trace the training function every given number of iterations')
+parser.add_argument('--trace-window', dest='trace_window', default=None, type=int, nargs=2, metavar=('BEGIN', 'END'),
+                    help='Trace the training function for iterations in [BEGIN, END)')
 
 parser.add_argument('-y', '--yes', '--quiet', dest='quiet', default=False, action='store_true', help='Quiet run')
 args = parse_args(parser)
@@ -50,6 +61,10 @@ def main():
     env_cls = getattr(desc, '__trainer_env_cls__', train.SimpleTrainerEnv)
     env = env_cls(Env.Phase.TRAIN, devices[0])
     env.flags.update(**get_env('trainer.env_flags', {}))
+    if args.queue_size is not None:
+        env.flags.input_queue_size = args.queue_size
+    if args.queue_nr_threads is not None:
+        env.flags.input_queue_nr_threads = args.queue_nr_threads
     if len(devices) > 1:
         env.set_slave_devices(devices[1:])
 
@@ -78,6 +93,20 @@ def main():
     elif args.initial_weights_path is not None:
         snapshot.enable_weights_loading_after_intialization(trainer, weights_fpath=args.initial_weights_path)
 
+    if args.profile_interval is not None:
+        json_path = osp.join(get_env('dir.root'), 'profile.json') if get_env('dir.root') else None
+        trainer.enable_profiler(args.profile_interval, json_path=json_path)
+
+    if args.trace_interval is not None or args.trace_window is not None:
+        assert get_env('dir.root'), 'Must provide the dump root for tracing.'
+        assert hasattr(trainer, 'enable_tracing'), 'Tracing is not supported by {}.'.format(type(trainer).__name__)
+        trainer.enable_tracing(osp.join(get_env('dir.root'), 'trace'),
+                               interval=args.trace_interval, window=args.trace_window)
+
+    if args.use_queue:
+        from tartist.plugins.trainer_enhancer import input_queue
+        input_queue.enable_input_queue_monitor(trainer)
+
     desc.main_train(trainer)
 
 
@@ -27,6 +27,8 @@ class GANGraphKeys:
 class GANTrainerEnv(TrainerEnvBase):
     _g_optimizer = None
     _d_optimizer = None
+    _g_grads_and_vars = None
+    _d_grads_and_vars = None
 
     @notnone_property
     def g_loss(self):
@@ -61,14 +63,40 @@ class GANTrainerEnv(TrainerEnvBase):
             g_func = self.make_func()
             scope = GANGraphKeys.GENERATOR_VARIABLES + '/.*'
             g_var_list = self.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, scope=scope)
-            g_func.add_extra_op(self.g_optimizer.minimize(g_loss, var_list=g_var_list))
+            self._g_grads_and_vars = self.g_optimizer.compute_gradients(g_loss, var_list=g_var_list)
+            g_func.add_extra_op(self.g_optimizer.apply_gradients(self._g_grads_and_vars))
 
             d_func = self.make_func()
             scope = GANGraphKeys.DISCRIMINATOR_VARIABLES + '/.*'
             d_var_list = self.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, scope=scope)
-            d_func.add_extra_op(self.d_optimizer.minimize(d_loss, var_list=d_var_list))
+            self._d_grads_and_vars = self.d_optimizer.compute_gradients(d_loss, var_list=d_var_list)
+            d_func.add_extra_op(self.d_optimizer.apply_gradients(self._d_grads_and_vars))
             return g_func, d_func
 
+    def make_fused_optimizable_func(self):
+        """
+        Make a single function updating both the discriminator and the generator in one session run. It reuses the
+        gradients built by make_optimizable_func (thus should be called after it), and applies both updates only after
+        all the gradients have been computed. Both gradients come from the same forward pass with the pre-update
+        parameters: the generator sees the pre-update discriminator.
+
+        Note that this is a simultaneous update, NOT equivalent to the sequential one (a discriminator step and then a
+        generator step with a fresh forward pass, where the generator sees the updated discriminator).
+        """
+        with self.as_default():
+            assert self._d_grads_and_vars is not None and self._g_grads_and_vars is not None, \
+                'make_optimizable_func should be called first.'
+
+            # the in-place updates must not race with the reads of the backward passes
+            grads = [g for g, _ in self._d_grads_and_vars + self._g_grads_and_vars if g is not None]
+            with tf.control_dependencies(grads):
+                d_op = self.d_optimizer.apply_gradients(self._d_grads_and_vars)
+                g_op = self.g_optimizer.apply_gradients(self._g_grads_and_vars)
+
+            func = self.make_func()
+            func.add_extra_op(tf.group(d_op, g_op))
+            return func
+
 
 class GANDataFlow(SimpleDataFlowBase):
     def __init__(self, g_input, d_input, g_times, d_times):
@@ -94,6 +122,26 @@ class GANDataFlow(SimpleDataFlowBase):
 class GANTrainer(TrainerBase):
     _g_func = None
     _d_func = None
+    _fused_func = None
+    _fused_step = False
+
+    def enable_fused_step(self):
+        """
+        Enable the fused step mode, should be called before the training. In this mode, each pair of discriminator and
+        generator updates in an iteration is performed by a single session run (see
+        GANTrainerEnv.make_fused_optimizable_func), and the summaries are only collected once per iteration.
+
+        Note that the fused mode is not equivalent to the sequential one: the two updates of a pair share one forward
+        pass, and the generator sees the pre-update discriminator. The pair is fed with the union of the two feed dicts
+        (the discriminator's wins on conflicts). The extra discriminator updates (if nr_d > nr_g) are performed before
+        the pairs, and the extra generator ones after the pairs.
+        """
+        self._fused_step = True
+        return self
+
+    @property
+    def fused_step(self):
+        return self._fused_step
 
     def initialize(self):
         with self.env.as_default():
@@ -101,6 +149,9 @@ class GANTrainer(TrainerBase):
             summary.scalar('d_loss', self.env.d_loss, collections=[GANGraphKeys.DISCRIMINATOR_SUMMARIES])
         self._g_func, self._d_func = self.env.make_optimizable_func()
         assert not self._g_func.queue_enabled and not self._d_func.queue_enabled
+        if self._fused_step:
+            self._fused_func = self.env.make_fused_optimizable_func()
+            assert not self._fused_func.queue_enabled
         super().initialize()
 
     @notnone_property
@@ -111,14 +162,40 @@ class GANTrainer(TrainerBase):
     def d_func(self):
         return self._d_func
 
+    @notnone_property
+    def fused_func(self):
+        return self._fused_func
+
     def _compile_fn_train(self):
+        if self._fused_step:
+            self._compile_fn_train_fused()
+            return
+
         self._compile_func_with_summary(self._g_func, {'g_loss': self.env.g_loss},
                                         summary_scope=GANGraphKeys.GENERATOR_SUMMARIES)
         self._compile_func_with_summary(self._d_func, {'d_loss': self.env.d_loss},
                                         summary_scope=GANGraphKeys.DISCRIMINATOR_SUMMARIES)
 
+    def _compile_fn_train_fused(self):
+        if not self._fused_func.compiled:
+            with self.env.as_default():
+                summaries = [self.network.get_merged_summaries(k) for k in (
+                    GANGraphKeys.DISCRIMINATOR_SUMMARIES, GANGraphKeys.GENERATOR_SUMMARIES)]
+                summaries = [s for s in summaries if s is not None]
+                if len(summaries):
+                    self._fused_func.add_extra_kwoutput('summaries', tf.summary.merge(summaries))
+            self._fused_func.compile({'d_loss': self.env.d_loss, 'g_loss': self.env.g_loss})
+        # the unpaired updates do not collect the summaries
+        if not self._d_func.compiled:
+            self._d_func.compile({'d_loss': self.env.d_loss})
+        if not self._g_func.compiled:
+            self._g_func.compile({'g_loss': self.env.g_loss})
+
     def _run_step(self, data):
         self._compile_fn_train()
+        if self._fused_step:
+            return self._run_step_fused(data)
+
         all_summaries = []
         d_losses = []
         g_losses = []
@@ -140,3 +217,30 @@ class GANTrainer(TrainerBase):
 
         self.runtime['summaries'] = all_summaries
         return {'g_loss': sum(g_losses) / len(g_losses), 'd_loss': sum(d_losses) / len(d_losses)}
+
+    def _run_step_fused(self, data):
+        d_losses = []
+        g_losses = []
+        d_feeds, g_feeds = data['d'], data['g']
+        nr_pairs = min(len(d_feeds), len(g_feeds))
+        nr_extra_d = len(d_feeds) - nr_pairs
+
+        for feed_dict in d_feeds[:nr_extra_d]:
+            d_losses.append(self._d_func.call_args(feed_dict)['d_loss'])
+
+        out = None
+        for i in range(nr_pairs):
+            feed_dict = dict(g_feeds[i])
+            feed_dict.update(d_feeds[nr_extra_d + i])
+            out = self._fused_func.call_args(feed_dict)
+            d_losses.append(out['d_loss'])
+            g_losses.append(out['g_loss'])
+
+        for feed_dict in g_feeds[nr_pairs:]:
+            g_losses.append(self._g_func.call_args(feed_dict)['g_loss'])
+
+        all_summaries = []
+        if out is not None and 'summaries' in out:
+            all_summaries.append(tf.Summary.FromString(out['summaries']))
+        self.runtime['summaries'] = all_summaries
+        return {'g_loss': sum(g_losses) / len(g_losses), 'd_loss': sum(d_losses) / len(d_losses)}
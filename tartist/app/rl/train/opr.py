@@ -10,7 +10,9 @@ from tartist.nn import opr as O
 from tartist.nn.graph import as_tftensor, as_varnode
 from tartist.nn.tfutils import escape_name
 
+import numpy as np
 import tensorflow as tf
+from tensorflow.contrib import graph_editor
 
 
 def vectorize_var_list(var_list):
@@ -48,3 +50,69 @@ def make_param_gs(env, var_list, name_scope):
 
     return param_nr_elems, param_getter, param_setter, param_provider
 
+
+
+class RolloutStaging(object):
+    """
+    Stage the rollout batch inside the graph. The consumers of the given placeholders are rerouted to
+    concat([placeholder, gather(store, index)]), where the store is a local variable holding the whole batch. The index
+    defaults to empty, so that the functions feeding the placeholders as usual are not affected; while the training
+    functions upload the batch once per update (see upload), and then feed only the indices of the minibatches, with
+    empty placeholders (see make_feed_dict).
+
+    The staging must be set up before the first run of the graph, and initialized after the variable initialization.
+    """
+
+    def __init__(self, env, names, name_scope='rollout_staging'):
+        self._env = env
+        self._names = list(names)
+        self._stores = []
+        self._providers = []
+        self._empty_feeds = {}
+
+        graph = env.graph
+        with env.name_scope(name_scope):
+            self._index = tf.placeholder_with_default(tf.zeros([0], dtype=tf.int32), shape=(None, ), name='index')
+
+            upload_ops = []
+            for name in self._names:
+                p = graph.get_tensor_by_name(name + ':0')
+                consumers = p.consumers()
+                shape = p.get_shape().as_list()
+                assert None not in shape[1:], 'Could not determine the shape for staged placeholder: {}.'.format(name)
+                empty_shape = [0] + shape[1:]
+
+                provider = tf.placeholder(p.dtype, shape=shape, name='upload_' + escape_name(p))
+                store = tf.Variable(tf.zeros(empty_shape, dtype=p.dtype), trainable=False, validate_shape=False,
+                                    collections=[tf.GraphKeys.LOCAL_VARIABLES], name='store_' + escape_name(p))
+                upload_ops.append(tf.assign(store, provider, validate_shape=False))
+
+                staged = tf.concat([p, tf.gather(store, self._index)], axis=0, name='staged_' + escape_name(p))
+                staged.set_shape(p.get_shape())
+                graph_editor.reroute_ts([staged], [p], can_modify=consumers)
+
+                self._stores.append(store)
+                self._providers.append(provider)
+                self._empty_feeds[name] = np.zeros(empty_shape, dtype=p.dtype.as_numpy_dtype)
+
+            self._upload_op = tf.group(*upload_ops)
+            self._initializer = tf.variables_initializer(self._stores)
+
+    @property
+    def names(self):
+        return self._names
+
+    def initialize(self):
+        self._env.session.run(self._initializer)
+
+    def upload(self, feed_dict):
+        """Upload the whole batch, feed_dict should contain all the staged names."""
+        self._env.session.run(self._upload_op, feed_dict={
+            provider: feed_dict[name] for name, provider in zip(self._names, self._providers)
+        })
+
+    def make_feed_dict(self, index):
+        """Make the feed dict of a minibatch, by the indices in the uploaded batch."""
+        feed_dict = self._empty_feeds.copy()
+        feed_dict[self._index.name] = np.asarray(index, dtype='int32')
+        return feed_dict
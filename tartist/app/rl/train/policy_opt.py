@@ -6,13 +6,14 @@
 # 
 # This file is part of TensorArtist.
 
-from .opr import vectorize_var_list
+from .opr import vectorize_var_list, make_param_gs, RolloutStaging
 from tartist import random
 from tartist.app.rl.utils.math import normalize_advantage
 from tartist.core.utils.meta import notnone_property
 from tartist.core.utils.nd import nd_batch_size
 from tartist.core.utils.thirdparty import get_tqdm_defaults
-from tartist.nn import summary
+from tartist.nn import opr as O, summary
+from tartist.nn.graph import Function
 from tartist.nn.graph import as_tftensor
 from tartist.nn.optimizer import CustomOptimizerBase
 from tartist.nn.tfutils import escape_name
@@ -46,10 +47,32 @@ class TRPOOptimizer(CustomOptimizerBase):
     # _cg_eps = 1e-8
     _cg_eps = 0
 
-    def __init__(self, env, max_kl, cg_damping):
+    def __init__(self, env, max_kl, cg_damping, fvp_subsample=None, nr_line_search_steps=0,
+                 line_search_backtrack_ratio=0.5, line_search_accept_ratio=0.1):
+        """
+        :param env: the trainer env.
+        :param max_kl: the max KL divergence between the policies before and after the update.
+        :param cg_damping: the damping of the Fisher-vector products.
+        :param fvp_subsample: if not None, the fraction of the batch used for the Fisher-vector products in the
+        conjugate gradient. The policy gradient is always computed over the full batch.
+        :param nr_line_search_steps: max number of backtracking steps, 0 for applying the full step directly.
+        :param line_search_backtrack_ratio: the step size is shrunk by this ratio at each backtracking step.
+        :param line_search_accept_ratio: a step is accepted if the ratio of the actual improvement of the loss to the
+        expected one (by linear approximation) is larger than this value, and the KL constraint is satisfied.
+        """
         self._env = env
         self._max_kl = max_kl
         self._cg_damping = cg_damping
+        self._fvp_subsample = fvp_subsample
+        self._nr_line_search_steps = nr_line_search_steps
+        self._line_search_backtrack_ratio = line_search_backtrack_ratio
+        self._line_search_accept_ratio = line_search_accept_ratio
+
+    @property
+    def staged(self):
+        """Whether the update is run in stages (see make_staged_func), i.e., with subsampled Fisher-vector products or
+        line search."""
+        return self._fvp_subsample is not None or self._nr_line_search_steps > 0
 
     def minimize(self, loss, kl_self, var_list):
         with self._env.name_scope(self._name):
@@ -62,9 +85,33 @@ class TRPOOptimizer(CustomOptimizerBase):
             with tf.name_scope('update'):
                 opt_op = self._gen_update_op(var_list, full_step)
 
-        # TODO:: Line search
         return opt_op
 
+    def make_staged_func(self, loss, kl_self, kl, var_list):
+        """
+        Make the function for the staged update, which has the same interface as the optimizable function:
+        func.call_args(feed_dict) performs an update. The stages are: 1) the policy gradient over the full batch;
+        2) the conjugate gradient over a subsample of the batch (the gradient is fed back); 3) the backtracking line
+        search, each candidate step is set to the variables and evaluated over the full batch.
+        """
+        with self._env.name_scope(self._name):
+            pg_grad = vectorize_var_list(tf.gradients(-loss, var_list))
+            kl_grad = vectorize_var_list(tf.gradients(kl_self, var_list))
+            pg_grad_provider = as_tftensor(O.placeholder('pg_grad', shape=pg_grad.get_shape()))
+
+            with tf.name_scope('conjugate_gradient'):
+                full_step, _ = self._conjugate_gradient(
+                    var_list, pg_grad_provider, kl_grad, self._max_kl, self._cg_damping)
+                expected_improve = tf.reduce_sum(pg_grad_provider * full_step)
+
+        _, param_getter, param_setter, param_provider = make_param_gs(self._env, var_list, self._name + '_params')
+
+        return _TRPOStagedFunction(self, dict(
+            loss=as_tftensor(loss), kl=as_tftensor(kl), pg_grad=pg_grad, pg_grad_provider=pg_grad_provider,
+            full_step=full_step, expected_improve=expected_improve,
+            param_getter=param_getter, param_setter=param_setter, param_provider=param_provider
+        ))
+
     def _gen_update_op(self, var_list, full_step):
         var_shapes = [as_tftensor(v).get_shape().as_list() for v in var_list]
         for vs, v in zip(var_shapes, var_list):
@@ -134,6 +181,73 @@ class TRPOOptimizer(CustomOptimizerBase):
         return full_step, negg_dot_stepdir
 
 
+class _TRPOStagedFunction(object):
+    def __init__(self, optimizer, ops):
+        self._opt = optimizer
+        self._ops = ops
+
+    @property
+    def session(self):
+        return self._opt._env.session
+
+    def compile(self, outputs):
+        assert len(outputs) == 0, 'The staged TRPO function has no outputs.'
+
+    def call_args(self, feed_dict):
+        # subsample before the data-parallel splitting, thus each split gets its share of the subsample
+        cg_feed_dict = self._make_feed_dict(self._subsample(feed_dict))
+        feed_dict = self._make_feed_dict(feed_dict)
+
+        # as a single function call: the other functions (e.g. the predictors) never see the trial parameters
+        with self._opt._env.with_func_lock():
+            pg_grad, loss = self.session.run([self._ops['pg_grad'], self._ops['loss']], feed_dict=feed_dict)
+
+            cg_feed_dict[self._ops['pg_grad_provider']] = pg_grad
+            full_step, expected_improve = self.session.run(
+                [self._ops['full_step'], self._ops['expected_improve']], feed_dict=cg_feed_dict)
+
+            theta = self.session.run(self._ops['param_getter'])
+            step_size, nr_steps = self._line_search(feed_dict, theta, full_step, loss, expected_improve)
+        return dict(p_step_size=step_size, p_nr_line_search_steps=nr_steps)
+
+    def _make_feed_dict(self, feed_dict):
+        # as Function.__call__
+        feed_dict = dict(feed_dict)
+        for f in self._opt._env.dpsplitters:
+            f(feed_dict)
+        return Function.canonize_feed_dict(feed_dict)
+
+    def _subsample(self, feed_dict):
+        if self._opt._fvp_subsample is None:
+            return feed_dict
+        n = nd_batch_size(feed_dict)
+        idx = np.sort(random.permutation(n)[:max(1, int(n * self._opt._fvp_subsample))])
+        return {k: v[idx] for k, v in feed_dict.items()}
+
+    def _set_param(self, theta):
+        self.session.run(self._ops['param_setter'], feed_dict={self._ops['param_provider']: theta})
+
+    def _line_search(self, feed_dict, theta, full_step, loss, expected_improve):
+        opt = self._opt
+        if opt._nr_line_search_steps == 0:
+            self._set_param(theta + full_step)
+            return 1., 0
+
+        step_size = 1.
+        for i in range(opt._nr_line_search_steps):
+            self._set_param(theta + step_size * full_step)
+            new_loss, kl = self.session.run([self._ops['loss'], self._ops['kl']], feed_dict=feed_dict)
+            actual_improve = loss - new_loss
+            if kl <= opt._max_kl * 1.5 and actual_improve > 0 and \
+                    actual_improve / (expected_improve * step_size + 1e-8) > opt._line_search_accept_ratio:
+                return step_size, i + 1
+            step_size *= opt._line_search_backtrack_ratio
+
+        # No acceptable step, revert to the old parameters.
+        self._set_param(theta)
+        return 0., opt._nr_line_search_steps
+
+
 class ACOptimizationTrainerEnvBase(TrainerEnvBase):
     @notnone_property
     def policy_loss(self):
@@ -208,10 +322,14 @@ class TRPOTrainerEnv(AlterACOptimizationTrainerEnvBase):
             policy_loss = policy_loss or self.policy_loss
             kl_self = kl_self or self.policy_kl_self
 
-            p_func = self.make_func()
             scope = ACGraphKeys.POLICY_VARIABLES + '/.*'
             p_var_list = self.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, scope=scope)
-            p_func.add_extra_op(self.policy_optimizer.minimize(policy_loss, kl_self, var_list=p_var_list))
+            if self.policy_optimizer.staged:
+                p_func = self.policy_optimizer.make_staged_func(
+                    policy_loss, kl_self, self.policy_kl, var_list=p_var_list)
+            else:
+                p_func = self.make_func()
+                p_func.add_extra_op(self.policy_optimizer.minimize(policy_loss, kl_self, var_list=p_var_list))
 
             if self.value_regressor is not None:
                 return p_func
@@ -350,7 +468,11 @@ class AlterSurrOptimizationTrainerBase(ACOptimizationTrainerBase, SurrOptimizerT
 
         if 'summaries' in p_outputs:
             summaries.value.MergeFrom(tf.Summary.FromString(p_outputs['summaries']).value)
-            output.update(p_outputs)
+        output.update(p_outputs)
+        # the outcome of the line search of the staged TRPO update, a zero step size means the update is reverted
+        for k in ('p_step_size', 'p_nr_line_search_steps'):
+            if k in p_outputs:
+                summaries.value.add(tag='train/' + k, simple_value=p_outputs[k])
 
         self.runtime['summaries'] = summaries
         return output
@@ -438,14 +560,58 @@ class TRPOTrainer(AlterSurrOptimizationTrainerBase):
 
     def _run_step_p(self, feed_dict):
         feed_dict = {k: feed_dict[k] for k in self._p_feed_dict_keys}
-        self._p_func.call_args(feed_dict)
-        p_outputs = self._p_func_inference.call_args(feed_dict)
+        p_outputs = self._p_func.call_args(feed_dict)
+        p_outputs = dict(p_outputs or {})
+        p_outputs.update(self._p_func_inference.call_args(feed_dict))
         return p_outputs
 
 
 class PPOTrainerMixin(ACOptimizationTrainerBase):
     _batch_sampler = None
     _inference_batch_size = None
+    _use_rollout_staging = False
+    _rollout_staging = None
+
+    def enable_rollout_staging(self):
+        """
+        Upload the rollout batch into the graph once per update, and feed only the indices of the minibatches in the
+        optimization epochs (see opr.RolloutStaging). Must be called before the initialization.
+        """
+        self._use_rollout_staging = True
+        return self
+
+    def initialize(self):
+        super().initialize()
+        if self._rollout_staging is not None:
+            self._rollout_staging.initialize()
+
+    def _initialize_opt_func(self):
+        if self._use_rollout_staging:
+            self._rollout_staging = RolloutStaging(self.env, self._get_staged_names())
+        super()._initialize_opt_func()
+
+    def _get_feed_dict(self, data_list):
+        feed_dict = super()._get_feed_dict(data_list)
+        if self._rollout_staging is not None:
+            self._rollout_staging.upload(self._get_staged_feed_dict(feed_dict))
+        return feed_dict
+
+    def _get_staged_names(self):
+        raise NotImplementedError()
+
+    def _get_staged_feed_dict(self, feed_dict):
+        raise NotImplementedError()
+
+    def _run_minibatches(self, func, feed_dict, keys, renames=None, desc=None):
+        if self._rollout_staging is None:
+            iterator = self.batch_sampler(feed_dict, keys, renames=renames)
+        else:
+            iterator = self.batch_sampler({'index': np.arange(nd_batch_size(feed_dict))}, ['index'])
+
+        for batch in tqdm(iterator, desc=desc, total=len(iterator), leave=False, **get_tqdm_defaults()):
+            if self._rollout_staging is not None:
+                batch = self._rollout_staging.make_feed_dict(batch['index'])
+            func.call_args(batch)
 
     def _initialize_summaries(self):
         with self.env.as_default():
@@ -464,6 +630,14 @@ class PPOTrainerMixin(ACOptimizationTrainerBase):
         return self._inference_batch_size
 
     def _make_inference_batch(self, feed_dict):
+        if self._rollout_staging is not None:
+            n = nd_batch_size(feed_dict)
+            if self._inference_batch_size is None:
+                idx = np.arange(n)
+            else:
+                idx = random.randint(n, size=self._inference_batch_size)
+            return self._rollout_staging.make_feed_dict(idx)
+
         if self._inference_batch_size is None:
             return feed_dict
         else:
@@ -487,33 +661,28 @@ class PPOTrainer(PPOTrainerMixin, AlterSurrOptimizationTrainerBase):
             self._compile_func_with_summary(
                 self._v_func, {'v_loss': self.env.value_loss}, ACGraphKeys.VALUE_SUMMARIES)
 
+    def _get_staged_names(self):
+        names = list(self._p_feed_dict_keys)
+        if not self._has_value_regressor():
+            names.append('value_label')
+        return names
+
+    def _get_staged_feed_dict(self, feed_dict):
+        res = {k: feed_dict[k] for k in self._p_feed_dict_keys}
+        if not self._has_value_regressor():
+            res['value_label'] = feed_dict['return_']
+        return res
+
     def _run_step_p(self, feed_dict):
-        iterator = self.batch_sampler(feed_dict, self._p_feed_dict_keys)
-        for batch in tqdm(
-                iterator,
-                desc='Proximal policy optimizing',
-                total=len(iterator),
-                leave=False,
-                **get_tqdm_defaults()
-            ):
-
-            self._p_func.call_args(batch)
+        self._run_minibatches(self._p_func, feed_dict, self._p_feed_dict_keys, desc='Proximal policy optimizing')
         p_outputs = self._p_func_inference.call_args(
             self._make_inference_batch({k: feed_dict[k] for k in self._p_feed_dict_keys})
         )
         return p_outputs
 
     def _run_step_v_network(self, feed_dict):
-        iterator = self.batch_sampler(feed_dict, ['state', 'return_'], renames=['state', 'value_label'])
-        for batch in tqdm(
-                iterator,
-                desc='Proximal value optimizing',
-                total=len(iterator),
-                leave=False,
-                **get_tqdm_defaults()
-            ):
-
-            self._v_func.call_args(batch)
+        self._run_minibatches(self._v_func, feed_dict, ['state', 'return_'], renames=['state', 'value_label'],
+                              desc='Proximal value optimizing')
         return None
 
 
@@ -527,17 +696,15 @@ class PPOTrainerV2(PPOTrainerMixin, JointSurrOptimizationTrainerBase):
         self._compile_func_with_summary(self._inference_func,
                                         {'p_loss': self.env.policy_loss, 'v_loss': self.env.value_loss})
 
+    def _get_staged_names(self):
+        return list(self._p_feed_dict_renames)
+
+    def _get_staged_feed_dict(self, feed_dict):
+        return {k1: feed_dict[k2] for k1, k2 in zip(self._p_feed_dict_renames, self._p_feed_dict_keys)}
+
     def _run_step_network(self, feed_dict):
-        iterator = self.batch_sampler(feed_dict, self._p_feed_dict_keys, renames=self._p_feed_dict_renames)
-        for batch in tqdm(
-                iterator,
-                desc='Proximal policy optimizing',
-                total=len(iterator),
-                leave=False,
-                **get_tqdm_defaults()
-            ):
-
-            self._opt_func.call_args(batch)
+        self._run_minibatches(self._opt_func, feed_dict, self._p_feed_dict_keys, renames=self._p_feed_dict_renames,
+                              desc='Proximal policy optimizing')
         opt_outputs = self._inference_func.call_args(self._make_inference_batch({
             k1: feed_dict[k2] for k1, k2 in zip(self._p_feed_dict_renames, self._p_feed_dict_keys)
         }))
@@ -6,13 +6,64 @@
 # 
 # This file is part of TensorArtist.
 
+from tartist.core.utils.nd import FieldArrayBuffer
 from tartist.data.flow import SimpleDataFlowBase
 from tartist.random.sampler import EpochBatchSampler
-from collections import deque
+
+import numpy as np
 
 __all__ = ['QLearningDataFlow']
 
 
+class _ReplayMemory(FieldArrayBuffer):
+    """
+    The replay memory of the transitions. The next states are not stored as a field, which would double the memory of
+    the states: the transitions of a trajectory are appended in order, thus the next state of a transition is the state
+    of the following slot (and a slot is always overwritten before the following one). The exceptions are the terminal
+    transitions, whose next states are not used (the state itself is gathered), and the last transition of an
+    unfinished trajectory, whose next state is given to `append` and kept aside until the slot is overwritten.
+    """
+
+    def __init__(self, maxsize, dtypes=None):
+        super().__init__(maxsize, dtypes=dtypes)
+        self._has_tail = np.zeros(maxsize, dtype='bool')
+        self._tail_next_states = dict()
+
+    def append(self, next_state=None, **sample):
+        slot = super().append(**sample)
+        self._has_tail[slot] = next_state is not None
+        self._tail_next_states.pop(slot, None)
+        if next_state is not None:
+            self._tail_next_states[slot] = next_state
+        return slot
+
+    def extend(self, **samples):
+        raise NotImplementedError('Transitions should be appended one by one.')
+
+    def gather(self, indices, keys=None, out=None):
+        keys = list(self.keys if keys is None else keys)
+        if 'next_state' not in keys:
+            return super().gather(indices, keys, out=out)
+
+        out = out or dict()
+        keys.remove('next_state')
+        batch = super().gather(indices, keys, out=out)
+
+        indices = np.asarray(indices)
+        has_tail = self._has_tail[indices]
+        next_indices = np.where(self['is_over'][indices] | has_tail, indices, (indices + 1) % self.maxsize)
+        next_state = super().gather(next_indices, ['state'], out={'state': out.get('next_state', None)})['state']
+        for i in np.flatnonzero(has_tail):
+            next_state[i] = self._tail_next_states[indices[i]]
+        batch['next_state'] = next_state
+        return batch
+
+    def clear(self):
+        super().clear()
+        self._has_tail[:] = False
+        self._tail_next_states.clear()
+
+
 # TODO:: Prioritized sampling
 class QLearningDataFlow(SimpleDataFlowBase):
     _data_keys = ('state', 'action', 'next_state', 'reward', 'is_over')
@@ -33,7 +84,8 @@ class QLearningDataFlow(SimpleDataFlowBase):
 
     def _initialize(self):
         self._collector.initialize()
-        self._memory = {k: deque(maxlen=self._maxsize) for k in self._data_keys}
+        # rewards are always stored as floats, even if the first one is an integer
+        self._memory = _ReplayMemory(self._maxsize, dtypes={'reward': 'float32', 'is_over': 'bool'})
 
     def _gen(self):
         while True:
@@ -47,16 +99,21 @@ class QLearningDataFlow(SimpleDataFlowBase):
             return r
         return self._reward_cb(r)
 
-    def _add_to_memory_step(self, e, f):
-        for key in ['state', 'action', 'is_over']:
-            self._memory[key].append(getattr(e, key))
-        self._memory['next_state'].append(f.state)
-        self._memory['reward'].append(self._process_reward(e.reward))
+    def _add_to_memory_step(self, e, next_state=None):
+        self._memory.append(state=e.state, action=e.action, next_state=next_state,
+                            reward=self._process_reward(e.reward), is_over=e.is_over)
 
     def _add_to_memory(self, raw_data):
         for t in raw_data:
-            for i, (e, f) in enumerate(zip(t[:-1], t[1:])):
-                self._add_to_memory_step(e, f)
+            if len(t) == 0:
+                continue
 
-            if len(t) and t[-1].is_over:
-                self._add_to_memory_step(t[-1], t[-1])
+            if t[-1].is_over:
+                for e in t:
+                    self._add_to_memory_step(e)
+            else:
+                # the last experience of an unfinished trajectory is not a transition, only its state is kept
+                for e in t[:-2]:
+                    self._add_to_memory_step(e)
+                if len(t) > 1:
+                    self._add_to_memory_step(t[-2], next_state=t[-1].state)
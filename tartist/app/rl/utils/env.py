@@ -10,9 +10,9 @@ from tartist.app.rl.base import DiscreteActionSpace
 from tartist.app.rl.base import ProxyRLEnvironBase
 from tartist.core import get_logger
 from tartist.core.utils.meta import run_once
-import copy
 import functools
 import collections
+import multiprocessing.sharedctypes as mp_sharedctypes
 import numpy as np
 
 logger = get_logger(__file__)
@@ -23,7 +23,7 @@ __all__ = [
         'AutoRestartProxyRLEnviron',
         'RepeatActionProxyRLEnviron', 'NOPFillProxyRLEnviron',
         'LimitLengthProxyRLEnviron', 'MapStateProxyRLEnviron',
-        'MapActionProxyRLEnviron', 'HistoryFrameProxyRLEnviron',
+        'MapActionProxyRLEnviron', 'FrameHistoryBuffer', 'HistoryFrameProxyRLEnviron',
         'ManipulateRewardProxyRLEnviron', 'manipulate_reward',
         'remove_proxies', 'find_proxy']
 
@@ -128,53 +128,172 @@ class MapActionProxyRLEnviron(ProxyRLEnvironBase):
         return self.proxy.action(self._mapping[action])
 
 
+class FrameHistoryBuffer(object):
+    """
+    A circular buffer of the latest `history_length` frames, whose stacked state (the frames concatenated along the
+    last axis, from the oldest to the latest) is a view of the buffer rather than a freshly concatenated array.
+
+    The frames of shape (..., C) are stored as an array of shape (..., 2 * history_length, C), and each frame is written
+    twice (to slot i and slot i + history_length), so that the latest frames always lie in a contiguous window of the
+    second last axis, and merging the last two axes of the window does not copy. The missing frames at the beginning
+    of an episode are zeros.
+
+    If `shared` is True, the buffer (as well as the cursor) is allocated in the shared memory, so that a buffer created
+    before forking the processes is visible to all of them. Note that the players (e.g. in EnvBox) still send their
+    states through the query pipes; a reader of a shared buffer should take the state (or a copy of it) while the
+    writer is not pushing, since the view changes as new frames are pushed.
+    """
+
+    def __init__(self, history_length, frame_shape, dtype, shared=False):
+        """
+        :param history_length: Number of the stacked frames.
+        :param frame_shape: The shape of a single frame, should have at least one dimension.
+        :param dtype: The dtype of the frames.
+        :param shared: Whether to allocate the buffer in the shared memory.
+        """
+        frame_shape = tuple(frame_shape)
+        assert len(frame_shape) > 0, 'The frames should have at least one dimension to be stacked.'
+        self._history_length = history_length
+        self._frame_shape = frame_shape
+        self._dtype = np.dtype(dtype)
+
+        shape = frame_shape[:-1] + (2 * history_length, frame_shape[-1])
+        if shared:
+            nbytes = int(np.prod(shape)) * self._dtype.itemsize
+            self._data = np.frombuffer(mp_sharedctypes.RawArray('b', nbytes), dtype=self._dtype).reshape(shape)
+            self._cursor = np.frombuffer(mp_sharedctypes.RawArray('q', 1), dtype='int64')
+        else:
+            self._data = np.zeros(shape, dtype=self._dtype)
+            self._cursor = np.zeros(1, dtype='int64')
+        self._shared = shared
+        self.clear()
+
+    @property
+    def history_length(self):
+        return self._history_length
+
+    @property
+    def frame_shape(self):
+        return self._frame_shape
+
+    @property
+    def state_shape(self):
+        return self._frame_shape[:-1] + (self._frame_shape[-1] * self._history_length, )
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def shared(self):
+        return self._shared
+
+    def clear(self):
+        self._data[...] = 0
+        self._cursor[0] = 0
+
+    def push(self, frame):
+        i = int(self._cursor[0])
+        frame = np.asarray(frame)
+        assert frame.shape == self._frame_shape, 'Frame shape mismatched: expect {}, got {}.'.format(
+            self._frame_shape, frame.shape)
+        self._data[..., i, :] = frame
+        self._data[..., i + self._history_length, :] = frame
+        self._cursor[0] = (i + 1) % self._history_length
+
+    def get(self, copy=False):
+        """
+        Get the stacked state. By default, return a read-only view which is valid until the next push; if `copy` is
+        True, return a (contiguous) copy, which should be used when the state is kept, e.g. in the replay memory.
+        """
+        i = int(self._cursor[0])
+        state = self._data[..., i:i + self._history_length, :].reshape(self.state_shape)
+        if copy:
+            return state.copy()
+        state.flags.writeable = False
+        return state
+
+    def get_frames(self):
+        """Return the copies of the frames, from the oldest to the latest."""
+        i = int(self._cursor[0])
+        return [self._data[..., j, :].copy() for j in range(i, i + self._history_length)]
+
+
 HistoryFrameProxyRLEnviron_copy_warning = run_once(lambda: logger.warn('HistoryFrameProxyRLEnviron._copy' +
     HistoryFrameProxyRLEnviron._copy_history.__doc__))
 class HistoryFrameProxyRLEnviron(ProxyRLEnvironBase):
+    """
+    Stack the latest `history_length` states (frames) along the last axis as the current state. The frames are kept in
+    a FrameHistoryBuffer (or a tuple of them, for tuple states), allocated at the first frame, unless given by `buffer`
+    (e.g. a shared one created by the master process). If `copy` is False, the current state is a read-only view of the
+    buffer, which is only valid until the next action; otherwise it is a copy.
+    """
+
+    def __init__(self, other, history_length, copy=True, buffer=None):
+        super().__init__(other)
+        self._history_length = history_length
+        self._copy = copy
+        self._buffer = buffer
+
+    @property
+    def history_length(self):
+        return self._history_length
+
+    @property
+    def buffer(self):
+        return self._buffer
+
     @staticmethod
-    def __zeros_like(v):
+    def __make_buffer(v, history_length):
         if type(v) is tuple:
-            return tuple(HistoryFrameProxyRLEnviron.__zeros_like(i) for i in v)
-        assert isinstance(v, np.ndarray)
-        return np.zeros_like(v, dtype=v.dtype)
+            return tuple(HistoryFrameProxyRLEnviron.__make_buffer(i, history_length) for i in v)
+        v = np.asarray(v)
+        return FrameHistoryBuffer(history_length, v.shape, v.dtype)
 
     @staticmethod
-    def __concat(history):
-        last = history[-1]
-        if type(last) is tuple:
-            return tuple(HistoryFrameProxyRLEnviron.__concat(i) for i in zip(*history))
-        return np.concatenate(history, axis=-1)
-
-    def __init__(self, other, history_length):
-        super().__init__(other)
-        self._history = collections.deque(maxlen=history_length)
+    def __map_buffer(func, buffer, *args):
+        if type(buffer) is tuple:
+            return tuple(HistoryFrameProxyRLEnviron.__map_buffer(func, *i) for i in zip(buffer, *args))
+        return func(buffer, *args)
 
     def _get_current_state(self):
-        while len(self._history) != self._history.maxlen:
-            assert len(self._history) > 0
-            v = self._history[-1]
-            self._history.appendleft(self.__zeros_like(v))
-        return self.__concat(self._history)
+        assert self._buffer is not None, 'No frame has been pushed, restart the environ first.'
+        copy = self._copy
+        return self.__map_buffer(lambda b: b.get(copy=copy), self._buffer)
 
     def _set_current_state(self, state):
-        if len(self._history) == self._history.maxlen:
-            self._history.popleft()
-        self._history.append(state)
+        if self._buffer is None:
+            self._buffer = self.__make_buffer(state, self._history_length)
+        self.__map_buffer(FrameHistoryBuffer.push, self._buffer, state)
 
     # Use shallow copy
     def _copy_history(self, _called_directly=True):
         """DEPRECATED: (2017-12-23) Use copy_history directly."""
         if _called_directly:
             HistoryFrameProxyRLEnviron_copy_warning()
-        return copy.copy(self._history)
+        history = collections.deque(maxlen=self._history_length)
+        if self._buffer is not None:
+            frames = self.__map_buffer(FrameHistoryBuffer.get_frames, self._buffer)
+            history.extend(self.__transpose_frames(frames))
+        return history
 
     def _restore_history(self, history, _called_directly=True):
         """DEPRECATED: (2017-12-23) Use restore_history directly."""
         if _called_directly:
             HistoryFrameProxyRLEnviron_copy_warning()
         assert isinstance(history, collections.deque)
-        assert history.maxlen == self._history.maxlen
-        self._history = copy.copy(history)
+        assert history.maxlen == self._history_length
+        if self._buffer is not None:
+            self.__map_buffer(FrameHistoryBuffer.clear, self._buffer)
+        for state in history:
+            self._set_current_state(state)
+
+    @staticmethod
+    def __transpose_frames(frames):
+        # from (nested) tuples of frame lists to a list of (nested) tuple frames
+        if type(frames) is tuple:
+            return list(zip(*[HistoryFrameProxyRLEnviron.__transpose_frames(f) for f in frames]))
+        return frames
 
     def copy_history(self):
         return self._copy_history(_called_directly=False)
@@ -189,7 +308,8 @@ class HistoryFrameProxyRLEnviron(ProxyRLEnvironBase):
 
     def _restart(self, *args, **kwargs):
         super()._restart(*args, **kwargs)
-        self._history.clear()
+        if self._buffer is not None:
+            self.__map_buffer(FrameHistoryBuffer.clear, self._buffer)
         self._set_current_state(self.proxy.current_state)
 
 
@@ -6,6 +6,9 @@
 # 
 # This file is part of TensorArtist.
 
+import collections
+import threading
+
 import scipy
 import scipy.signal
 import numpy as np
@@ -61,6 +64,139 @@ class ObservationNormalizer(object):
         return o1
 
 
+class RunningMoments(object):
+    """The running count, mean and the sum of squared deviations (M2) of a stream of samples (along axis 0). A batch is
+    accumulated by the vectorized moments of the batch, and two moments are merged with the parallel algorithm of
+    Chan et al. (the pairwise generalization of Welford's algorithm)."""
+
+    def __init__(self, n=0, mean=0., m2=0.):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    @property
+    def var(self):
+        if self.n == 0:
+            return self.m2
+        return self.m2 / self.n
+
+    @classmethod
+    def from_batch(cls, batch):
+        batch = np.asarray(batch, dtype='float64')
+        mean = batch.mean(axis=0)
+        return cls(batch.shape[0], mean, ((batch - mean) ** 2).sum(axis=0))
+
+    def update(self, batch):
+        return self.merge(type(self).from_batch(batch))
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.n / n)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.n * other.n / n)
+        self.n = n
+        return self
+
+
+ObservationNormalizerSnapshot = collections.namedtuple('ObservationNormalizerSnapshot', ('n', 'mean', 'std'))
+
+
+class BatchedObservationNormalizer(object):
+    """
+    Normalize the input with the running mean and std, as ObservationNormalizer, but designed for many environment
+    threads (e.g. the workers of SynchronizedExperienceCollector, by wrapping the player with MapStateProxyRLEnviron).
+
+    Each thread buffers its observations locally, and every `update_interval` observations, the local moments are
+    computed in one vectorized operation and merged into the global ones. The normalization parameters are published
+    as an immutable snapshot, so normalizing never takes the lock; only the merging (which costs O(dim) per batch)
+    does. As a result, the observations are normalized with the statistics lagging behind by at most
+    `update_interval` observations per thread. Before the first merge, the identity normalization (mean 0 and std 1)
+    is used.
+    """
+
+    _eps = 1e-6
+
+    def __init__(self, filter_mean=True, update_interval=64, clip=10.):
+        """
+        :param filter_mean: Whether to subtract the mean.
+        :param update_interval: Number of the observations buffered by each thread before merging.
+        :param clip: The normalized values are clipped into [-clip, clip]; None for no clipping.
+        """
+        self.filter_mean = filter_mean
+        self.update_interval = update_interval
+        self.clip = clip
+
+        self._moments = RunningMoments()
+        self._snapshot = ObservationNormalizerSnapshot(0, 0., 1.)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def __call__(self, o):
+        """Normalize a single observation, and accumulate it into the thread-local buffer."""
+        buf = getattr(self._local, 'buffer', None)
+        if buf is None:
+            buf = self._local.buffer = []
+        buf.append(o)
+        if len(buf) >= self.update_interval:
+            self.flush()
+        return self.normalize(o)
+
+    def normalize(self, o, snapshot=None):
+        """Normalize a single observation or a batch of observations (along axis 0), without updating."""
+        if snapshot is None:
+            snapshot = self._snapshot
+        if self.filter_mean:
+            o = (o - snapshot.mean) / snapshot.std
+        else:
+            o = o / snapshot.std
+        if self.clip is not None:
+            o = np.clip(o, -self.clip, self.clip)
+        return o
+
+    def update(self, batch):
+        """Merge a batch of observations (along axis 0) into the statistics."""
+        return self.merge(RunningMoments.from_batch(batch))
+
+    def merge(self, moments):
+        """Merge the RunningMoments (e.g. accumulated by another process) into the statistics."""
+        with self._lock:
+            self._moments.merge(moments)
+            return self._publish()
+
+    def _publish(self):
+        m = self._moments
+        self._snapshot = ObservationNormalizerSnapshot(m.n, m.mean, (m.var + self._eps) ** .5)
+        return self._snapshot
+
+    def flush(self):
+        """Merge the observations buffered by the current thread."""
+        buf = getattr(self._local, 'buffer', None)
+        if buf:
+            self._local.buffer = []
+            self.update(buf)
+
+    def register_snapshot_parts(self, env):
+        env.add_snapshot_part('observation_normalizer', self._dump_params, self._load_params)
+
+    def _dump_params(self):
+        m = self._moments
+        return dict(n=m.n, mean=m.mean, m2=m.m2)
+
+    def _load_params(self, params):
+        with self._lock:
+            self._moments = RunningMoments(**params)
+            self._publish()
+
+
 class LinearValueRegressor(object):
     _name = 'linear_value_regressor'
     coeffs = None
@@ -49,6 +49,11 @@ class EventManager(object):
         self.trigger_args(point, name, args, kwargs)
 
     def trigger_args(self, point, name, args, kwargs):
+        for callback in self.iter_callbacks(point, name):
+            callback(*args, **kwargs)
+
+    def iter_callbacks(self, point, name):
+        """Iterate over the callbacks registered on (point, name), ordered by the priority."""
         if point not in self.monitors:
             return
         if name not in self.monitors[point]:
@@ -61,7 +66,7 @@ class EventManager(object):
             if i not in pools:
                 continue
             for callback in pools[i].values():
-                callback(*args, **kwargs)
+                yield callback
 
 
 event_manager = EventManager()
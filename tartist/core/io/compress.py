@@ -0,0 +1,152 @@
+# -*- coding:utf8 -*-
+# File   : compress.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+"""
+Compression codecs for the compressed pickle dumps (e.g. `.pkl.zst`). The codec is selected by the file extension
+when dumping, and detected by the magic bytes of the stream when loading, so that a file can always be loaded even if
+it is written by a fallback codec. The fast codecs (zstd and lz4) require the `zstandard` and `lz4` packages, and fall
+back to the stdlib zlib when the packages are not installed.
+"""
+
+import collections
+import lzma
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+__all__ = [
+    'CompressionCodec', 'register_codec', 'get_codec', 'get_codec_by_extension', 'detect_codec',
+    'compress', 'decompress'
+]
+
+
+class CompressionCodec(object):
+    def __init__(self, name, extension, magic, compress_func, decompress_func, default_level,
+                 available=True, fallback=None):
+        """
+        :param name: The name of the codec.
+        :param extension: The file extension, e.g. ".zst".
+        :param magic: The magic bytes at the beginning of the compressed stream.
+        :param compress_func: A function (data, level, threads) -> compressed data.
+        :param decompress_func: A function (compressed data) -> data.
+        :param default_level: The default compression level.
+        :param available: Whether the codec is available (e.g. the package is installed).
+        :param fallback: The name of the codec to be used when this one is not available.
+        """
+        self.name = name
+        self.extension = extension
+        self.magic = magic
+        self.compress_func = compress_func
+        self.decompress_func = decompress_func
+        self.default_level = default_level
+        self.available = available
+        self.fallback = fallback
+
+    def compress(self, data, level=None, threads=None):
+        return self.compress_func(data, self.default_level if level is None else level, threads)
+
+    def decompress(self, data):
+        return self.decompress_func(data)
+
+
+_codecs = collections.OrderedDict()
+_fallback_logged = set()
+
+
+def register_codec(codec):
+    _codecs[codec.name] = codec
+
+
+def get_codec(name, allow_fallback=True):
+    """Get the codec by name, if the codec is not available, return the fallback one."""
+    codec = _codecs[name]
+    while not codec.available and allow_fallback and codec.fallback is not None:
+        if codec.name not in _fallback_logged:
+            from ..logger import get_logger
+            get_logger(__file__).warn('Compression codec {} is not available, fall back to {}.'.format(
+                codec.name, codec.fallback))
+            _fallback_logged.add(codec.name)
+        codec = _codecs[codec.fallback]
+    assert codec.available, 'Compression codec {} is not available.'.format(name)
+    return codec
+
+
+def get_codec_by_extension(path):
+    """Return the name of the codec whose extension matches the path, or None."""
+    for codec in _codecs.values():
+        if path.endswith(codec.extension):
+            return codec.name
+    return None
+
+
+def detect_codec(data):
+    """Return the name of the codec by the magic bytes of the compressed data, or None."""
+    for codec in _codecs.values():
+        if data[:len(codec.magic)] == codec.magic:
+            return codec.name
+    return None
+
+
+def compress(data, codec, level=None, threads=None):
+    """
+    :param data: The bytes to be compressed.
+    :param codec: The name of the codec.
+    :param level: The compression level, defaults to the codec's default one.
+    :param threads: Number of threads (only supported by zstd), defaults to all cores; 0 disables multi-threading.
+    """
+    target = get_codec(codec)
+    if target.name != codec:
+        # the compression levels are not comparable among codecs
+        level = None
+    return target.compress(data, level=level, threads=threads)
+
+
+def decompress(data):
+    name = detect_codec(data)
+    assert name is not None, 'Unknown compression format.'
+    return get_codec(name, allow_fallback=False).decompress(data)
+
+
+def _zstd_compress(data, level, threads):
+    return zstandard.ZstdCompressor(level=level, threads=-1 if threads is None else threads).compress(data)
+
+
+def _zstd_decompress(data):
+    # the content size is not recorded in the frame header in the multi-threaded mode
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+register_codec(CompressionCodec(
+    'zstd', '.zst', b'\x28\xb5\x2f\xfd', _zstd_compress, _zstd_decompress, default_level=3,
+    available=zstandard is not None, fallback='zlib'
+))
+register_codec(CompressionCodec(
+    'lz4', '.lz4', b'\x04\x22\x4d\x18',
+    lambda data, level, threads: lz4_frame.compress(data, compression_level=level),
+    lambda data: lz4_frame.decompress(data),
+    default_level=0, available=lz4_frame is not None, fallback='zlib'
+))
+register_codec(CompressionCodec(
+    'lzma', '.xz', b'\xfd7zXZ\x00',
+    lambda data, level, threads: lzma.compress(data, preset=level),
+    lzma.decompress, default_level=6
+))
+# zlib streams start with 0x78 for the default window size
+register_codec(CompressionCodec(
+    'zlib', '.zlib', b'\x78',
+    lambda data, level, threads: zlib.compress(data, level),
+    zlib.decompress, default_level=6
+))
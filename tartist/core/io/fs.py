@@ -29,6 +29,7 @@ except ImportError:
 
 
 from ..utils.meta import assert_instance
+from . import compress as _compress
 
 __all__ = ['IOMethod', 'load', 'dump', 'link', 'makedir', 'mkdir', 'make_dir', 'assert_extension', 'make_env_dir']
 
@@ -40,6 +41,7 @@ class IOMethod(enum.Enum):
     NUMPY_RAW = 3
     TEXT = 4
     BINARY = 5
+    PICKLE_COMPRESSED = 6
 
 
 def load(path, method=None, exit_on_error=False):
@@ -58,12 +60,21 @@ def load(path, method=None, exit_on_error=False):
         except UnicodeDecodeError:
             return pickle.load(f, encoding='latin1')
 
+    def load_pickle_bytes(data):
+        try:
+            return pickle.loads(data)
+        except UnicodeDecodeError:
+            return pickle.loads(data, encoding='latin1')
+
     if method == IOMethod.PICKLE:
         with open(path, 'rb') as f:
             return load_pickle_file(f)
     elif method == IOMethod.PICKLE_GZ:
         with gzip.open(path, 'rb') as f:
             return load_pickle_file(f)
+    elif method == IOMethod.PICKLE_COMPRESSED:
+        with open(path, 'rb') as f:
+            return load_pickle_bytes(_compress.decompress(f.read()))
     elif method == IOMethod.NUMPY:
         return joblib.load(path)
     elif method == IOMethod.NUMPY_RAW:
@@ -79,7 +90,13 @@ def load(path, method=None, exit_on_error=False):
         raise ValueError('Unsupported loading method: {}', method)
 
 
-def dump(path, content, method=None, py_prefix='', py_suffix='', text_mode='w'):
+def dump(path, content, method=None, py_prefix='', py_suffix='', text_mode='w',
+         compress_codec=None, compress_level=None, compress_threads=None):
+    """
+    Dump the content to the path, the method is inferred from the extension if not given. For compressed pickles
+    (e.g. `.pkl.zst`, `.pkl.lz4`, `.pkl.xz`, `.pkl.zlib`), the codec is also inferred from the extension, and can be
+    configured by the compress_* parameters (see core.io.compress.compress).
+    """
     if method is None:
         method = _infer_method(path)
     
@@ -95,6 +112,12 @@ def dump(path, content, method=None, py_prefix='', py_suffix='', text_mode='w'):
     elif method == IOMethod.PICKLE_GZ:
         with gzip.open(path, 'wb') as f:
             pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+    elif method == IOMethod.PICKLE_COMPRESSED:
+        codec = compress_codec or _compress.get_codec_by_extension(path_origin) or 'zstd'
+        data = pickle.dumps(content, protocol=pickle.HIGHEST_PROTOCOL)
+        data = _compress.compress(data, codec, level=compress_level, threads=compress_threads)
+        with open(path, 'wb') as f:
+            f.write(data)
     elif method == IOMethod.NUMPY:
         joblib.dump(content, path)
     elif method == IOMethod.NUMPY_RAW:
@@ -156,6 +179,8 @@ def _infer_method(path):
         method = IOMethod.PICKLE
     elif path.endswith('.pkl.gz'):
         method = IOMethod.PICKLE_GZ
+    elif '.pkl.' in path and _compress.get_codec_by_extension(path) is not None:
+        method = IOMethod.PICKLE_COMPRESSED
     elif path.endswith('.npy'):
         method = IOMethod.NUMPY
     elif path.endswith('.txt'):
@@ -9,7 +9,12 @@
 from .meta import synchronized
 from .. import io, get_env
 import functools
+import glob
+import hashlib
+import os
 import os.path as osp
+import pickle
+import tempfile
 import threading
 import collections
 
@@ -54,25 +59,113 @@ def cached_result(func):
     return f
 
 
-def fs_cached_result(cache_key, force_update=False):
+def _get_cache_dir():
+    if get_env('dir.cache') is None:
+        io.make_env_dir('dir.cache', osp.join(get_env('dir.root'), 'cache'))
+    return get_env('dir.cache')
+
+
+def _hash_cache_inputs(inputs, input_files):
+    h = hashlib.sha1()
+    try:
+        h.update(pickle.dumps(inputs, protocol=pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        # the repr of such objects usually contains their addresses, which would never hit the cache
+        raise TypeError('Unable to hash the arguments of the cached function, '
+                        'provide a key_func mapping them to a picklable key.') from e
+    for f in input_files:
+        st = os.stat(f)
+        h.update('{}:{}:{}'.format(osp.realpath(f), st.st_mtime_ns, st.st_size).encode('utf8'))
+    return h.hexdigest()[:20]
+
+
+def _evict_cache_files(cache_dir, max_size):
+    """Remove the least recently used cache files until the total size is within max_size."""
+    files = []
+    for f in glob.glob(osp.join(cache_dir, '*.cache.pkl')):
+        try:
+            st = os.stat(f)
+        except OSError:
+            continue
+        files.append((st.st_mtime, st.st_size, f))
+
+    total = sum(x[1] for x in files)
+    for _, size, f in sorted(files):
+        if total <= max_size:
+            break
+        try:
+            os.remove(f)
+        except OSError:
+            pass
+        total -= size
+
+
+def fs_cached_result(cache_key, force_update=False, input_files=None, max_size=None, key_func=None):
+    """
+    Cache the result of the function in a file under `dir.cache`. The cache file is addressed by the cache_key and a
+    hash of the arguments and the (mtime, size) of the input files, so that calls with different arguments are cached
+    separately, and the cache is invalidated when the input files change. For a nullary function without input files,
+    the cache file is simply `{cache_key}.cache.pkl`.
+
+    The cache files are written atomically (dumped to a temporary file and renamed), so that concurrent processes never
+    read a partially written cache. Reading a cache file touches its mtime; if max_size is given, the least recently
+    used cache files in the directory are evicted until the total size is within the budget.
+
+    :param cache_key: The name of the cache.
+    :param force_update: If true, always recompute and overwrite the cache.
+    :param input_files: A list of paths, or a function mapping the arguments to a list of paths, whose modification
+    invalidates the cache.
+    :param max_size: The size budget (in bytes) of all cache files in the cache directory.
+    :param key_func: A function mapping the arguments to a picklable key, which is hashed instead of the arguments. It
+    is required if some arguments can not be pickled.
+    """
+
     def wrapper(func):
         @synchronized()
         @functools.wraps(func)
         def wrapped_func(*args, **kwargs):
-            if get_env('dir.cache') is None:
-                io.make_env_dir('dir.cache', osp.join(get_env('dir.root'), 'cache'))
+            cache_dir = _get_cache_dir()
 
-            nonlocal cache_key
-            cache_key = io.assert_extension(cache_key, '.cache.pkl')
-            cache_file = osp.join(get_env('dir.cache'), cache_key)
+            files = input_files
+            if callable(files):
+                files = files(*args, **kwargs)
+            files = list(files or [])
+
+            key = cache_key
+            if key.endswith('.cache.pkl'):
+                key = key[:-len('.cache.pkl')]
+            if key_func is not None:
+                key = '{}.{}'.format(key, _hash_cache_inputs(key_func(*args, **kwargs), files))
+            elif len(args) > 0 or len(kwargs) > 0 or len(files) > 0:
+                key = '{}.{}'.format(key, _hash_cache_inputs((args, sorted(kwargs.items())), files))
+            cache_file = osp.join(cache_dir, key + '.cache.pkl')
 
             if not force_update:
-                cached_value = io.load(cache_file)
+                try:
+                    cached_value = io.load(cache_file)
+                except (OSError, EOFError, pickle.UnpicklingError):
+                    cached_value = None
                 if cached_value is not None:
+                    try:
+                        os.utime(cache_file)
+                    except OSError:
+                        pass
                     return cached_value
 
             computed_value = func(*args, **kwargs)
-            io.dump(cache_file, computed_value)
+
+            io.mkdir(osp.dirname(cache_file))
+            fd, tmp_file = tempfile.mkstemp(prefix=osp.basename(key) + '.', suffix='.tmp', dir=osp.dirname(cache_file))
+            os.close(fd)
+            try:
+                io.dump(tmp_file, computed_value, method=io.IOMethod.PICKLE)
+                os.replace(tmp_file, cache_file)
+            finally:
+                if osp.exists(tmp_file):
+                    os.remove(tmp_file)
+
+            if max_size is not None:
+                _evict_cache_files(cache_dir, max_size)
             return computed_value
         return wrapped_func
     return wrapper
@@ -14,7 +14,8 @@ __all__ = [
     'nd_tobatch',
     'nd_concat', 'nd_len', 'nd_batch_size', 
     'nd_split_n', 'size_split_n',
-    'gather_list_batch'
+    'gather_list_batch', 'gather_dict_batch',
+    'FieldArrayBuffer'
 ]
 
 
@@ -52,7 +53,7 @@ def nd_batch_size(thing):
     if type(thing) in (tuple, list):
         return nd_len(thing[0])
     elif type(thing) in (dict, collections.OrderedDict):
-        return nd_len(next(thing.values()))
+        return nd_len(next(iter(thing.values())))
     else:
         raise NotImplementedError()
 
@@ -77,19 +78,126 @@ def size_split_n(full_size, n):
     return result
 
 
-def gather_list_batch(data, indices):
+def gather_list_batch(data, indices, out=None):
     """Gather `indices` as batch indices from `data`, which can either be typical nd array or a
-    list of nd array"""
+    list of nd array. If `out` is given, the result will be written into it."""
 
     assert isinstance(indices, (tuple, list)) or (isndarray(indices) and len(indices.shape) == 1)
 
     if isndarray(data):
-        return data[indices]
+        return np.take(data, indices, axis=0, out=out)
 
     assert len(data) > 0 and len(indices) > 0
 
-    sample = np.array(data[0])  # Try to convert the first element to a typical nd array.
-    output = np.empty((len(indices), ) + sample.shape, dtype=sample.dtype)
+    if out is None:
+        sample = np.array(data[0])  # Try to convert the first element to a typical nd array.
+        out = np.empty((len(indices), ) + sample.shape, dtype=sample.dtype)
     for i, j in enumerate(indices):
-        output[i] = data[j]
-    return output
+        out[i] = data[j]
+    return out
+
+
+def gather_dict_batch(data, keys, indices):
+    """Gather `indices` as batch indices for each key in `keys` from `data`, which can either be a FieldArrayBuffer or
+    a dict of (nd array or list of nd array)."""
+    if isinstance(data, FieldArrayBuffer):
+        return data.gather(indices, keys)
+    return {k: gather_list_batch(data[k], indices) for k in keys}
+
+
+class FieldArrayBuffer(object):
+    """
+    A bounded buffer of samples (structs of several fields), stored as one preallocated nd array per field (i.e. struct
+    of arrays). Appending a sample copies the fields into the arrays, and gathering a batch costs one vectorized np.take
+    per field regardless of the batch size. When the buffer is full, the oldest samples are overwritten (as a ring
+    buffer), thus the samples are indexed by their slots rather than the insertion order. This is typically used as
+    the replay memory, as a replacement of dict of deques::
+
+        memory = FieldArrayBuffer(maxsize)
+        memory.append(state=state, action=action, reward=reward)
+        batch = memory.gather(rng.randint(len(memory), size=batch_size), ['state', 'action', 'reward'])
+
+    The arrays are allocated lazily at the first append, according to the shapes and dtypes of the first sample.
+    """
+
+    def __init__(self, maxsize, dtypes=None):
+        """
+        :param maxsize: The capacity of the buffer.
+        :param dtypes: Optional dict of the dtypes of the fields, by default inferred from the first sample.
+        """
+        self._maxsize = maxsize
+        self._dtypes = dtypes or dict()
+        self._fields = collections.OrderedDict()
+        self._size = 0
+        self._cursor = 0
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @property
+    def keys(self):
+        return list(self._fields.keys())
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, key):
+        """Return the valid part of the array of the field (in the slot order)."""
+        return self._fields[key][:self._size]
+
+    def _allocate(self, sample):
+        for k, v in sample.items():
+            v = np.asarray(v, dtype=self._dtypes.get(k, None))
+            self._fields[k] = np.empty((self._maxsize, ) + v.shape, dtype=v.dtype)
+
+    def append(self, **sample):
+        """Append a sample, and return the slot index of it."""
+        if len(self._fields) == 0:
+            self._allocate(sample)
+        assert len(sample) == len(self._fields), 'Fields mismatched: {} vs {}.'.format(
+            sorted(sample.keys()), self.keys)
+
+        i = self._cursor
+        for k, v in sample.items():
+            self._fields[k][i] = v
+        self._cursor = (i + 1) % self._maxsize
+        self._size = min(self._size + 1, self._maxsize)
+        return i
+
+    def extend(self, **samples):
+        """Append a batch of samples, each field should be an nd array (or list) of the same length."""
+        n = nd_len(next(iter(samples.values())))
+        if n == 0:
+            return
+        if len(self._fields) == 0:
+            self._allocate({k: v[0] for k, v in samples.items()})
+
+        # only the last maxsize samples survive
+        start = max(n - self._maxsize, 0)
+        slots = (self._cursor + np.arange(n - start)) % self._maxsize
+        for k, v in samples.items():
+            self._fields[k][slots] = np.asarray(v)[start:]
+        self._cursor = (self._cursor + n - start) % self._maxsize
+        self._size = min(self._size + n - start, self._maxsize)
+
+    def gather(self, indices, keys=None, out=None):
+        """
+        Gather a batch of samples by slot indices.
+
+        :param indices: The slot indices, should be less than len(self).
+        :param keys: The fields to be gathered, default to all.
+        :param out: Optional dict of preallocated output arrays.
+        :return: A dict of batched nd arrays.
+        """
+        if keys is None:
+            keys = self.keys
+        out = out or dict()
+        indices = np.asarray(indices)
+        assert len(indices) == 0 or (indices.min() >= 0 and indices.max() < self._size), 'Index out of range.'
+        # the indices have been checked, mode='clip' avoids the extra buffering of out in the default mode
+        return {k: np.take(self._fields[k], indices, axis=0, out=out.get(k, None), mode='clip') for k in keys}
+
+    def clear(self):
+        self._size = 0
+        self._cursor = 0
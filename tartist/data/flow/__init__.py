@@ -9,9 +9,11 @@
 from . import tools
 from .base import *
 from .batch import *
+from .cache import *
 from .collections import *
 from .kv import *
 from .remote import *
 from .rng import *
 from .tools import MapDataFlow, DataFlowMixer
+from .profiler import *
 
@@ -0,0 +1,242 @@
+# -*- coding:utf8 -*-
+# File   : cache.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from .rng import RandomizedDataFlowBase
+from ...core.logger import get_logger
+
+import collections
+import tempfile
+import threading
+
+import numpy as np
+
+logger = get_logger(__file__)
+
+__all__ = ['DecodedImageCache', 'KVStoreImageCacheDataFlow']
+
+
+class DecodedImageCache(object):
+    """
+    A key-value cache of numpy arrays (typically decoded images) with a bounded memory budget. When the budget is
+    exceeded, the least recently used arrays are evicted; if `spill_dir` is given, the evicted arrays are spilled to a
+    memory-mapped file on the local disk (of at most `spill_budget` bytes), and will be loaded back from the file
+    instead of being decoded again. The spill file is anonymous and is removed when the process exits. It is
+    append-only: the space of a spilled array is not reclaimed until `clear()`, and once the file is full, further
+    evicted arrays are simply dropped.
+
+    The cached arrays are marked as read-only, since they are shared among all the reads of the same key. Make a copy
+    before modifying them inplace.
+    """
+
+    def __init__(self, memory_budget, spill_dir=None, spill_budget=None):
+        """
+        :param memory_budget: The memory budget in bytes.
+        :param spill_dir: The directory of the spill file, None to disable spilling.
+        :param spill_budget: The size of the spill file in bytes, defaults to 4 times of the memory budget.
+        """
+        self._memory_budget = memory_budget
+        self._memory_used = 0
+        self._entries = collections.OrderedDict()
+
+        self._spill_dir = spill_dir
+        self._spill_budget = spill_budget or memory_budget * 4
+        self._spill_file = None
+        self._spill_arena = None
+        self._spill_used = 0
+        self._spill_entries = dict()
+        self._spill_full_logged = False
+
+        self._mutex = threading.Lock()
+        self._stat = dict(nr_hits=0, nr_spill_hits=0, nr_misses=0, nr_evicted=0, nr_spilled=0)
+
+    def __len__(self):
+        return len(self._entries) + self._nr_spill_only()
+
+    def __contains__(self, key):
+        return key in self._entries or key in self._spill_entries
+
+    @property
+    def memory_used(self):
+        return self._memory_used
+
+    @property
+    def spill_used(self):
+        return self._spill_used
+
+    def get_stat(self):
+        stat = dict(self._stat)
+        stat['memory_used'] = self._memory_used
+        stat['spill_used'] = self._spill_used
+        stat['nr_entries'] = len(self._entries)
+        # the entries loaded back to the memory keep their spilled copies, only count the ones not in the memory
+        stat['nr_spill_entries'] = self._nr_spill_only()
+        total = stat['nr_hits'] + stat['nr_spill_hits'] + stat['nr_misses']
+        stat['hit_ratio'] = (stat['nr_hits'] + stat['nr_spill_hits']) / total if total else 0.
+        return stat
+
+    def _nr_spill_only(self):
+        return len(self._spill_entries) - sum(1 for k in self._entries if k in self._spill_entries)
+
+    def get(self, key, default=None):
+        with self._mutex:
+            value = self._entries.get(key, None)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._stat['nr_hits'] += 1
+                return value
+
+            spilled = self._spill_entries.get(key, None)
+            if spilled is not None:
+                offset, shape, dtype = spilled
+                value = np.frombuffer(self._spill_arena, dtype=dtype, count=int(np.prod(shape)),
+                                      offset=offset).reshape(shape).copy()
+                self._stat['nr_spill_hits'] += 1
+                self._put(key, value)
+                return value
+
+            self._stat['nr_misses'] += 1
+            return default
+
+    def put(self, key, value):
+        value = np.ascontiguousarray(value)
+        with self._mutex:
+            if key in self._entries:
+                self._memory_used -= self._entries.pop(key).nbytes
+            # the spilled copy (if any) is stale now, its space in the spill file is not reclaimed
+            self._spill_entries.pop(key, None)
+            self._put(key, value)
+        return value
+
+    def _put(self, key, value):
+        value.flags.writeable = False
+        self._entries[key] = value
+        self._memory_used += value.nbytes
+
+        while self._memory_used > self._memory_budget and len(self._entries) > 1:
+            k, v = self._entries.popitem(last=False)
+            self._memory_used -= v.nbytes
+            self._stat['nr_evicted'] += 1
+            self._spill(k, v)
+
+    def _spill(self, key, value):
+        if self._spill_dir is None or key in self._spill_entries:
+            return
+
+        if self._spill_used + value.nbytes > self._spill_budget:
+            if not self._spill_full_logged:
+                logger.warn('Image cache spill file is full ({} bytes), evicted images will be dropped.'.format(
+                    self._spill_budget))
+                self._spill_full_logged = True
+            return
+
+        if self._spill_arena is None:
+            self._spill_file = tempfile.TemporaryFile(prefix='tart-image-cache-', dir=self._spill_dir)
+            self._spill_arena = np.memmap(self._spill_file, dtype='uint8', mode='w+', shape=(self._spill_budget, ))
+
+        offset = self._spill_used
+        self._spill_arena[offset:offset + value.nbytes] = value.reshape(-1).view('uint8')
+        self._spill_entries[key] = (offset, value.shape, value.dtype.str)
+        self._spill_used += value.nbytes
+        self._stat['nr_spilled'] += 1
+
+    def clear(self):
+        with self._mutex:
+            self._entries.clear()
+            self._memory_used = 0
+            self._spill_entries.clear()
+            self._spill_used = 0
+            self._spill_arena = None
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+
+
+class KVStoreImageCacheDataFlow(RandomizedDataFlowBase):
+    """
+    Read encoded images from a kvstore, decode (and optionally resize) them, and cache the decoded uint8 arrays in a
+    DecodedImageCache, so that each image is decoded only once instead of once per epoch. Note that the budget applies
+    per cache, and the cache is created when the dataflow is first iterated: each worker of a MPPrefetchDataFlow owns
+    a separate cache with the given budget. The total memory is thus the budget multiplied by the number of such
+    dataflows and the number of workers; split the total budget among them explicitly.
+
+    A typical usage is::
+
+        # two prefetching workers, 1GB in total
+        df = KVStoreImageCacheDataFlow(lambda: LMDBKVStore(db), target_shape=(64, 64), memory_budget=512 * 1024 ** 2)
+        df = MPPrefetchDataFlow(df, nr_workers=2)
+
+    """
+
+    def __init__(self, kv_getter, target_shape=None, decode_func=None, memory_budget=256 * 1024 ** 2,
+                 spill_dir=None, spill_budget=None, random_sample=True, seed=None):
+        """
+        :param kv_getter: A function returning the kvstore.
+        :param target_shape: If not None, the decoded images will be resized to this shape before caching.
+        :param decode_func: A function mapping the raw value to the decoded array, defaults to image.imdecode.
+        :param memory_budget: The memory budget of the cache in bytes, per instance (and per prefetching worker).
+        :param spill_dir: The directory of the spill file, None to disable spilling.
+        :param spill_budget: The size of the spill file in bytes.
+        :param random_sample: If true, sample the keys randomly (with replacement) and infinitely, otherwise iterate
+        over all keys once.
+        :param seed: The random seed.
+        """
+        super().__init__(seed=seed)
+        self._kv_getter = kv_getter
+        self._target_shape = target_shape
+        self._decode_func = decode_func
+        self._memory_budget = memory_budget
+        self._spill_dir = spill_dir
+        self._spill_budget = spill_budget
+        self._random_sample = random_sample
+
+        self._kvstore = None
+        self._keys = None
+        self._nr_keys = None
+        self._cache = None
+
+    @property
+    def cache(self):
+        return self._cache
+
+    def _initialize(self):
+        super()._initialize()
+        self._kvstore = self._kv_getter()
+        self._keys = list(self._kvstore.keys())
+        self._nr_keys = len(self._keys)
+        self._cache = DecodedImageCache(self._memory_budget, spill_dir=self._spill_dir,
+                                        spill_budget=self._spill_budget)
+
+    def _decode(self, value):
+        if self._decode_func is not None:
+            img = self._decode_func(value)
+        else:
+            from ...image import imdecode
+            img = imdecode(value)
+        if self._target_shape is not None:
+            from ...image import resize
+            img = resize(img, self._target_shape)
+        return img
+
+    def _get(self, key):
+        img = self._cache.get(key)
+        if img is None:
+            img = self._cache.put(key, self._decode(self._kvstore.get(key)))
+        return img
+
+    def _gen(self):
+        if self._random_sample:
+            while True:
+                yield self._get(self._keys[self._rng.choice(self._nr_keys)])
+        else:
+            for k in self._keys:
+                yield self._get(k)
+
+    def _len(self):
+        if self._random_sample:
+            return None
+        return self._nr_keys
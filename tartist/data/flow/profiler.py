@@ -0,0 +1,187 @@
+# -*- coding:utf8 -*-
+# File   : profiler.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from .base import DataFlowBase, ProxyDataFlowBase
+
+import collections
+import threading
+import time
+
+__all__ = ['DataFlowStageStat', 'ProfiledDataFlow', 'DataFlowProfiler']
+
+
+class DataFlowStageStat(object):
+    """Statistics of a single stage in a dataflow pipeline."""
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self._mutex = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._mutex:
+            self.count = 0
+            self.time_total = 0.
+            self.time_upstream = 0.
+            self.first_time = None
+            self.last_time = None
+
+    def record(self, start, end):
+        with self._mutex:
+            self.count += 1
+            self.time_total += end - start
+            if self.first_time is None:
+                self.first_time = start
+            self.last_time = end
+
+    def record_upstream(self, duration):
+        with self._mutex:
+            self.time_upstream += duration
+
+    @property
+    def rate(self):
+        """Number of samples produced per second."""
+        if self.count == 0 or self.last_time == self.first_time:
+            return 0.
+        return self.count / (self.last_time - self.first_time)
+
+    @property
+    def time_self(self):
+        """
+        Time spent in the stage's own _gen. Note that for stages consuming the upstream in background threads (e.g.
+        BatchDataFlow), the upstream is waited concurrently, thus the value is a lower bound.
+        """
+        return max(self.time_total - self.time_upstream, 0.)
+
+    def as_dict(self):
+        return collections.OrderedDict([
+            ('name', self.name), ('depth', self.depth), ('count', self.count), ('rate', self.rate),
+            ('time_total', self.time_total), ('time_upstream', self.time_upstream), ('time_self', self.time_self),
+        ])
+
+
+class ProfiledDataFlow(ProxyDataFlowBase):
+    """Wrap a dataflow stage and record the time its consumer waits for each sample."""
+
+    def __init__(self, other, stat, downstream_stat=None):
+        super().__init__(other)
+        self._stat = stat
+        self._downstream_stat = downstream_stat
+
+    @property
+    def stat(self):
+        return self._stat
+
+    def _gen(self):
+        it = iter(self.unwrapped)
+        while True:
+            start = time.time()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            end = time.time()
+
+            self._stat.record(start, end)
+            if self._downstream_stat is not None:
+                self._downstream_stat.record_upstream(end - start)
+            yield item
+
+
+class DataFlowProfiler(object):
+    """
+    Instrument every stage of a composed dataflow pipeline, e.g.::
+
+        KVStoreRandomSampleDataFlow -> MapDataFlow -> BatchDataFlow -> MPPrefetchDataFlow
+
+    The upstream stages are discovered by the dataflow attributes of each stage, and replaced by ProfiledDataFlow
+    wrappers. For each stage, it records the number of samples produced, samples/sec, time spent waiting on the
+    upstream and time spent in its own _gen. The stage which spends the most time in its own _gen is reported as the
+    bottleneck.
+
+    Note that stages behind a process boundary (e.g. the dataflow inside MPPrefetchDataFlow) are not instrumented,
+    since their statistics live in the worker processes. Plain python generators are not instrumented either.
+    A typical usage is::
+
+        profiler = DataFlowProfiler(make_dataflow_train(env))
+        for data in profiler.dataflow:
+            ...
+        print(profiler.format_report())
+
+    """
+
+    __process_boundary_types__ = ('MPPrefetchDataFlow', 'MPCustomDataFlow')
+
+    def __init__(self, dataflow):
+        self._stats = []
+        self._wrapped = dict()
+        self._dataflow = self._instrument(dataflow, 0, None)
+
+    @property
+    def dataflow(self):
+        """The instrumented dataflow, iterate over this one instead of the original one."""
+        return self._dataflow
+
+    @property
+    def stats(self):
+        """Stats of all stages, from the sink to the sources."""
+        return list(self._stats)
+
+    def _instrument(self, df, depth, downstream_stat):
+        if id(df) in self._wrapped:
+            return self._wrapped[id(df)]
+
+        stat = DataFlowStageStat(type(df).__name__, depth)
+        self._stats.append(stat)
+        wrapped = ProfiledDataFlow(df, stat, downstream_stat)
+        self._wrapped[id(df)] = wrapped
+
+        if type(df).__name__ not in self.__process_boundary_types__:
+            for k, v in list(vars(df).items()):
+                if isinstance(v, ProfiledDataFlow):
+                    continue
+                if isinstance(v, DataFlowBase):
+                    setattr(df, k, self._instrument(v, depth + 1, stat))
+                elif type(v) in (tuple, list) and len(v) > 0 and all(isinstance(x, DataFlowBase) for x in v):
+                    setattr(df, k, type(v)(self._instrument(x, depth + 1, stat) for x in v))
+        return wrapped
+
+    def reset(self):
+        """Reset the stats of all stages, e.g., after warming up."""
+        for s in self._stats:
+            s.reset()
+
+    @property
+    def bottleneck(self):
+        """The stage spending the most time in its own _gen."""
+        stats = [s for s in self._stats if s.count > 0]
+        if len(stats) == 0:
+            return None
+        return max(stats, key=lambda s: s.time_self)
+
+    def report(self):
+        bottleneck = self.bottleneck
+        return collections.OrderedDict([
+            ('stages', [s.as_dict() for s in reversed(self._stats)]),
+            ('bottleneck', bottleneck.name if bottleneck is not None else None)
+        ])
+
+    def format_report(self):
+        log_strs = ['Dataflow profiler:']
+        for s in reversed(self._stats):
+            per_sample = 1000 / s.count if s.count else 0
+            log_strs.append('  {}{}: count = {}, rate = {:.2f}/s, total = {:.3f}ms/sample, upstream = {:.3f}ms/sample, '
+                            'self = {:.3f}ms/sample'.format(
+                                '  ' * s.depth, s.name, s.count, s.rate, s.time_total * per_sample,
+                                s.time_upstream * per_sample, s.time_self * per_sample))
+        bottleneck = self.bottleneck
+        if bottleneck is not None:
+            log_strs.append('  Bottleneck: {} (depth = {}), self time = {:.3f}s.'.format(
+                bottleneck.name, bottleneck.depth, bottleneck.time_self))
+        return '\n'.join(log_strs)
@@ -14,7 +14,14 @@ from ...random import gen_seed, reset_global_rng
 from multiprocessing import Process
 import time
 
-__all__ = ['RemoteDataFlow', 'MPPrefetchDataFlow', 'MPCustomDataFlow', 'RemoteMonitorDataFlow']
+__all__ = ['RemoteDataFlow', 'MPPrefetchDataFlow', 'MPCustomDataFlow', 'RemoteMonitorDataFlow', 'get_mp_worker_info']
+
+_mp_worker_info = None
+
+
+def get_mp_worker_info():
+    """Return (worker_id, nr_workers) inside a worker process of MPPrefetchDataFlow, otherwise None."""
+    return _mp_worker_info
 
 
 class RemoteDataFlow(SimpleDataFlowBase):
@@ -29,6 +36,8 @@ class RemoteDataFlow(SimpleDataFlowBase):
 
 class MPPrefetchDataFlow(SimpleDataFlowBase):
     def _mainloop_worker(self, wid, seed):
+        global _mp_worker_info
+        _mp_worker_info = (wid, self._nr_workers)
         reset_global_rng(seed)
         with self._pushs[wid].activate():
             for data in self._dataflow:
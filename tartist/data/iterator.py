@@ -8,7 +8,8 @@
 
 import numpy as np
 
-from ..core.utils.nd import nd_batch_size
+from ..core.utils.nd import nd_batch_size, isndarray
+from ..random import gen_rng
 
 __all__ = [
     'DataIterator',
@@ -131,7 +132,15 @@ class CountBasedIterator(DataIterator):
 
 
 class BatchBasedIterator(DataIterator):
-    def __init__(self, length, batch_size, use_all_data=False):
+    """
+    Iterate over the data batch by batch. By default, each batch is a fresh copy of the data. If copy is False:
+
+    1. For sequential iteration, batches are read-only views of the contiguous ranges of the data, no copy at all.
+    2. For shuffled iteration, batches are gathered into preallocated buffers, which are reused by the following
+       batches. Thus the consumer should not keep the references of the batches across iterations.
+    """
+
+    def __init__(self, length, batch_size, use_all_data=False, shuffle=False, copy=True, rng=None):
         super().__init__()
         self._length = length
         self._batch_size = batch_size
@@ -141,12 +150,22 @@ class BatchBasedIterator(DataIterator):
             self._nr_batches += 1
         self._current = 0
 
+        self._shuffle = shuffle
+        self._copy = copy
+        self._rng = rng
+        self._indices = None
+        self._buffers = dict()
+
     @property
     def has_nonfull_batch(self):
         return self._use_all_data and self._length % self._batch_size != 0
 
     def _initialize(self):
         self._current = 0
+        if self._shuffle:
+            if self._rng is None:
+                self._rng = gen_rng()
+            self._indices = self._rng.permutation(self._length)
 
     def _get(self):
         if self._current == self._nr_batches - 1 and self.has_nonfull_batch:
@@ -157,6 +176,38 @@ class BatchBasedIterator(DataIterator):
     def _get_batch(self, idx, is_last=False):
         raise NotImplementedError()
 
+    def _get_range(self, idx, is_last):
+        start = idx * self._batch_size
+        end = (idx + 1) * self._batch_size if not is_last else self._length
+        return start, end
+
+    def _as_array(self, array):
+        # views are only available for nd arrays, convert lists once
+        if self._copy or isndarray(array):
+            return array
+        return np.asarray(array)
+
+    def _slice(self, key, array, start, end):
+        if not self._shuffle:
+            if self._copy:
+                return np.array(array[start:end])
+            view = array[start:end]
+            view.flags.writeable = False
+            return view
+
+        indices = self._indices[start:end]
+        if self._copy:
+            return np.take(array, indices, axis=0)
+
+        buf = self._buffers.get(key, None)
+        if buf is None:
+            buf = self._buffers[key] = np.empty((self._batch_size, ) + array.shape[1:], dtype=array.dtype)
+        buf.flags.writeable = True
+        # indices are always valid here, mode='clip' avoids the extra buffering of out in the default mode
+        out = np.take(array, indices, axis=0, out=buf[:end - start], mode='clip')
+        buf.flags.writeable = False
+        return out
+
     def _count(self):
         return self._nr_batches
 
@@ -168,34 +219,31 @@ class BatchBasedIterator(DataIterator):
 
 
 class ArrayIterator(BatchBasedIterator):
-    def __init__(self, array, batch_size, use_all_data=False):
-        super().__init__(len(array), batch_size, use_all_data)
-        self._array = array
+    def __init__(self, array, batch_size, use_all_data=False, shuffle=False, copy=True, rng=None):
+        super().__init__(len(array), batch_size, use_all_data, shuffle=shuffle, copy=copy, rng=rng)
+        self._array = self._as_array(array)
 
     def _get_batch(self, idx, is_last=False):
-        if is_last:
-            return np.array(self._array[idx * self._batch_size:])
-        return np.array(self._array[idx * self._batch_size:(idx + 1) * self._batch_size])
+        start, end = self._get_range(idx, is_last)
+        return self._slice(0, self._array, start, end)
 
 
 class ListOfArrayIterator(BatchBasedIterator):
-    def __init__(self, arrlist, batch_size, use_all_data=False):
-        super().__init__(nd_batch_size(arrlist), batch_size, use_all_data)
-        self._arrlist = arrlist
+    def __init__(self, arrlist, batch_size, use_all_data=False, shuffle=False, copy=True, rng=None):
+        super().__init__(nd_batch_size(arrlist), batch_size, use_all_data, shuffle=shuffle, copy=copy, rng=rng)
+        self._arrlist = [self._as_array(x) for x in arrlist]
 
     def _get_batch(self, idx, is_last=False):
-        start = idx * self._batch_size
-        end = idx * self._batch_size if not is_last else self._length
-        return [np.array(x[start:end]) for x in self._arrlist]
+        start, end = self._get_range(idx, is_last)
+        return [self._slice(i, x, start, end) for i, x in enumerate(self._arrlist)]
 
 
 class DictOfArrayIterator(BatchBasedIterator):
-    def __init__(self, arrdict, batch_size, use_all_data=False):
-        super().__init__(nd_batch_size(arrdict), batch_size, use_all_data)
-        self._arrdict = arrdict
+    def __init__(self, arrdict, batch_size, use_all_data=False, shuffle=False, copy=True, rng=None):
+        super().__init__(nd_batch_size(arrdict), batch_size, use_all_data, shuffle=shuffle, copy=copy, rng=rng)
+        self._arrdict = {k: self._as_array(v) for k, v in arrdict.items()}
 
     def _get_batch(self, idx, is_last=False):
-        start = idx * self._batch_size
-        end = (idx + 1) * self._batch_size if not is_last else self._length
-        res = {k: np.array(v[start:end]) for k, v in self._arrdict.items()}
+        start, end = self._get_range(idx, is_last)
+        res = {k: self._slice(k, v, start, end) for k, v in self._arrdict.items()}
         return res
@@ -8,3 +8,5 @@
 
 from .base import *
 from .lmdb import *
+from .builder import *
+from .sharded import *
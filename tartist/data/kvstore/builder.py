@@ -0,0 +1,149 @@
+# -*- coding:utf8 -*-
+# File   : builder.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from .lmdb import LMDBKVStore, _dumps, _loads, _codecs
+from ...core.logger import get_logger
+
+import multiprocessing
+import os
+import time
+
+import lmdb
+
+logger = get_logger(__file__)
+
+__all__ = ['lmdb_bulk_build']
+
+_worker_encode_func = None
+_worker_compress_func = None
+
+
+def _worker_init(encode_func, codec):
+    global _worker_encode_func, _worker_compress_func
+    _worker_encode_func = encode_func
+    _worker_compress_func = _codecs[codec][0] if codec is not None else None
+
+
+def _worker_encode(record):
+    key, payload = record
+    value = payload if _worker_encode_func is None else _worker_encode_func(payload)
+    value = _dumps(value)
+    if _worker_compress_func is not None:
+        value = _worker_compress_func(value)
+    return key, value
+
+
+def lmdb_bulk_build(lmdb_path, records, encode_func=None, codec=None, nr_workers=None, batch_size=1024,
+                    chunk_size=16, report_interval=10):
+    """
+    Build (or extend) a LMDB store readable by LMDBKVStore in bulk. The records are encoded (by `encode_func`),
+    pickled and compressed (by `codec`) in a pool of worker processes, and then written in batches of `batch_size`
+    records per transaction. The records are sorted by keys before encoding, so that the batches can be written with
+    `append=True` (which skips the B-tree search for each key) when the keys are all greater than the existing ones.
+    The `__keys__` list is written once at the end.
+
+    A typical usage is::
+
+        records = [(osp.basename(f)[:-4], f) for f in files]
+        lmdb_bulk_build(db_path, records, encode_func=read_and_encode_image, nr_workers=8)
+
+    :param lmdb_path: The path to the LMDB store.
+    :param records: A list of (key, payload) pairs, the keys should be strings.
+    :param encode_func: A function mapping the payload into the value to be stored (e.g. reading and encoding an
+    image), it must be picklable (a top-level function) if nr_workers > 0. If None, payloads are stored as is.
+    :param codec: The compression codec of the values, one of None, "zlib" and "lzma". It must be the same as the
+    existing one when extending a store.
+    :param nr_workers: Number of worker processes, defaults to the number of CPUs. 0 means encoding in the main process.
+    :param batch_size: Number of records written in each transaction.
+    :param chunk_size: Number of records sent to a worker at a time.
+    :param report_interval: Interval (in seconds) of the throughput report.
+    :return: A dict of the statistics, including nr_records, nr_bytes, time and throughput.
+    """
+
+    assert codec is None or codec in _codecs, 'Unknown codec: {}.'.format(codec)
+    if nr_workers is None:
+        nr_workers = os.cpu_count() or 1
+
+    records = sorted(records, key=lambda x: x[0].encode(LMDBKVStore._key_charset))
+    for i in range(1, len(records)):
+        assert records[i - 1][0] != records[i][0], 'Duplicated key: {}.'.format(records[i][0])
+
+    db = lmdb.open(lmdb_path, subdir=os.path.isdir(lmdb_path), readonly=False, lock=False, readahead=False,
+                   map_size=1099511627776 * 2, meminit=False)
+
+    with db.begin() as txn:
+        keys = txn.get(LMDBKVStore._magic_key, None)
+        keys = _loads(keys) if keys is not None else []
+        old_codec = txn.get(LMDBKVStore._codec_key, None)
+        old_codec = old_codec.decode() if old_codec is not None else None
+        with txn.cursor() as cursor:
+            last_key = cursor.key() if cursor.last() else None
+
+    if len(keys) > 0:
+        assert old_codec == codec, 'Codec mismatched with the existing store: {} vs {}.'.format(old_codec, codec)
+
+    # special keys (__keys__ and __codec__) are not written by batches
+    use_append = last_key is None or len(records) == 0 or (
+        records[0][0].encode(LMDBKVStore._key_charset) > max(last_key, LMDBKVStore._magic_key))
+    if not use_append:
+        logger.warn('Keys are not greater than the existing ones, fall back to non-append mode.')
+
+    if nr_workers > 0:
+        pool = multiprocessing.Pool(nr_workers, initializer=_worker_init, initargs=(encode_func, codec))
+        encoded = pool.imap(_worker_encode, records, chunksize=chunk_size)
+    else:
+        pool = None
+        _worker_init(encode_func, codec)
+        encoded = map(_worker_encode, records)
+
+    nr_records, nr_bytes = 0, 0
+    start_time = last_report = time.time()
+
+    def write_batch(batch):
+        with db.begin(write=True) as txn:
+            with txn.cursor() as cursor:
+                cursor.putmulti(batch, append=use_append)
+
+    try:
+        batch = []
+        for key, value in encoded:
+            batch.append((key.encode(LMDBKVStore._key_charset), value))
+            keys.append(key)
+            nr_records += 1
+            nr_bytes += len(value)
+
+            if len(batch) >= batch_size:
+                write_batch(batch)
+                batch = []
+
+            if time.time() - last_report > report_interval:
+                last_report = time.time()
+                elapsed = last_report - start_time
+                logger.info('Building LMDB: {}/{} records, {:.1f} records/s, {:.2f} MB/s.'.format(
+                    nr_records, len(records), nr_records / elapsed, nr_bytes / elapsed / 1024 ** 2))
+
+        if len(batch) > 0:
+            write_batch(batch)
+
+        with db.begin(write=True) as txn:
+            txn.put(LMDBKVStore._magic_key, _dumps(keys))
+            if codec is not None:
+                txn.put(LMDBKVStore._codec_key, codec.encode())
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        db.sync()
+        db.close()
+
+    elapsed = max(time.time() - start_time, 1e-6)
+    stat = dict(nr_records=nr_records, nr_bytes=nr_bytes, time=elapsed,
+                records_per_sec=nr_records / elapsed, mb_per_sec=nr_bytes / elapsed / 1024 ** 2)
+    logger.info('LMDB built: {} records ({:.2f} MB) in {:.2f}s, {:.1f} records/s, {:.2f} MB/s.'.format(
+        nr_records, nr_bytes / 1024 ** 2, elapsed, stat['records_per_sec'], stat['mb_per_sec']))
+    return stat
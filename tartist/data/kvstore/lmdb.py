@@ -11,17 +11,26 @@ from ...core.utils.cache import cached_property
 
 import os
 import lmdb
+import lzma
 import pickle
+import zlib
 
 __all__ = ['LMDBKVStore']
 
 _loads = pickle.loads
 _dumps = pickle.dumps
 
+# codecs for the (pickled) values, the codec of a database is stored under the key `__codec__`
+_codecs = {
+    'zlib': (zlib.compress, zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress)
+}
+
 
 class LMDBKVStore(KVStoreBase):
     _key_charset = 'utf8'
     _magic_key = b'__keys__'
+    _codec_key = b'__codec__'
 
     def __init__(self, lmdb_path, readonly=True, keys=None):
         super().__init__(readonly=readonly)
@@ -38,12 +47,20 @@ class LMDBKVStore(KVStoreBase):
         self._lmdb_keys = keys
         self._is_dirty = False
 
+        with self._lmdb.begin() as txn:
+            codec = txn.get(self._codec_key, None)
+        self._codec = _codecs[codec.decode()] if codec is not None else None
+
     @cached_property
     def txn(self):
        return self._lmdb.begin(write=not self.readonly)
 
     def _get(self, key, default):
-        value = self.txn.get(key.encode(self._key_charset), default=default)
+        value = self.txn.get(key.encode(self._key_charset), default=None)
+        if value is None:
+            return default
+        if self._codec is not None:
+            value = self._codec[1](value)
         value = _loads(value)
         return value
 
@@ -53,7 +70,10 @@ class LMDBKVStore(KVStoreBase):
             self._lmdb_keys = []
         # TODO(MJY):: test whehter the key already exists
         self._lmdb_keys.append(key)
-        return self.txn.put(key.encode(self._key_charset), _dumps(value), overwrite=replace)
+        value = _dumps(value)
+        if self._codec is not None:
+            value = self._codec[0](value)
+        return self.txn.put(key.encode(self._key_charset), value, overwrite=replace)
 
     def _transaction(self, *args, **kwargs):
         return self
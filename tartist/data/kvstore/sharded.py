@@ -0,0 +1,194 @@
+# -*- coding:utf8 -*-
+# File   : sharded.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from .base import KVStoreBase
+from .lmdb import LMDBKVStore
+from .builder import lmdb_bulk_build
+from ...core.io.fs import mkdir
+
+import bisect
+import contextlib
+import json
+import os.path as osp
+import zlib
+
+__all__ = ['ShardedLMDBKVStore', 'sharded_lmdb_bulk_build']
+
+_meta_file = 'shards.json'
+
+
+def _shard_path(root, index):
+    return osp.join(root, 'shard-{:05d}.lmdb'.format(index))
+
+
+class _ShardRouter(object):
+    def __init__(self, nr_shards, route='hash', boundaries=None):
+        assert route in ('hash', 'range'), 'Unknown route method: {}.'.format(route)
+        if route == 'range':
+            assert boundaries is not None and len(boundaries) == nr_shards - 1
+        self.nr_shards = nr_shards
+        self.route = route
+        self.boundaries = boundaries
+
+    def __call__(self, key):
+        if self.route == 'hash':
+            # crc32 is stable across processes, unlike the builtin hash of strings
+            return zlib.crc32(key.encode('utf8')) % self.nr_shards
+        return bisect.bisect_right(self.boundaries, key)
+
+    def dump(self, root):
+        with open(osp.join(root, _meta_file), 'w') as f:
+            json.dump({'nr_shards': self.nr_shards, 'route': self.route, 'boundaries': self.boundaries}, f)
+
+    @classmethod
+    def load(cls, root):
+        with open(osp.join(root, _meta_file)) as f:
+            meta = json.load(f)
+        return cls(meta['nr_shards'], meta['route'], meta['boundaries'])
+
+
+class ShardedLMDBKVStore(KVStoreBase):
+    """
+    A kvstore whose keys are routed across multiple LMDB files (shards) under a root directory, either by the hash of
+    the key, or by key ranges. The routing method is stored in `shards.json` under the root directory.
+
+    An instance may open only a subset of the shards, so that multiple dataflow workers can read disjoint shards (and
+    thus different files, possibly on different disks) instead of contending on a single LMDB environment. The keys()
+    only contains the keys in the opened shards. A typical usage with MPPrefetchDataFlow is::
+
+        df = KVStoreRandomSampleDataFlow(lambda: ShardedLMDBKVStore(root).for_worker())
+        df = MPPrefetchDataFlow(df, nr_workers=4)
+
+    Shards are opened lazily on the first access.
+    """
+
+    def __init__(self, root, nr_shards=None, route='hash', boundaries=None, shards=None, readonly=True):
+        """
+        :param root: The root directory of the shards.
+        :param nr_shards: Number of shards, only needed when creating a new store.
+        :param route: The routing method, either "hash" or "range", only used when creating a new store.
+        :param boundaries: The sorted boundary keys (nr_shards - 1 keys) for the "range" routing. A key k goes to the
+        i-th shard if boundaries[i - 1] <= k < boundaries[i].
+        :param shards: The indices of the shards to be opened, defaults to all.
+        :param readonly: Whether the store is readonly.
+        """
+        super().__init__(readonly=readonly)
+        self._root = root
+
+        if osp.exists(osp.join(root, _meta_file)):
+            self._router = _ShardRouter.load(root)
+            assert nr_shards is None or nr_shards == self._router.nr_shards, 'Number of shards mismatched.'
+        else:
+            assert not readonly, 'Sharded kvstore does not exist: {}.'.format(root)
+            assert nr_shards is not None, 'Must provide nr_shards when creating a sharded kvstore.'
+            mkdir(root)
+            self._router = _ShardRouter(nr_shards, route, boundaries)
+            self._router.dump(root)
+
+        if shards is None:
+            shards = range(self._router.nr_shards)
+        self._shard_indices = sorted(set(shards))
+        assert all(0 <= i < self.nr_shards for i in self._shard_indices)
+        self._shards = dict()
+
+    @property
+    def root(self):
+        return self._root
+
+    @property
+    def nr_shards(self):
+        return self._router.nr_shards
+
+    @property
+    def shard_indices(self):
+        return list(self._shard_indices)
+
+    def get_shard_index(self, key):
+        return self._router(key)
+
+    def get_shard(self, index):
+        assert index in self._shard_indices, 'Shard {} is not opened by this kvstore (opened: {}).'.format(
+            index, self._shard_indices)
+        shard = self._shards.get(index, None)
+        if shard is None:
+            path = _shard_path(self._root, index)
+            if not self.readonly:
+                mkdir(path)
+            shard = self._shards[index] = LMDBKVStore(path, readonly=self.readonly)
+        return shard
+
+    def subset(self, shards):
+        """Return a new kvstore opening only the given shards."""
+        store = type(self)(self._root, shards=shards, readonly=self.readonly)
+        # LMDB environments can not be opened twice in a process, so share the opened shards
+        store._shards = self._shards
+        return store
+
+    def for_worker(self, worker_id=None, nr_workers=None):
+        """
+        Return a new kvstore opening the shards assigned to a worker, i.e. shards i, i + n, i + 2n, ... for the i-th
+        out of n workers. If worker_id and nr_workers are not given, the worker info of MPPrefetchDataFlow is used; and
+        all shards are kept outside the workers.
+        """
+        if worker_id is None:
+            from ..flow.remote import get_mp_worker_info
+            info = get_mp_worker_info()
+            if info is None:
+                return self.subset(self._shard_indices)
+            worker_id, nr_workers = info
+
+        shards = self._shard_indices[worker_id::nr_workers]
+        assert len(shards) > 0, 'No shard is assigned to worker {}/{}; use more shards than workers.'.format(
+            worker_id, nr_workers)
+        return self.subset(shards)
+
+    def _get(self, key, default):
+        return self.get_shard(self._router(key)).get(key, default)
+
+    def _put(self, key, value, replace):
+        return self.get_shard(self._router(key)).put(key, value, replace=replace)
+
+    @contextlib.contextmanager
+    def _transaction(self, *args, **kwargs):
+        with contextlib.ExitStack() as stack:
+            for i in self._shard_indices:
+                stack.enter_context(self.get_shard(i).transaction(*args, **kwargs))
+            yield self
+
+    def _keys(self):
+        keys = []
+        for i in self._shard_indices:
+            keys.extend(self.get_shard(i).keys())
+        return keys
+
+
+def sharded_lmdb_bulk_build(root, records, nr_shards, route='hash', **kwargs):
+    """
+    Build a ShardedLMDBKVStore in bulk, the records are partitioned by the routing method and each shard is built by
+    lmdb_bulk_build (the keyword arguments are passed to it). For the "range" routing, the boundaries are chosen so
+    that the shards have (nearly) equal number of records.
+
+    :return: A list of the statistics of each shard.
+    """
+    records = list(records)
+    boundaries = None
+    if route == 'range':
+        keys = sorted(r[0] for r in records)
+        boundaries = [keys[len(keys) * i // nr_shards] for i in range(1, nr_shards)]
+
+    store = ShardedLMDBKVStore(root, nr_shards=nr_shards, route=route, boundaries=boundaries, readonly=False)
+    partitions = [[] for _ in range(store.nr_shards)]
+    for r in records:
+        partitions[store.get_shard_index(r[0])].append(r)
+
+    stats = []
+    for i, part in enumerate(partitions):
+        path = _shard_path(root, i)
+        mkdir(path)
+        stats.append(lmdb_bulk_build(path, part, **kwargs))
+    return stats
@@ -12,6 +12,8 @@ NS_CTL_HOST = '*'
 NS_CTL_PORT = '43521'
 NS_HEARTBEAT_INTERVAL = 3
 NS_CLEANUP_WAIT = 10
+# the max poll timeout of the ReactorNameServer, i.e., the latency to respond to stop
+NS_REACTOR_MAX_WAIT = 0.5
 
 CTL_CTL_SND_COUNTDOWN = 5
 CTL_CTL_HWM = 5
@@ -21,6 +23,18 @@ CTL_DAT_HWM = 5
 CTL_DAT_PROTOCAL = 'tcp'
 CTL_DAT_HOST = '*'
 
+# the size of the shared memory ring of a same-host pipe peer, 0 to disable (the default, since each peer of each pipe
+# holds a ring in /dev/shm, which is usually small, e.g., 64MB in docker)
+SHM_RING_SIZE = 0
+# the size of the shared memory ring of a push pipe in the shm mode
+SHM_PUSH_RING_SIZE = 64 * 1024 * 1024
+# smaller payloads are sent inline, as it is faster than the shared memory
+SHM_MIN_SIZE = 128 * 1024
+
+# re-advertise the credit even if it is unchanged, in case of lost messages
+CTL_CREDIT_REFRESH_INTERVAL = 0.5
+CTL_CREDIT_LATENCY_DECAY = 0.9
+
 
 class Actions:
     NS_REGISTER_CTL_REQ = 'ns-register-ctl-req'
@@ -16,6 +16,7 @@ import threading
 import queue
 import contextlib
 import random
+import time
 
 logger = get_logger(__file__)
 
@@ -57,6 +58,56 @@ class ControllerPipeStorage(object):
     def filter_notfull(self, name):
         return list(filter(ControllerPipeStorage.fn_filter_notfull, self.get_pipes(name)))
 
+    def get_route(self, name):
+        routes = set(getattr(p, 'route', None) for p in self.get_pipes(name))
+        assert len(routes) <= 1, 'Pipes of the same name should have the same route: {}.'.format(name)
+        return routes.pop() if len(routes) else None
+
+
+class CreditPeerStat(object):
+    """The credit and statistics of a consumer of a credit-routed output pipe, maintained by the producer. The consumer
+    advertises its free capacity along with the number of data it has received, so the credit (the number of data that
+    can be sent) is the advertised capacity minus the data in flight (sent but not yet acknowledged)."""
+
+    def __init__(self):
+        self.advertised = 0
+        self.acked = 0
+        self.nr_sent = 0
+        self.latency = None
+
+    @property
+    def in_flight(self):
+        return self.nr_sent - self.acked
+
+    @property
+    def credit(self):
+        return self.advertised - self.in_flight
+
+    def update(self, free, received, timestamp=None):
+        self.advertised = free
+        self.acked = received
+        if timestamp is not None:
+            latency = time.time() - timestamp
+            if self.latency is None:
+                self.latency = latency
+            else:
+                decay = configs.CTL_CREDIT_LATENCY_DECAY
+                self.latency = self.latency * decay + latency * (1 - decay)
+
+    def as_dict(self):
+        return {'credit': self.credit, 'in_flight': self.in_flight, 'nr_sent': self.nr_sent, 'latency': self.latency}
+
+
+class CreditConsumerState(object):
+    """The state of the credit advertisement of a consumer to a producer."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.nr_received = 0
+        self.last_timestamp = None
+        self.last_advertisement = None
+        self.last_advertisement_time = 0
+
 
 ControlMessage = collections.namedtuple('ControlMessage', ['sock', 'identifier', 'payload', 'countdown'])
 ControllerPeer = collections.namedtuple('ControllerPeer', ['info', 'csock'])
@@ -100,6 +151,25 @@ class Controller(object):
         # map pipe_name => cache
         self._opipe_cache = dict()
 
+        # credit-based routing (see OutputPipe)
+        # the socket receiving the credits of the consumers
+        self._credit_socket = None
+        self._credit_port = 0
+        # map pipe_name => dict of <uid, CreditPeerStat>, for output pipes
+        self._opipe_credits = dict()
+        # map pipe_name => dict of <uid, CreditConsumerState>, for input pipes
+        self._ipipe_credits = dict()
+        # map uid => socket sending the credits to the producer
+        self._credit_socks = dict()
+
+        # shared memory rings for the peers on the same host
+        # map pipe_name => dict of <uid, SharedMemoryRing>, for output pipes, enabled after the peer attached it
+        self._opipe_rings = dict()
+        # map (pipe_name, uid) => SharedMemoryRing, created but not yet attached by the peer
+        self._opipe_rings_pending = dict()
+        # map pipe_name => dict of <uid, SharedMemoryRing>, for input pipes
+        self._ipipe_rings = dict()
+
         # threads and stop-event
         self._all_socks = set()
         self._all_threads = []
@@ -140,6 +210,13 @@ class Controller(object):
         self._control_router_port = self._control_router.bind_to_random_port('tcp://*')
         self._poller.register(self._control_router, zmq.POLLIN)
 
+        # setup credit socket
+        if any(self._omanager.get_route(name) == 'credit' for name in self._omanager.names):
+            self._credit_socket = self.socket(zmq.PULL)
+            self._credit_port = self._credit_socket.bind_to_random_port('{}://{}'.format(
+                configs.CTL_DAT_PROTOCAL, configs.CTL_DAT_HOST))
+            self._poller.register(self._credit_socket, zmq.POLLIN)
+
         # register on the name-server
         response = utils.req_send_and_recv(self._ns_socket, {
             'action': configs.Actions.NS_REGISTER_CTL_REQ,
@@ -189,6 +266,11 @@ class Controller(object):
             i.join()
         for sock in self._all_socks:
             utils.graceful_close(sock)
+        for rings in list(self._opipe_rings.values()) + list(self._ipipe_rings.values()):
+            for ring in rings.values():
+                ring.close()
+        for ring in self._opipe_rings_pending.values():
+            ring.close()
 
     def _main(self):
         wait = 0
@@ -202,7 +284,9 @@ class Controller(object):
             nr_done += self._main_do_control_recv(socks)
             nr_done += self._main_do_control_send()
             nr_done += self._main_do_data_recv(socks)
+            nr_done += self._main_do_credit_recv(socks)
             nr_done += self._main_do_data_send()
+            nr_done += self._main_do_credit_send()
 
             if nr_done > 0:
                 wait = wait / 2 if wait > 1 else 0
@@ -276,15 +360,28 @@ class Controller(object):
             sock = random.choice(socks)
             msg = utils.pull_pyobj(sock)
             if msg is not None:
+                if 'shm' in msg:
+                    data = self._ipipe_rings[name][msg['uid']].load(msg['shm'])
+                else:
+                    data = msg['data']
                 for p in pipes:
-                    p.put_nowait(msg['data'])
+                    p.put_nowait(data)
                     nr_done += 1
 
+                state = self._ipipe_credits.get(name, {}).get(msg['uid'], None)
+                if state is not None:
+                    state.nr_received += 1
+                    state.last_timestamp = msg.get('timestamp', None)
+
         return nr_done
            
     def _main_do_data_send(self):
         nr_done = 0
         for name in self._omanager.names:
+            if self._omanager.get_route(name) == 'credit':
+                nr_done += self._main_do_data_send_credit(name)
+                continue
+
             cache = self._opipe_cache.get(name, None)
             
             if cache is None:
@@ -298,11 +395,8 @@ class Controller(object):
                 continue
 
             nr_done_this = 0
-            for peer in self._opipe_peers.get(name, {}).values():
-                nr_done_this += utils.push_pyobj(peer.dsock, {
-                    'uid': self._uid,
-                    'data': cache
-                }, flag=zmq.NOBLOCK)
+            for uid, peer in self._opipe_peers.get(name, {}).items():
+                nr_done_this += self._push_data(name, uid, peer, cache)
 
             if nr_done_this > 0:
                 self._opipe_cache[name] = None
@@ -311,6 +405,108 @@ class Controller(object):
 
         return nr_done 
 
+    def _main_do_data_send_credit(self, name):
+        peers = self._opipe_peers.get(name, {})
+        stats = self._opipe_credits.get(name, {})
+        blocked = set()
+        nr_done = 0
+
+        while True:
+            candidates = [(stat.credit, uid) for uid, stat in stats.items()
+                          if stat.credit > 0 and uid in peers and uid not in blocked]
+            if len(candidates) == 0:
+                break
+
+            cache = self._opipe_cache.get(name, None)
+            if cache is None:
+                pipes = self._omanager.filter_notempty(name)
+                if len(pipes) == 0:
+                    break
+                cache = random.choice(pipes).get_nowait()
+                self._opipe_cache[name] = cache
+
+            # route to the peer with the most credit
+            uid = max(candidates)[1]
+            rc = self._push_data(name, uid, peers[uid], cache, timestamp=time.time())
+            if rc:
+                stats[uid].nr_sent += 1
+                self._opipe_cache[name] = None
+                nr_done += 1
+            else:
+                blocked.add(uid)
+
+        return nr_done
+
+    def _push_data(self, name, uid, peer, data, **kwargs):
+        msg = {'uid': self._uid}
+        msg.update(kwargs)
+
+        # for the peers on the same host, write the data into the ring and only send the descriptor
+        ring = self._opipe_rings.get(name, {}).get(uid, None)
+        desc = ring.dump(data) if ring is not None else None
+        if desc is not None:
+            msg['shm'] = desc
+        else:
+            msg['data'] = data
+
+        rc = utils.push_pyobj(peer.dsock, msg, flag=zmq.NOBLOCK)
+        if not rc and desc is not None:
+            ring.rollback(desc)
+        return rc
+
+    def _main_do_credit_recv(self, socks):
+        if self._credit_socket is None or self._credit_socket not in socks:
+            return 0
+
+        nr_done = 0
+        for msg in utils.iter_recv(utils.pull_pyobj, self._credit_socket):
+            stat = self._opipe_credits.get(msg['pipe'], {}).get(msg['uid'], None)
+            if stat is not None:
+                stat.update(msg['free'], msg['received'], msg['timestamp'])
+            nr_done += 1
+        return nr_done
+
+    def _main_do_credit_send(self):
+        nr_done = 0
+        now = time.time()
+        for name, states in self._ipipe_credits.items():
+            if len(states) == 0:
+                continue
+
+            free = min(p.nr_free() for p in self._imanager.get_pipes(name))
+            # share the capacity among the producers
+            share = (free + len(states) - 1) // len(states)
+            for state in states.values():
+                advertisement = (share, state.nr_received)
+                if advertisement == state.last_advertisement and \
+                        now - state.last_advertisement_time < configs.CTL_CREDIT_REFRESH_INTERVAL:
+                    continue
+
+                rc = utils.push_pyobj(state.sock, {
+                    'uid': self._uid,
+                    'pipe': name,
+                    'free': share,
+                    'received': state.nr_received,
+                    'timestamp': state.last_timestamp
+                })
+                if rc:
+                    state.last_timestamp = None
+                    state.last_advertisement = advertisement
+                    state.last_advertisement_time = now
+                    nr_done += 1
+        return nr_done
+
+    def get_peer_stats(self):
+        """
+        Get the statistics of the consumers of the credit-routed output pipes.
+
+        :return: A dict of pipe_name => {uid => stat}, where each stat is a dict of: credit (number of data that can
+        be sent), in_flight (sent but not yet acknowledged by the consumer), nr_sent, and latency (moving average of
+        the time between sending a data and receiving the acknowledgement, in seconds).
+        """
+        return {name: {uid: stat.as_dict() for uid, stat in list(stats.items())}
+                for name, stats in list(self._opipe_credits.items())}
+
     # BEGIN:: Connection
 
     def _initialize_ipipe_peers(self, results):
@@ -346,7 +542,7 @@ class Controller(object):
 
             peers = self._opipe_peers.setdefault(name, {})
             if uid in peers:
-                port = peers['uid'].port
+                port = peers[uid].port
             else:
                 sock = self.socket(zmq.PUSH)
                 port = sock.bind_to_random_port('{}://{}'.format(configs.CTL_DAT_PROTOCAL, configs.CTL_DAT_HOST))
@@ -359,6 +555,17 @@ class Controller(object):
                     'dat_addr': self._addr,
                     'dat_port': port
                 }
+                if self._omanager.get_route(name) == 'credit':
+                    self._opipe_credits.setdefault(name, {}).setdefault(uid, CreditPeerStat())
+                    response[name]['credit_port'] = self._credit_port
+                if configs.SHM_RING_SIZE > 0 and utils.is_same_host(uid, self._uid):
+                    ring = self._opipe_rings.get(name, {}).get(uid, None) or self._opipe_rings_pending.get((name, uid))
+                    if ring is None:
+                        ring = self._make_ring(name, uid)
+                        if ring is not None:
+                            self._opipe_rings_pending[(name, uid)] = ring
+                    if ring is not None:
+                        response[name]['shm_name'] = ring.name
 
         self._control_mqueue.put(ControlMessage(self._control_router, identifier, {
             'action': configs.Actions.CTL_CONNECT_REP,
@@ -366,9 +573,21 @@ class Controller(object):
             'opipes': response
         }, countdown=configs.CTL_CTL_SND_COUNTDOWN))
 
+    def _make_ring(self, name, uid):
+        from .shm_ring import SharedMemoryRing, is_shm_available
+        if not is_shm_available(configs.SHM_RING_SIZE):
+            logger.warning('Shared memory is not available for {}: pipe={}, fallback to sockets.'.format(uid, name))
+            return None
+        try:
+            return SharedMemoryRing(create=True, size=configs.SHM_RING_SIZE, min_size=configs.SHM_MIN_SIZE)
+        except OSError:
+            logger.warning('Failed to create the shared memory for {}: pipe={}.'.format(uid, name))
+            return None
+
     def _on_ctl_connect_rep(self, msg):
         uid, pipes = msg['uid'], msg['opipes']
 
+        shm_pipes = []
         for name, info in pipes.items():
             sock = self.socket(zmq.PULL)
             sock.connect('{}://{}:{}'.format(info['dat_protocal'], info['dat_addr'], info['dat_port']))
@@ -376,12 +595,38 @@ class Controller(object):
             self._ipipe_peers.setdefault(name, {})[uid] = PipePeer(info['dat_addr'], info['dat_port'], sock)
             logger.info('Connection established to {}: pipe={}, remote_port={}.'.format(uid, name, info['dat_port']))
 
+            if 'credit_port' in info:
+                if uid not in self._credit_socks:
+                    sock = self.socket(zmq.PUSH)
+                    sock.connect('{}://{}:{}'.format(info['dat_protocal'], info['dat_addr'], info['credit_port']))
+                    self._credit_socks[uid] = sock
+                self._ipipe_credits.setdefault(name, {})[uid] = CreditConsumerState(self._credit_socks[uid])
+
+            if 'shm_name' in info and uid not in self._ipipe_rings.get(name, {}):
+                from .shm_ring import SharedMemoryRing, is_shm_available
+                try:
+                    if not is_shm_available():
+                        raise ValueError('Shared memory is not supported.')
+                    self._ipipe_rings.setdefault(name, {})[uid] = SharedMemoryRing(info['shm_name'])
+                    shm_pipes.append(name)
+                except (OSError, ValueError):
+                    # the hostnames are the same, but the shared memory is not accessible
+                    logger.warning('Failed to attach the shared memory of {}: pipe={}.'.format(uid, name))
+
         self._control_mqueue.put(ControlMessage(self._controller_peers[uid].csock, None, {
             'action': configs.Actions.CTL_CONNECTED_REQ,
-            'uid': self._uid
+            'uid': self._uid,
+            'shm_pipes': shm_pipes
         }, countdown=configs.CTL_CTL_SND_COUNTDOWN))
 
     def _on_ctl_connected_req(self, identifier, msg):
+        uid = msg['uid']
+        for name in msg.get('shm_pipes', []):
+            ring = self._opipe_rings_pending.pop((name, uid), None)
+            if ring is not None:
+                self._opipe_rings.setdefault(name, {})[uid] = ring
+                logger.info('Shared memory enabled for {}: pipe={}.'.format(uid, name))
+
         self._control_mqueue.put(ControlMessage(self._control_router, identifier, {
             'action': configs.Actions.CTL_CONNECTED_REP,
             'uid': self._uid
@@ -416,6 +661,17 @@ class Controller(object):
             if uid in peers:
                 peer = peers.pop(uid)
                 self.close_socket(peer.dsock)
+        for stats in self._opipe_credits.values():
+            stats.pop(uid, None)
+        for states in self._ipipe_credits.values():
+            states.pop(uid, None)
+        if uid in self._credit_socks:
+            self.close_socket(self._credit_socks.pop(uid))
+        for rings in list(self._opipe_rings.values()) + list(self._ipipe_rings.values()):
+            if uid in rings:
+                rings.pop(uid).close()
+        for key in [k for k in self._opipe_rings_pending if k[1] == uid]:
+            self._opipe_rings_pending.pop(key).close()
         self._control_mqueue.put(ControlMessage(self._control_router, identifier, {
             'action': configs.Actions.CTL_NOTIFY_CLOSE_REP,
             'uid': self._uid
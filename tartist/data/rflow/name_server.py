@@ -12,12 +12,13 @@ from ...core.utils.callback import CallbackManager
 
 import zmq
 import time
+import heapq
 import threading
 import queue
 
 logger = get_logger(__file__)
 
-__all__ = ['NameServer']
+__all__ = ['NameServer', 'ReactorNameServer']
 
 
 class NameServerControllerStorage(object):
@@ -138,33 +139,36 @@ class NameServer(object):
                     v = self.storage.get(k)
 
                     if (now - v['last_heartbeat']) > configs.NS_CLEANUP_WAIT:
-                        info, req_sock = self.storage.unregister(k)
-                        self._poller.unregister(req_sock)
-                        utils.graceful_close(req_sock)
-                        self._req_socks.remove(req_sock)
-
-                        # TODO:: use controller's heartbeat
-                        all_peers_to_inform = set()
-                        for i in info['ipipes']:
-                            for j in self.storage.get_opipe(i):
-                                all_peers_to_inform.add(j)
-                        for i in info['opipes']:
-                            for j in self.storage.get_ipipe(i):
-                                all_peers_to_inform.add(j)
-                        print('inform', all_peers_to_inform)
-
-                        for peer in all_peers_to_inform:
-                            self._control_send_queue.put({
-                                'sock': self.storage.get_req_sock(peer),
-                                'countdown': configs.CTL_CTL_SND_COUNTDOWN,
-                                'payload': {
-                                    'action': configs.Actions.CTL_NOTIFY_CLOSE_REQ,
-                                    'uid': k
-                                },
-                            })
-                        logger.info('Unregister timeout controller {}.'.format(k))
+                        self._unregister_controller(k)
             time.sleep(configs.NS_CLEANUP_WAIT)
 
+    def _unregister_controller(self, k):
+        info, req_sock = self.storage.unregister(k)
+        self._poller.unregister(req_sock)
+        utils.graceful_close(req_sock)
+        self._req_socks.remove(req_sock)
+
+        # TODO:: use controller's heartbeat
+        all_peers_to_inform = set()
+        for i in info['ipipes']:
+            for j in self.storage.get_opipe(i):
+                all_peers_to_inform.add(j)
+        for i in info['opipes']:
+            for j in self.storage.get_ipipe(i):
+                all_peers_to_inform.add(j)
+        print('inform', all_peers_to_inform)
+
+        for peer in all_peers_to_inform:
+            self._control_send_queue.put({
+                'sock': self.storage.get_req_sock(peer),
+                'countdown': configs.CTL_CTL_SND_COUNTDOWN,
+                'payload': {
+                    'action': configs.Actions.CTL_NOTIFY_CLOSE_REQ,
+                    'uid': k
+                },
+            })
+        logger.info('Unregister timeout controller {}.'.format(k))
+
     def main(self):
         while True:
             with self._context_lock:
@@ -244,3 +248,119 @@ class NameServer(object):
             utils.router_send_json(self._router, identifier, {
                 'action': configs.Actions.NS_HEARTBEAT_REP
             })
+
+
+class ReactorNameServerStorage(NameServerControllerStorage):
+    """The storage of the ReactorNameServer. Besides the records, it maintains a min-heap of the heartbeat deadlines (with
+    lazy deletion: a refreshed heartbeat just pushes a new entry, and the stale ones are discarded when popped), and a
+    cache of the query results of the output pipes, which is invalidated when the peers of the pipe change."""
+
+    def __init__(self, cleanup_wait=configs.NS_CLEANUP_WAIT):
+        super().__init__()
+        self._cleanup_wait = cleanup_wait
+        self._deadlines = []
+        self._opipe_cache = {}
+
+    def register(self, info, req_sock):
+        super().register(info, req_sock)
+        self.heartbeat(info['uid'])
+
+    def register_pipes(self, info):
+        self._invalidate(self._all_peers[info['uid']]['opipes'])
+        super().register_pipes(info)
+        self._invalidate(info['opipes'])
+
+    def unregister(self, identifier):
+        res = super().unregister(identifier)
+        if res is not None:
+            self._invalidate(res[0]['opipes'])
+        return res
+
+    def _invalidate(self, opipes):
+        for name in opipes:
+            self._opipe_cache.pop(name, None)
+
+    def heartbeat(self, identifier, now=None):
+        record = self._all_peers[identifier]
+        record['last_heartbeat'] = now = now or time.time()
+        heapq.heappush(self._deadlines, (now + self._cleanup_wait, identifier))
+
+    def next_deadline(self):
+        return self._deadlines[0][0] if len(self._deadlines) else None
+
+    def pop_expired(self, now=None):
+        """Pop the controllers whose last heartbeat is older than the cleanup wait, in the order of the deadlines."""
+        now = now or time.time()
+        res = []
+        while len(self._deadlines) and self._deadlines[0][0] <= now:
+            deadline, identifier = heapq.heappop(self._deadlines)
+            record = self._all_peers.get(identifier, None)
+            # discard the stale entries, i.e., the heartbeat has been refreshed or the controller is gone
+            if record is not None and record['last_heartbeat'] + self._cleanup_wait == deadline:
+                res.append(identifier)
+        return res
+
+    def get_opipe_records(self, name):
+        res = self._opipe_cache.get(name, None)
+        if res is None:
+            res = self._opipe_cache[name] = list(map(self.get, self.get_opipe(name)))
+        return res
+
+
+class ReactorNameServer(NameServer):
+    """
+    The name server running as a single-threaded reactor: the storage is owned by the reactor thread, thus no global
+    lock. The poll timeout is given by the earliest heartbeat deadline (kept in a min-heap), instead of polling with a
+    fixed interval and scanning all the controllers in a separate cleanup thread. The query results are served from a
+    cached index of pipe name => controller records. The protocol is the same as the NameServer.
+
+    The mainloop blocks the calling thread until `stop` is called.
+    """
+
+    def __init__(self, host=configs.NS_CTL_HOST, port=configs.NS_CTL_PORT, protocal=configs.NS_CTL_PROTOCAL):
+        super().__init__(host=host, port=port, protocal=protocal)
+        self.storage = ReactorNameServerStorage()
+        self._stop_event = threading.Event()
+
+    def mainloop(self):
+        self.initialize()
+        try:
+            self.main()
+        finally:
+            self.finalize()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def main(self):
+        while not self._stop_event.is_set():
+            socks = dict(self._poller.poll(self._get_poll_timeout()))
+            self._main_do_recv(socks)
+            self._main_do_send()
+            for k in self.storage.pop_expired():
+                self._unregister_controller(k)
+
+    def _get_poll_timeout(self):
+        # retry the pending jobs as soon as possible
+        if self._control_send_queue.qsize() > 0:
+            return 1
+
+        timeout = configs.NS_REACTOR_MAX_WAIT
+        deadline = self.storage.next_deadline()
+        if deadline is not None:
+            timeout = min(timeout, max(deadline - time.time(), 0))
+        return int(timeout * 1000) + 1
+
+    def _on_ns_query_opipe_req(self, identifier, msg):
+        res = {name: self.storage.get_opipe_records(name) for name in msg['ipipes']}
+        utils.router_send_json(self._router, identifier, {
+            'action': configs.Actions.NS_QUERY_OPIPE_REP,
+            'results': res
+        })
+
+    def _on_ns_heartbeat_req(self, identifier, msg):
+        if self.storage.contains(msg['uid']):
+            self.storage.heartbeat(msg['uid'])
+            utils.router_send_json(self._router, identifier, {
+                'action': configs.Actions.NS_HEARTBEAT_REP
+            })
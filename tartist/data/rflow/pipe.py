@@ -34,6 +34,14 @@ class PipeBase(object):
     def set_controller(self, controller):
         self._controller = controller
 
+    @property
+    def bufsize(self):
+        return self._queue.maxsize
+
+    def nr_free(self):
+        """Number of the free slots in the buffer."""
+        return self._queue.maxsize - self._queue.qsize()
+
     def put(self, data):
         self._queue.put(data)
 
@@ -66,5 +74,21 @@ class InputPipe(PipeBase):
 
 
 class OutputPipe(PipeBase):
-    def __init__(self, name, bufsize=10):
+    """
+    The output pipe. The `route` determines how the data are distributed to the consumers (the input pipes of the same
+    name in other controllers):
+
+        - broadcast: each data is sent to all the consumers that are not blocked.
+        - credit: each data is sent to exactly one consumer, the one with the most credit. The consumers advertise
+          their free capacity (credit) to the producer, so that faster consumers receive more data, and slow ones
+          never get a backlog. See Controller.get_peer_stats for the per-consumer statistics.
+    """
+
+    def __init__(self, name, bufsize=10, route='broadcast'):
         super().__init__('OUT', name, bufsize)
+        assert route in ('broadcast', 'credit'), 'Unknown route method: {}.'.format(route)
+        self._route = route
+
+    @property
+    def route(self):
+        return self._route
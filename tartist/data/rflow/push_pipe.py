@@ -8,6 +8,7 @@
 
 
 from . import configs, utils
+from ...core.logger import get_logger
 from ...core.utils.meta import notnone_property
 
 import zmq
@@ -29,12 +30,27 @@ loadb = pickle.loads
 
 __all__ = ['PushPipe', 'PullPipe', 'make_push_pair']
 
+logger = get_logger(__file__)
+
 
 class PullPipe(object):
+    """
+    The pull end of the push-pull pair. The mode can be tcp, ipc or shm. In the shm mode, the pipe creates a
+    SharedMemoryRing for each push end (see new_ring), the payloads are written into the rings, and only the
+    descriptors are sent through the ipc socket.
+    """
+
     def __init__(self, name, mode='tcp'):
+        assert mode in ('tcp', 'ipc', 'shm'), 'Unknown mode: {}.'.format(mode)
+        if mode == 'shm':
+            from .shm_ring import is_shm_available
+            if not is_shm_available(configs.SHM_PUSH_RING_SIZE):
+                logger.warning('Shared memory is not available for push pipe {}, fallback to ipc.'.format(name))
+                mode = 'ipc'
         self._name = name
         self._mode = mode
         self._conn_info = None
+        self._rings = dict()
 
         self._context = zmq.Context()
         self._sock = self._context.socket(zmq.PULL)
@@ -51,12 +67,27 @@ class PullPipe(object):
         if self._mode == 'tcp':
             port = self._sock.bind_to_random_port('tcp://*')
             self._conn_info = 'tcp://{}:{}'.format(utils.get_addr(), port)
-        elif self._mode == 'ipc':
+        elif self._mode in ('ipc', 'shm'):
             self._conn_info = utils.bind_to_random_ipc(self._sock, self._name)
 
     def finalize(self):
         utils.graceful_close(self._sock)
         self._context.term()
+        for ring in self._rings.values():
+            ring.close()
+        self._rings.clear()
+
+    @property
+    def mode(self):
+        return self._mode
+
+    def new_ring(self, size=None):
+        """Create a ring for a push end in the shm mode, return its name."""
+        from .shm_ring import SharedMemoryRing
+        assert self._mode == 'shm'
+        ring = SharedMemoryRing(create=True, size=size or configs.SHM_PUSH_RING_SIZE)
+        self._rings[ring.name] = ring
+        return ring.name
 
     @contextlib.contextmanager
     def activate(self):
@@ -68,15 +99,23 @@ class PullPipe(object):
     
     def recv(self):
         try:
-            return loadb(self._sock.recv(copy=False).bytes)
+            msg = loadb(self._sock.recv(copy=False).bytes)
         except zmq.ContextTerminated:
-            pass
+            return None
+
+        if self._mode == 'shm':
+            ring_name, msg = msg
+            if ring_name is not None:
+                return self._rings[ring_name].load(msg)
+        return msg
 
 
 class PushPipe(object):
-    def __init__(self, conn_info, send_qsize=10):
+    def __init__(self, conn_info, send_qsize=10, shm_name=None):
         self._conn_info = conn_info
         self._send_qsize = send_qsize
+        self._shm_name = shm_name
+        self._ring = None
 
         self._context = None
         self._sock = None
@@ -89,6 +128,9 @@ class PushPipe(object):
         self._sock.set_hwm(2)
         self._sock.connect(self._conn_info)
         self._send_queue = queue.Queue(maxsize=self._send_qsize)
+        if self._shm_name is not None:
+            from .shm_ring import SharedMemoryRing
+            self._ring = SharedMemoryRing(self._shm_name, min_size=configs.SHM_MIN_SIZE)
 
         self._send_thread = threading.Thread(target=self.mainloop_send, daemon=True)
         self._send_thread.start()
@@ -96,6 +138,8 @@ class PushPipe(object):
     def finalize(self):
         utils.graceful_close(self._sock)
         self._context.term()
+        if self._ring is not None:
+            self._ring.close()
 
     @contextlib.contextmanager
     def activate(self):
@@ -109,6 +153,10 @@ class PushPipe(object):
         try:
             while True:
                 job = self._send_queue.get()
+                if self._ring is not None:
+                    desc = self._ring.dump(job)
+                    # send inline if the ring is full
+                    job = (self._shm_name, desc) if desc is not None else (None, job)
                 self._sock.send(dumpb(job), copy=False)
         except zmq.ContextTerminated:
             pass
@@ -122,7 +170,8 @@ def make_push_pair(name, nr_workers=None, mode='tcp', send_qsize=10):
     pull = PullPipe(name, mode=mode)
     pull.initialize()
     nr_pushs = nr_workers or 1
-    pushs = [PushPipe(pull.conn_info, send_qsize=send_qsize) for i in range(nr_pushs)]
+    pushs = [PushPipe(pull.conn_info, send_qsize=send_qsize, shm_name=pull.new_ring() if pull.mode == 'shm' else None)
+             for i in range(nr_pushs)]
 
     if nr_workers is None:
         return pull, pushs[0]
@@ -13,7 +13,9 @@ from ...core.utils.callback import CallbackManager
 from ...core.utils.meta import notnone_property
 
 import zmq
+import itertools
 import threading
+import time
 import queue
 import contextlib
 import collections
@@ -31,10 +33,35 @@ loadb = pickle.loads
 
 logger = get_logger(__file__)
 
-__all__ = ['QueryMessage', 'QueryRepPipe', 'QueryReqPipe']
+__all__ = ['QueryMessage', 'QueryRepPipe', 'QueryReqPipe', 'QueryFuture']
 
 QueryMessage = collections.namedtuple('QueryMessage', ['identifier', 'payload'])
 
+
+class _RoutedIdentifier(bytes):
+    """The identifier of a query carrying a request id. It equals (and hashes as) the plain identity of the requester,
+    so that the handlers can still use it as the key of per-requester states, while the reply can be routed to the
+    socket of the requester (`route`) and matched with the request (`request_id`)."""
+
+    route = None
+    request_id = None
+
+    @classmethod
+    def make(cls, identity, route, request_id):
+        self = cls(identity)
+        self.route = route
+        self.request_id = request_id
+        return self
+
+
+def _encode_request_id(rid):
+    return rid.to_bytes(8, 'little')
+
+
+def _decode_request_id(buf):
+    return int.from_bytes(buf, 'little')
+
+
 class QueryRepPipe(object):
     def __init__(self, name, send_qsize=0, mode='ipc'):
         self._name = name
@@ -46,6 +73,10 @@ class QueryRepPipe(object):
         self._frsock = self._context.socket(zmq.PULL)
         self._tosock.set_hwm(10)
         self._frsock.set_hwm(10)
+        # block on the HWM instead of silently dropping the replies, since a requester may have many pending queries
+        self._tosock.setsockopt(zmq.ROUTER_MANDATORY, 1)
+        self._tosock.setsockopt(zmq.LINGER, 0)
+        self._frsock.setsockopt(zmq.LINGER, 0)
         self._dispatcher = CallbackManager()
 
         self._send_queue = queue.Queue(maxsize=send_qsize)
@@ -79,8 +110,9 @@ class QueryRepPipe(object):
         self._snd_thread.start()
 
     def finalize(self):
-        utils.graceful_close(self._tosock)
-        utils.graceful_close(self._frsock)
+        # zmq sockets are not thread-safe, so the sockets are closed by their own threads: the recv thread is
+        # interrupted by the context termination, and the send thread is woken up by an empty job
+        self._send_queue.put(None)
         self._context.term()
 
     @contextlib.contextmanager
@@ -98,7 +130,11 @@ class QueryRepPipe(object):
                     break
 
                 msg = loadb(self._frsock.recv(copy=False).bytes)
-                identifier, type, payload = msg
+                if len(msg) == 4:
+                    identity, type, payload, (route, rid) = msg
+                    identifier = _RoutedIdentifier.make(identity, route, rid)
+                else:
+                    identifier, type, payload = msg
                 self._dispatcher.dispatch(type, self, identifier, payload)
         except zmq.ContextTerminated:
             pass
@@ -107,7 +143,8 @@ class QueryRepPipe(object):
                 logger.warn('Recv socket closed unexpectedly.')
             else:
                 raise e
-
+        finally:
+            self._frsock.close()
 
     def mainloop_send(self):
         try:
@@ -116,7 +153,24 @@ class QueryRepPipe(object):
                     break
 
                 job = self._send_queue.get()
-                self._tosock.send_multipart([job.identifier, dumpb(job.payload)], copy=False)
+                if job is None:
+                    break
+                if isinstance(job.identifier, _RoutedIdentifier):
+                    frames = [job.identifier.route, dumpb(job.payload), _encode_request_id(job.identifier.request_id)]
+                else:
+                    frames = [job.identifier, dumpb(job.payload)]
+                # the requester may be still connecting
+                for countdown in range(configs.QUERY_REP_COUNTDOWN, -1, -1):
+                    try:
+                        self._tosock.send_multipart(frames, copy=False)
+                        break
+                    except zmq.ZMQError as e:
+                        if e.errno != zmq.EHOSTUNREACH:
+                            raise
+                        if countdown == 0:
+                            logger.warn('Drop the reply to the unreachable requester: {}.'.format(frames[0]))
+                        else:
+                            time.sleep(0.1)
         except zmq.ContextTerminated:
             pass
         except zmq.ZMQError as e:
@@ -124,23 +178,108 @@ class QueryRepPipe(object):
                 logger.warn('Send socket closed unexpectedly.')
             else:
                 raise e
+        finally:
+            self._tosock.close()
 
     def send(self, identifier, msg):
         self._send_queue.put(QueryMessage(identifier, msg))
 
 
+class QueryFuture(object):
+    """The pending result of a query made by QueryReqPipe.query_async."""
+
+    def __init__(self, pipe, request_id, message, timeout, retries):
+        self._pipe = pipe
+        self._request_id = request_id
+        self._message = message
+        self._timeout = timeout
+        self._retries = retries
+        self._deadline = None if timeout is None else time.time() + timeout
+        self._result = None
+        self._done = False
+
+    @property
+    def request_id(self):
+        return self._request_id
+
+    def done(self):
+        return self._done
+
+    def set_result(self, result):
+        self._result = result
+        self._done = True
+
+    def result(self, timeout=None):
+        """
+        Wait for the reply, while dispatching the replies of other pending queries of the pipe. If the pipe is
+        configured with a timeout and the reply does not arrive in time, the request will be resent (with the same
+        request id) for at most `retries` times before raising TimeoutError.
+
+        :param timeout: Additional timeout of this call, raise TimeoutError without resending when exceeded.
+        """
+        call_deadline = None if timeout is None else time.time() + timeout
+        while not self._done:
+            now = time.time()
+            if call_deadline is not None and now >= call_deadline:
+                raise TimeoutError('Query {} timed out.'.format(self._request_id))
+            if self._deadline is not None and now >= self._deadline:
+                if self._retries <= 0:
+                    self._pipe._discard(self._request_id)
+                    raise TimeoutError('Query {} timed out after retries.'.format(self._request_id))
+                self._retries -= 1
+                self._deadline = now + self._timeout
+                self._pipe._resend(self._message)
+
+            deadlines = [d for d in (call_deadline, self._deadline) if d is not None]
+            self._pipe.poll(None if len(deadlines) == 0 else max(min(deadlines) - now, 0), until=self)
+        return self._result
+
+
 class QueryReqPipe(object):
-    def __init__(self, name, conn_info):
+    """
+    The requester of QueryRepPipe. Besides the synchronous `query`, `query_async` returns a QueryFuture immediately,
+    so that many queries can be outstanding over the same sockets: each query carries a request id, which is sent back
+    with the reply to resolve the corresponding future. The replies are received by whoever is waiting for a future
+    (or calling `poll`), so no background thread is involved. For example, a process can drive many environments::
+
+        futures = [req.query_async('data', (env.current_state, ), identity='player-{}'.format(i))
+                   for i, env in enumerate(envs)]
+        for env, future in zip(envs, futures):
+            env.action(future.result())
+
+    The `identity` tells the replier the logical requester of the query (defaults to the name of the pipe). The
+    timeout/retry policy resends the requests that are not replied in time; as the replier may handle a request
+    multiple times, it should only be used for idempotent queries.
+    """
+
+    def __init__(self, name, conn_info, timeout=None, retries=0):
+        """
+        :param name: The name of the pipe, also the identity of its sockets.
+        :param conn_info: The connection info of the QueryRepPipe.
+        :param timeout: The default timeout (in seconds) of a single attempt of the queries, None for no timeout.
+        :param retries: The default number of resending when timed out.
+        """
         self._name = name
         self._conn_info = conn_info
         self._context = None
         self._tosock = None
         self._frsock = None
 
+        self._timeout = timeout
+        self._retries = retries
+        self._request_ids = itertools.count()
+        self._pending = dict()
+        self._send_lock = threading.Lock()
+        self._recv_lock = threading.Lock()
+
     @property
     def identity(self):
         return self._name.encode('utf-8')
 
+    @property
+    def nr_pending(self):
+        return len(self._pending)
+
     def initialize(self):
         self._context = zmq.Context()
         self._tosock = self._context.socket(zmq.PUSH)
@@ -165,7 +304,79 @@ class QueryReqPipe(object):
             self.finalize()
 
     def query(self, type, inp, do_recv=True):
-        self._tosock.send(dumpb((self.identity, type, inp)), copy=False)
-        if do_recv:
-            out = loadb(self._frsock.recv(copy=False).bytes)
-            return out
+        if not do_recv:
+            with self._send_lock:
+                self._tosock.send(dumpb((self.identity, type, inp)), copy=False)
+            return None
+        return self.query_async(type, inp).result()
+
+    def query_async(self, type, inp, identity=None, timeout=None, retries=None):
+        """
+        Send a query without waiting for the reply.
+
+        :param type: The type of the query.
+        :param inp: The payload of the query.
+        :param identity: The logical identity of the requester, defaults to the name of the pipe.
+        :param timeout: Override the default timeout of the pipe.
+        :param retries: Override the default number of retries of the pipe.
+        :return: A QueryFuture.
+        """
+        if identity is None:
+            identity = self.identity
+        elif isinstance(identity, str):
+            identity = identity.encode('utf-8')
+        timeout = self._timeout if timeout is None else timeout
+        retries = self._retries if retries is None else retries
+
+        rid = next(self._request_ids)
+        message = dumpb((identity, type, inp, (self.identity, rid)))
+        future = QueryFuture(self, rid, message, timeout, retries)
+        self._pending[rid] = future
+        self._resend(message)
+        return future
+
+    def poll(self, timeout=0, until=None):
+        """
+        Receive the replies and resolve the corresponding futures.
+
+        :param timeout: The time (in seconds) to wait for the first reply, None for blocking.
+        :param until: Stop after the future is resolved; otherwise stop when no reply is immediately available.
+        :return: Number of the resolved futures.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        if not self._recv_lock.acquire(timeout=-1 if timeout is None else timeout):
+            return 0
+
+        nr_resolved = 0
+        try:
+            while until is None or not until.done():
+                if deadline is None:
+                    wait = -1
+                else:
+                    wait = max(int((deadline - time.time()) * 1000), 0)
+                if nr_resolved > 0 and until is None:
+                    wait = 0
+                if not self._frsock.poll(wait):
+                    break
+
+                frames = self._frsock.recv_multipart(copy=False)
+                if len(frames) != 2:
+                    # the reply to a query sent with do_recv=False carries no request id, and nobody waits for it
+                    logger.debug('Drop the reply without request id ({} frames).'.format(len(frames)))
+                    continue
+                payload, rid = frames
+                future = self._pending.pop(_decode_request_id(rid.bytes), None)
+                # the future may be discarded (timed out), or already resolved by a duplicated reply
+                if future is not None:
+                    future.set_result(loadb(payload.bytes))
+                    nr_resolved += 1
+        finally:
+            self._recv_lock.release()
+        return nr_resolved
+
+    def _resend(self, message):
+        with self._send_lock:
+            self._tosock.send(message, copy=False)
+
+    def _discard(self, request_id):
+        self._pending.pop(request_id, None)
@@ -0,0 +1,186 @@
+# -*- coding:utf8 -*-
+# File   : shm_ring.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+import os
+import os.path as osp
+import pickle
+import uuid
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # python < 3.8
+    shared_memory = None
+
+__all__ = ['SharedMemoryRing', 'is_shm_available']
+
+_HEADER_SIZE = 64
+
+
+class SharedMemoryRing(object):
+    """
+    A single-producer single-consumer ring buffer of pickled objects, in the shared memory of the same host. The
+    payloads are written into the ring, and only the (small) descriptors need to be sent to the consumer, for
+    example, through zmq sockets. The consumer must load the descriptors in the order they are dumped.
+
+    The objects are pickled with protocol 5, so that the contiguous buffers (e.g., the data of nd arrays) are copied
+    into the ring directly (out-of-band), and copied out when loaded, i.e., one memcpy at each side.
+
+    The position of the producer is local, and the consumer publishes its position in the header of the shared memory.
+    Positions are monotonic byte counters: a payload that does not fit at the end of the ring is written at the
+    beginning, and the skipped bytes are released along with it. Payloads smaller than `min_size` (estimated by the
+    size of the nd arrays and bytes in it, before pickling) are rejected as if the ring is full, since sending them
+    inline is cheaper.
+
+        ring = SharedMemoryRing(create=True, size=size)  # producer
+        desc = ring.dump(obj)  # None if the ring is full, send obj inline instead
+        ...
+        ring = SharedMemoryRing(name)  # consumer
+        obj = ring.load(desc)
+    """
+
+    def __init__(self, name=None, create=False, size=0, min_size=0):
+        if create:
+            name = name or 'tart-{}'.format(uuid.uuid4().hex[:16])
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_SIZE + size)
+        else:
+            self._shm = _attach_shared_memory(name)
+        self._owner = create
+        self._min_size = min_size
+        self._capacity = self._shm.size - _HEADER_SIZE
+        self._buf = self._shm.buf
+        self._data = self._buf[_HEADER_SIZE:]
+        # the position of the consumer
+        self._tail = self._buf[:8].cast('Q')
+        if create:
+            self._tail[0] = 0
+        # the position of the producer
+        self._head = 0
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def nr_used(self):
+        return self._head - self._tail[0]
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._tail.release()
+        self._data.release()
+        self._buf = self._data = self._tail = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+    def _reserve(self, size):
+        start = self._head
+        offset = start % self._capacity
+        if offset + size > self._capacity:
+            start += self._capacity - offset
+        if start + size - self._tail[0] > self._capacity:
+            return None
+        return start
+
+    def dump(self, obj):
+        """Write obj into the ring, return the descriptor, or None if the ring does not have enough space (or obj is
+        smaller than the min_size)."""
+        if self._min_size > 0 and _estimate_nbytes(obj, self._min_size) < self._min_size:
+            return None
+
+        buffers = []
+
+        def callback(buf):
+            try:
+                buffers.append(buf.raw())
+                return False
+            except BufferError:
+                # non-contiguous, pickle it in-band
+                return True
+
+        chunks = [memoryview(pickle.dumps(obj, protocol=5, buffer_callback=callback))] + buffers
+        sizes = [c.nbytes for c in chunks]
+        start = self._reserve(sum(sizes))
+        if start is None:
+            return None
+
+        offset = start % self._capacity
+        for c in chunks:
+            self._data[offset:offset + c.nbytes] = c
+            offset += c.nbytes
+        self._head = start + sum(sizes)
+        return start, sizes
+
+    def rollback(self, desc):
+        """Cancel the last dump, when its descriptor can not be sent."""
+        start, sizes = desc
+        assert self._head == start + sum(sizes), 'Only the last dump can be cancelled.'
+        self._head = start
+
+    def load(self, desc):
+        """Read the object of the descriptor from the ring, and release the space."""
+        start, sizes = desc
+        offset = start % self._capacity
+        chunks = []
+        for size in sizes:
+            chunks.append(bytearray(self._data[offset:offset + size]))
+            offset += size
+        self._tail[0] = start + sum(sizes)
+        return pickle.loads(chunks[0], buffers=chunks[1:])
+
+
+def is_shm_available(size=0):
+    """Whether the shared memory transport is supported (python >= 3.8), and /dev/shm (if exists) has `size` bytes
+    free. A ring larger than the free space causes a SIGBUS when it is written, instead of an error."""
+    if shared_memory is None or pickle.HIGHEST_PROTOCOL < 5:
+        return False
+    if size > 0 and osp.isdir('/dev/shm'):
+        stat = os.statvfs('/dev/shm')
+        return stat.f_bavail * stat.f_frsize >= size
+    return True
+
+
+def _estimate_nbytes(obj, limit):
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, dict):
+        obj = obj.values()
+    elif not isinstance(obj, (tuple, list)):
+        return 0
+
+    res = 0
+    for i, v in enumerate(obj):
+        # long sequences are considered large, to bound the cost of the estimation
+        if i >= 64:
+            return limit
+        res += _estimate_nbytes(v, limit)
+        if res >= limit:
+            break
+    return res
+
+
+def _attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # python < 3.13 always tracks the attached shared memory (and unlinks it at exit if the resource tracker is not
+        # shared with the producer), see the unlink in SharedMemoryRing.close
+        return shared_memory.SharedMemory(name=name)
@@ -100,6 +100,10 @@ def uid():
     return socket.gethostname() + '/' + uuid.uuid4().hex
 
 
+def is_same_host(uid1, uid2):
+    return uid1.split('/')[0] == uid2.split('/')[0]
+
+
 def graceful_close(sock):
     if sock is None:
         return
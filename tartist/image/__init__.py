@@ -9,5 +9,6 @@
 
 from .codecs import *
 from .imgproc import *
+from .lut import *
 from .visualize import *
 from . import aug, rect
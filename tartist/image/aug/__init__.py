@@ -8,6 +8,7 @@
 
 from . import cblk
 from .base import *
+from .batch import *
 from .executor import *
 from .shape import *
 from .photography import *
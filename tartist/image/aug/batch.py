@@ -0,0 +1,184 @@
+# -*- coding:utf8 -*-
+# File   : batch.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+"""
+Batched variants of the augmentors in shape.py and photography.py. All functions take a batch of images in the
+shape of [N, H, W, C] and draw the per-sample random parameters in one call. The photometric augmentors are applied
+vectorized across the batch in float32 (and return float32 batches); the geometric ones copy the per-sample windows
+into a preallocated output batch.
+"""
+
+from .. import imgproc
+from ...core.utils.shape import get_2dshape
+from ... import random
+import itertools
+import numpy as np
+
+__all__ = [
+    'batch_random_crop',
+    'batch_random_size_crop',
+    'batch_horizontal_flip_augment',
+    'batch_grayscale',
+    'batch_brightness_augment', 'batch_contrast_augment', 'batch_saturation_augment',
+    'batch_color_augment_pack',
+    'batch_lighting_augment'
+]
+
+_grayscale_weights = np.array([0.114, 0.587, 0.299], dtype='float32')
+
+
+def _as_float_batch(imgs):
+    assert imgs.ndim == 4, 'Image batch should be of shape [N, H, W, C].'
+    return imgs.astype('float32', copy=False)
+
+
+def _draw_alpha(n, val):
+    return (1. + val * (random.rand(n) * 2 - 1)).astype('float32')
+
+
+def batch_random_crop(imgs, target_shape):
+    """random crop each image in the batch (at different positions). output size is target_shape"""
+    target_shape = get_2dshape(target_shape)
+    n, h, w = imgs.shape[:3]
+    rest = h - target_shape[0], w - target_shape[1]
+    assert rest[0] >= 0 and rest[1] >= 0
+
+    sy = random.randint(rest[0] + 1, size=n)
+    sx = random.randint(rest[1] + 1, size=n)
+
+    # Slice copies into the preallocated output are much faster than a 3-D fancy-indexing gather.
+    output = np.empty((n, ) + target_shape + imgs.shape[3:], dtype=imgs.dtype)
+    for i in range(n):
+        output[i] = imgs[i, sy[i]:sy[i] + target_shape[0], sx[i]:sx[i] + target_shape[1]]
+    return output
+
+
+def batch_random_size_crop(imgs, target_shape, area_range, aspect_ratio=None, *, nr_trial=10):
+    """batched version of shape.random_size_crop, the crop parameters of all trials for all images are drawn at once,
+    while the resizing is done image by image"""
+
+    target_shape = get_2dshape(target_shape)
+    n, h, w = imgs.shape[:3]
+    area = h * w
+    area_range = tuple(area_range) if isinstance(area_range, (tuple, list)) else (area_range, 1)
+
+    if aspect_ratio is None:
+        aspect_ratio = [h / w]
+    aspect_ratio = np.array(aspect_ratio, dtype='float64')
+
+    target_area = random.uniform(area_range[0], area_range[1], size=(nr_trial, n)) * area
+    target_ar = aspect_ratio[random.randint(len(aspect_ratio), size=(nr_trial, n))]
+    nw = np.round(np.sqrt(target_area * target_ar)).astype('int64')
+    nh = np.round(np.sqrt(target_area / target_ar)).astype('int64')
+    swap = random.rand(nr_trial, n) < 0.5
+    nh, nw = np.where(swap, nw, nh), np.where(swap, nh, nw)
+
+    valid = (nh <= h) & (nw <= w) & (nh > 0) & (nw > 0)
+    trial = valid.argmax(axis=0)
+    found = valid[trial, np.arange(n)]
+    nh, nw = nh[trial, np.arange(n)], nw[trial, np.arange(n)]
+    sy = (random.rand(n) * (h - nh + 1)).astype('int64')
+    sx = (random.rand(n) * (w - nw + 1)).astype('int64')
+
+    output = np.empty((n, ) + target_shape + imgs.shape[3:], dtype=imgs.dtype)
+    for i in range(n):
+        if found[i]:
+            img = imgs[i, sy[i]:sy[i] + nh[i], sx[i]:sx[i] + nw[i]]
+            img = imgproc.resize(img, target_shape)
+        else:
+            scale = min(*target_shape) / min(h, w)
+            img = imgproc.center_crop(imgproc.resize_scale(imgs[i], scale), target_shape)
+        output[i] = img.reshape(output.shape[1:])
+    return output
+
+
+def batch_horizontal_flip_augment(imgs, prob):
+    mask = random.rand(imgs.shape[0]) < prob
+    if not mask.any():
+        return imgs
+    output = np.empty_like(imgs)
+    for i in range(imgs.shape[0]):
+        output[i] = imgs[i, :, ::-1] if mask[i] else imgs[i]
+    return output
+
+
+def batch_grayscale(imgs):
+    imgs = _as_float_batch(imgs)
+    assert imgs.shape[3] == 3
+    return np.dot(imgs, _grayscale_weights)[..., np.newaxis]
+
+
+def _batch_brightness(imgs, alpha):
+    return imgproc.clip(imgs * alpha.reshape(-1, 1, 1, 1))
+
+
+def _batch_contrast(imgs, alpha):
+    alpha = alpha.reshape(-1, 1, 1, 1)
+    mean = np.dot(imgs.mean(axis=(1, 2)), _grayscale_weights).reshape(-1, 1, 1, 1)
+    return imgproc.clip(imgs * alpha + mean * (1 - alpha))
+
+
+def _batch_saturation(imgs, alpha):
+    alpha = alpha.reshape(-1, 1, 1, 1)
+    return imgproc.clip(imgs * alpha + batch_grayscale(imgs) * (1 - alpha))
+
+
+def batch_brightness_augment(imgs, val):
+    imgs = _as_float_batch(imgs)
+    return _batch_brightness(imgs, _draw_alpha(imgs.shape[0], val))
+
+
+def batch_contrast_augment(imgs, val):
+    imgs = _as_float_batch(imgs)
+    return _batch_contrast(imgs, _draw_alpha(imgs.shape[0], val))
+
+
+def batch_saturation_augment(imgs, val):
+    imgs = _as_float_batch(imgs)
+    return _batch_saturation(imgs, _draw_alpha(imgs.shape[0], val))
+
+
+_color_augment_permutations = list(itertools.permutations(range(3)))
+
+
+def batch_color_augment_pack(imgs, brightness, contrast, saturation):
+    """batched version of photography.color_augment_pack, each image gets its own (random) order of the augmentors;
+    images sharing the same order are processed together"""
+    imgs = _as_float_batch(imgs)
+    n = imgs.shape[0]
+
+    funcs = (_batch_brightness, _batch_contrast, _batch_saturation)
+    alphas = [_draw_alpha(n, val) for val in (brightness, contrast, saturation)]
+    orders = random.randint(len(_color_augment_permutations), size=n)
+
+    output = np.empty_like(imgs)
+    for o in np.unique(orders):
+        inds = np.where(orders == o)[0]
+        sub = imgs[inds]
+        for f in _color_augment_permutations[o]:
+            sub = funcs[f](sub, alphas[f][inds])
+        output[inds] = sub
+    return output
+
+
+def batch_lighting_augment(imgs, std, eigval=None, eigvec=None):
+    if eigval is None:
+        eigval = np.array([0.2175, 0.0188, 0.0045])
+    if eigvec is None:
+        eigvec = np.array([
+            [-0.5836, -0.6948, 0.4203],
+            [-0.5808, -0.0045, -0.8140],
+            [-0.5675, 0.7192, 0.4009]
+        ])
+    imgs = _as_float_batch(imgs)
+    if std == 0:
+        return imgs
+
+    alpha = random.randn(imgs.shape[0], 3) * std
+    bgr = (eigvec[np.newaxis] * alpha[:, np.newaxis, :] * eigval.reshape(1, 1, 3)).sum(axis=2)
+    return imgs + bgr.reshape(-1, 1, 1, 3).astype('float32')
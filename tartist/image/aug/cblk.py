@@ -9,6 +9,7 @@
 from .. import imgproc
 from . import shape as shape_augment
 from . import photography as photography_augment
+from . import batch as batch_augment
 
 
 def fbaug(img, target_shape=(224, 224), full_shape=(256, 256), is_train=True):
@@ -26,3 +27,13 @@ def fbaug(img, target_shape=(224, 224), full_shape=(256, 256), is_train=True):
 
         # 2. center crop 224x244 patch from the image
         return imgproc.center_crop(img, target_shape)
+
+
+def batch_fbaug(imgs, target_shape=(224, 224)):
+    """batched version of fbaug (training mode), imgs should be of shape [N, H, W, C]"""
+    imgs = batch_augment.batch_random_size_crop(imgs, target_shape, area_range=0.08, aspect_ratio=[3/4, 4/3])
+    imgs = batch_augment.batch_color_augment_pack(imgs, brightness=0.4, contrast=0.4, saturation=0.4)
+    imgs = batch_augment.batch_lighting_augment(imgs, 0.1)
+    imgs = batch_augment.batch_horizontal_flip_augment(imgs, 0.5)
+    imgs = imgproc.clip(imgs).astype('uint8')
+    return imgs
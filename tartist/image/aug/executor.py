@@ -40,6 +40,16 @@ class ImageAugmentorExecutor(AugmentorExecutorBase):
         return img
 
 
+class BatchImageAugmentorExecutor(AugmentorExecutorBase):
+    """Executor for the batched augmentors (see batch.py), the input is a batch of images in the shape of
+    [N, H, W, C], and the random order (if enabled) is shared by the whole batch."""
+
+    def _augment(self, augmentors, imgs):
+        for f in augmentors:
+            imgs = f(imgs)
+        return imgs
+
+
 class ImageCoordAugmentorExecutor(AugmentorExecutorBase):
     def _augment(self, augmentors, img, coord=None):
         original_coord = coord
@@ -7,12 +7,13 @@
 # This file is part of TensorArtist.
 
 from .. import imgproc
+from ..lut import ColorLUTTransform
 from ... import random
 import numpy as np
 
 __all__ = [
     'grayscale_augment',
-    'brightness_augment', 'contrast_augment', 'saturation_augment',
+    'brightness_augment', 'contrast_augment', 'saturation_augment', 'gamma_augment',
     'color_augment_pack',
     'lighting_augment'
 ]
@@ -24,30 +25,65 @@ def grayscale_augment(img, prob=0.5):
     return img
 
 
-def brightness_augment(img, val):
-    alpha = 1. + val * (random.rand() * 2 - 1)
+def _draw_alpha(val):
+    return 1. + val * (random.rand() * 2 - 1)
+
+
+def _use_lut(img, use_lut):
+    if use_lut is None:
+        return img.dtype == np.uint8
+    return use_lut
+
+
+def brightness_augment(img, val, use_lut=None):
+    alpha = _draw_alpha(val)
+    if _use_lut(img, use_lut):
+        return ColorLUTTransform().brightness(alpha)(img)
     return imgproc.brightness(img, alpha)
 
 
-def contrast_augment(img, val):
-    alpha = 1. + val * (random.rand() * 2 - 1)
+def contrast_augment(img, val, use_lut=None):
+    alpha = _draw_alpha(val)
+    if _use_lut(img, use_lut):
+        return ColorLUTTransform().contrast(alpha)(img)
     return imgproc.contrast(img, alpha)
 
 
-def saturation_augment(img, val):
-    alpha = 1. + val * (random.rand() * 2 - 1)
+def saturation_augment(img, val, use_lut=None):
+    alpha = _draw_alpha(val)
+    if _use_lut(img, use_lut):
+        return ColorLUTTransform().saturation(alpha)(img)
     return imgproc.saturation(img, alpha)
 
 
-def color_augment_pack(img, brightness, contrast, saturation):
+def gamma_augment(img, val, use_lut=None):
+    gamma = _draw_alpha(val)
+    if _use_lut(img, use_lut):
+        return ColorLUTTransform().gamma(gamma)(img)
+    return imgproc.gamma(img, gamma)
+
+
+def color_augment_pack(img, brightness, contrast, saturation, use_lut=None):
+    """
+    Apply brightness, contrast and saturation augmentation in a random order. For uint8 images (or if use_lut is
+    True), the augmentors are composed by ColorLUTTransform and the output is uint8, otherwise they are applied in
+    float one after another.
+    """
     augmentors = list(zip(
-        (brightness_augment, contrast_augment, saturation_augment),
+        ('brightness', 'contrast', 'saturation'),
         (brightness, contrast, saturation)
     ))
     random.shuffle(augmentors)
 
-    for f, val in augmentors:
-        img = f(img, val)
+    if _use_lut(img, use_lut):
+        transform = ColorLUTTransform()
+        for name, val in augmentors:
+            getattr(transform, name)(_draw_alpha(val))
+        return transform(img)
+
+    funcs = dict(brightness=imgproc.brightness, contrast=imgproc.contrast, saturation=imgproc.saturation)
+    for name, val in augmentors:
+        img = funcs[name](img, _draw_alpha(val))
     return img
 
 
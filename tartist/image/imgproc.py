@@ -25,7 +25,7 @@ __all__ = [
     'dimshuffle',
     'clip', 'clip_decorator',
     'grayscale', 
-    'brightness', 'contrast', 'saturation'
+    'brightness', 'contrast', 'saturation', 'gamma'
 ]
 
 
@@ -206,3 +206,8 @@ def saturation(img, alpha):
     gs = grayscale(img)
     img = img * alpha + gs * (1 - alpha)
     return img
+
+
+@clip_decorator
+def gamma(img, gamma):
+    return 255 * (np.asarray(img, dtype='float64') / 255) ** gamma
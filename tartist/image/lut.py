@@ -0,0 +1,175 @@
+# -*- coding:utf8 -*-
+# File   : lut.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+"""
+Integer color transforms for uint8 images. Per-pixel ops (brightness, contrast and gamma) are composed into a single
+256-entry lookup table per channel, thus a chain of such ops costs one table lookup per pixel without any float buffer
+of the image size. The saturation op mixes the channels, and is done by a fused integer path.
+"""
+
+from ._backend import cv2
+import numpy as np
+
+__all__ = [
+    'apply_lut', 'ColorLUTTransform',
+    'lut_brightness', 'lut_contrast', 'lut_gamma', 'lut_saturation'
+]
+
+_grayscale_weights = np.array([0.114, 0.587, 0.299])
+# fixed-point (8 bits) version of the grayscale weights, sum to 256.
+_grayscale_weights_int = np.array([29, 150, 77], dtype='int32')
+
+
+def _get_grayscale_weights(nr_channels):
+    if nr_channels == 1:
+        return np.ones(1)
+    assert nr_channels == 3
+    return _grayscale_weights
+
+
+def apply_lut(img, lut):
+    """
+    Apply the lookup table to an uint8 image.
+
+    :param img: The image, of shape [H, W] or [H, W, C], dtype uint8.
+    :param lut: The lookup table, of shape [256] (shared by all channels) or [C, 256], dtype uint8.
+    :return: The transformed image.
+    """
+    assert img.dtype == np.uint8, 'apply_lut only supports uint8 images.'
+    lut = np.asarray(lut, dtype='uint8')
+    if lut.ndim == 1 or img.ndim == 2:
+        lut = lut.reshape(-1, 256)[0]
+        if cv2 is not None:
+            return cv2.LUT(img, lut).reshape(img.shape)
+        return np.take(lut, img)
+
+    assert lut.shape[0] == img.shape[2], 'Number of channels mismatched: {} vs {}.'.format(lut.shape, img.shape)
+    if cv2 is not None and img.shape[2] in (1, 3, 4):
+        return cv2.LUT(img, np.ascontiguousarray(lut.T).reshape(256, 1, -1)).reshape(img.shape)
+
+    output = np.empty_like(img)
+    for c in range(img.shape[2]):
+        np.take(lut[c], img[:, :, c], out=output[:, :, c])
+    return output
+
+
+def _saturation_uint8(img, alpha):
+    assert img.ndim == 3
+    if img.shape[2] == 1:
+        return img
+    assert img.shape[2] == 3
+
+    if cv2 is not None:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        return cv2.addWeighted(img, alpha, cv2.merge([gray, gray, gray]), 1 - alpha, 0)
+
+    # fixed-point arithmetic: out = (img * a + gray * (256 - a)) / 256
+    a = int(round(alpha * 256))
+    gray = (np.dot(img, _grayscale_weights_int) + 128) >> 8
+    output = img.astype('int32') * a
+    output += (gray * (256 - a) + 128)[:, :, np.newaxis]
+    output >>= 8
+    return np.clip(output, 0, 255, out=output).astype('uint8')
+
+
+class ColorLUTTransform(object):
+    """
+    A chain of color transforms on uint8 images. Consecutive brightness/contrast/gamma ops are composed into one
+    lookup table per channel (computed in float on the 256 entries, and rounded once), while saturation ops are
+    applied by the fused integer path. The mean intensity required by contrast is computed from the channel histograms,
+    so it is exact w.r.t. the preceding ops in the same table. A typical usage is::
+
+        transform = ColorLUTTransform().brightness(1.2).contrast(0.8).saturation(1.1)
+        img = transform(img)
+
+    """
+
+    def __init__(self):
+        self._ops = []
+
+    def brightness(self, alpha):
+        self._ops.append(('brightness', alpha))
+        return self
+
+    def contrast(self, alpha):
+        self._ops.append(('contrast', alpha))
+        return self
+
+    def gamma(self, gamma):
+        self._ops.append(('gamma', gamma))
+        return self
+
+    def saturation(self, alpha):
+        self._ops.append(('saturation', alpha))
+        return self
+
+    def __call__(self, img):
+        assert img.dtype == np.uint8, 'ColorLUTTransform only supports uint8 images.'
+        squeeze = img.ndim == 2
+        if squeeze:
+            img = img[:, :, np.newaxis]
+        nr_channels = img.shape[2]
+
+        table, hists = None, None
+        for op, v in self._ops:
+            if op == 'saturation':
+                if table is not None:
+                    img = apply_lut(img, self._quantize(table))
+                    table, hists = None, None
+                img = _saturation_uint8(img, v)
+                continue
+
+            if table is None:
+                table = np.tile(np.arange(256, dtype='float64'), (nr_channels, 1))
+
+            if op == 'brightness':
+                table = np.clip(table * v, 0, 255)
+            elif op == 'gamma':
+                table = np.clip(255 * (table / 255) ** v, 0, 255)
+            elif op == 'contrast':
+                if hists is None:
+                    hists = self._get_histograms(img)
+                means = (hists * table).sum(axis=1) / max(hists[0].sum(), 1)
+                mean = np.dot(_get_grayscale_weights(nr_channels), means)
+                table = np.clip(table * v + mean * (1 - v), 0, 255)
+            else:
+                raise ValueError('Unknown color transform: {}.'.format(op))
+
+        if table is not None:
+            img = apply_lut(img, self._quantize(table))
+        if squeeze:
+            img = img[:, :, 0]
+        return img
+
+    @staticmethod
+    def _quantize(table):
+        return np.round(table).astype('uint8')
+
+    @staticmethod
+    def _get_histograms(img):
+        if cv2 is not None:
+            return np.array([cv2.calcHist([img], [c], None, [256], [0, 256]).reshape(256)
+                             for c in range(img.shape[2])], dtype='float64')
+        return np.array([np.bincount(img[:, :, c].ravel(), minlength=256)
+                         for c in range(img.shape[2])], dtype='float64')
+
+
+def lut_brightness(img, alpha):
+    return ColorLUTTransform().brightness(alpha)(img)
+
+
+def lut_contrast(img, alpha):
+    return ColorLUTTransform().contrast(alpha)(img)
+
+
+def lut_gamma(img, gamma):
+    return ColorLUTTransform().gamma(gamma)(img)
+
+
+def lut_saturation(img, alpha):
+    return ColorLUTTransform().saturation(alpha)(img)
@@ -12,3 +12,4 @@ from .node import *
 from .function import *
 from .tfqueue import *
 from .tfcollection import *
+from .tracer import *
@@ -126,7 +126,10 @@ class Env(object):
         compute_update_batch_normalization = _on_train_flag('update_batch_normalization')
         compute_enable_dropout = _on_train_flag('enable_dropout')
 
+        """capacity of the input queue, see env.use_input_queue"""
         input_queue_size = 50
+        """number of threads feeding the input queue"""
+        input_queue_nr_threads = 1
 
     class DataParallelFlag(AttrObject):
         """Env data parallel flags"""
@@ -215,6 +218,11 @@ class Env(object):
         data-parallel controller."""
         self._dpsplitters.append(splitter)
 
+    @property
+    def dpsplitters(self):
+        """The data-parallel splitters, which rewrite the feed dict of the functions of this env."""
+        return self._dpsplitters
+
     @property
     def phase(self):
         return self.__phase
@@ -87,6 +87,7 @@ class Function(object):
         self._extra_kwoutputs = {}
         self._extra_ops = []
         self._extra_kw_modifiers = []
+        self._tracer = None
 
         self.__compiled = False
 
@@ -126,6 +127,15 @@ class Function(object):
     def extend_extra_kw_modifiers(self, modifiers):
         self._extra_kw_modifiers.extend(modifiers)
 
+    @property
+    def tracer(self):
+        return self._tracer
+
+    def set_tracer(self, tracer):
+        """Set the step tracer (see tracer/StepTracer), None to disable tracing."""
+        self._tracer = tracer
+        return self
+
     @property
     def compiled(self):
         return self.__compiled
@@ -163,7 +173,7 @@ class Function(object):
                 f(feed_dict)
             feed_dict = self.canonize_feed_dict(feed_dict)
 
-            outputs = self.session.run(self._outputs, feed_dict=feed_dict)
+            outputs = self._run(self._outputs, feed_dict=feed_dict)
             if output_raw:
                 return outputs
             return self._output_manager.format(outputs)
@@ -185,6 +195,11 @@ class Function(object):
             all_outputs.append(outputs)
         return self._output_manager.reduce_format(self._outputs, all_outputs)
 
+    def _run(self, fetches, feed_dict=None):
+        if self._tracer is not None:
+            return self._tracer.run(self.session, fetches, feed_dict=feed_dict)
+        return self.session.run(fetches, feed_dict=feed_dict)
+
     @staticmethod
     def canonize_feed_dict(feed_dict):
         res = {}
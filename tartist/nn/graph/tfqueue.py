@@ -10,6 +10,7 @@ from .function import Function
 from ..graph.node import as_tftensor
 from ..tfutils import TArtGraphKeys
 
+import time
 import threading
 import tensorflow as tf
 from tensorflow.contrib import graph_editor
@@ -21,9 +22,14 @@ class QueuedInputFunction(Function):
     def __init__(self, env):
         super().__init__(env)
         self._input_queue_desc = env.input_queue_desc
-        self._server_thread = None
+        self._server_threads = []
         self._queue_enabled = True
 
+        self._dataflow_iter = None
+        self._dataflow_lock = threading.Lock()
+        self._stat_lock = threading.Lock()
+        self._stat = dict(nr_enqueued=0, nr_dequeued=0, nr_starved=0, time_dataflow=0., time_enqueue=0.)
+
     def enable_queue(self):
         self._queue_enabled = True
 
@@ -34,14 +40,26 @@ class QueuedInputFunction(Function):
     def queue_enabled(self):
         return self._queue_enabled
 
-    def _server_mainloop(self, df):
+    def _server_mainloop(self):
         try:
-            for feed_dict in df:
+            while True:
+                start = time.time()
+                with self._dataflow_lock:
+                    try:
+                        feed_dict = next(self._dataflow_iter)
+                    except StopIteration:
+                        return
+                fetched = time.time()
+
                 for f in self._extra_kw_modifiers:
                     f(feed_dict)
                 feed_dict = self.canonize_feed_dict(feed_dict)
-
                 self.session.run(self._input_queue_desc.enqueue_op, feed_dict=feed_dict)
+
+                with self._stat_lock:
+                    self._stat['nr_enqueued'] += 1
+                    self._stat['time_dataflow'] += fetched - start
+                    self._stat['time_enqueue'] += time.time() - fetched
         except (tf.errors.CancelledError, tf.errors.OutOfRangeError):
             try:
                 self._env.session.run([self._input_queue_desc.close_op])
@@ -51,19 +69,64 @@ class QueuedInputFunction(Function):
         except Exception as e:
             print("Exception in EnqueueThread:", e)
 
-    def serve(self, dataflow):
-        self._server_thread = threading.Thread(target=self._server_mainloop, args=(dataflow, ), daemon=True)
-        self._server_thread.start()
+    def serve(self, dataflow, nr_threads=None):
+        """
+        Start the enqueue threads. All threads share the same iterator over the dataflow (the access is serialized),
+        while the enqueue session.run calls are issued concurrently.
+
+        :param dataflow: The dataflow, typically a SimpleDataFlowBase, yielding feed dicts.
+        :param nr_threads: Number of enqueue threads, default to env.flags.input_queue_nr_threads.
+        """
+        if nr_threads is None:
+            nr_threads = self.flags.input_queue_nr_threads
+        assert nr_threads > 0, 'Must have at least one enqueue thread.'
+
+        self._dataflow_iter = iter(dataflow)
+        for i in range(nr_threads):
+            t = threading.Thread(target=self._server_mainloop, name='EnqueueThread-{}'.format(i), daemon=True)
+            t.start()
+            self._server_threads.append(t)
+
+    @property
+    def queue_capacity(self):
+        return self._input_queue_desc.capacity
+
+    @property
+    def queue_size(self):
+        """The accurate number of elements in the queue, it costs a session.run."""
+        return self.session.run(self._input_queue_desc.qsize_op)
+
+    def get_queue_stat(self):
+        """
+        Get the statistics of the input queue, without any session.run. The fill level is estimated from the number
+        of finished enqueue and dequeue calls, thus it is a lower bound of the real size.
+        A step is counted as starved if the queue was (estimated to be) empty when the step started.
+
+        :return: A dict containing the stats.
+        """
+        with self._stat_lock:
+            stat = self._stat.copy()
+
+        stat['capacity'] = self.queue_capacity
+        stat['size'] = max(stat['nr_enqueued'] - stat['nr_dequeued'], 0)
+        stat['fill_ratio'] = stat['size'] / stat['capacity']
+        stat['starved_ratio'] = stat['nr_starved'] / max(stat['nr_dequeued'], 1)
+        stat['nr_threads'] = len(self._server_threads)
+        return stat
 
     def __call__(self, *args, output_raw=False, **kwargs):
         if self._queue_enabled:
             assert len(args) == 0 and len(kwargs) == 0, 'Can not provide args for QueuedInputFunction'
-            outputs = self.session.run(self._outputs)
+            with self._stat_lock:
+                if self._stat['nr_enqueued'] <= self._stat['nr_dequeued']:
+                    self._stat['nr_starved'] += 1
+                self._stat['nr_dequeued'] += 1
+            outputs = self._run(self._outputs)
             if output_raw:
                 return outputs
             return self._output_manager.format(outputs)
         else:
-            super().__call__(*args, output_raw=output_raw, **kwargs)
+            return super().__call__(*args, output_raw=output_raw, **kwargs)
 
 
 class InputQueueDesc(object):
@@ -84,7 +147,7 @@ class InputQueueDesc(object):
         self._placeholders = graph.get_collection(TArtGraphKeys.PLACEHOLDERS)
         self._editable_operations = [o for o in graph.get_operations() if o not in self._placeholders]
         placeholders_dtypes = [x.dtype for x in self._placeholders]
-        self._input_queue = tf.FIFOQueue(self._env.flags.input_queue_size, placeholders_dtypes, name=self._name)
+        self._input_queue = tf.FIFOQueue(self.capacity, placeholders_dtypes, name=self._name)
 
         self.enqueue_op = self._input_queue.enqueue(self._placeholders)
         self.dequeue_op = self._input_queue.dequeue()
@@ -101,6 +164,10 @@ class InputQueueDesc(object):
         sgv1 = self.dequeue_op
         graph_editor.swap_ts(sgv0, sgv1, can_modify=self._editable_operations)
 
+    @property
+    def capacity(self):
+        return self._env.flags.input_queue_size
+
     @property
     def queue(self):
         return self._input_queue
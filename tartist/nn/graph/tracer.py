@@ -0,0 +1,171 @@
+# -*- coding:utf8 -*-
+# File   : tracer.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from ...core.logger import get_logger
+from ...core.io.fs import mkdir
+
+import collections
+import json
+import os.path as osp
+
+import tensorflow as tf
+from tensorflow.python.client import timeline
+
+logger = get_logger(__file__)
+
+__all__ = ['StepTracer']
+
+
+class StepTracer(object):
+    """
+    Full tracing of session.run for a Function. By default, each call of the function is treated as a step (counted
+    from 0); if `step_getter` is given, the step is the value it returns (e.g. the trainer iteration), and only the
+    first call of each step is traced. The steps to be traced can be specified by an interval (trace every N steps),
+    and/or a window (trace steps in [begin, end)). For each traced step, the tracer dumps:
+
+    1. A chrome trace timeline (open it at chrome://tracing), named as `step_{step}.timeline.json`.
+    2. A per-op table, named as `step_{step}.ops.txt`, sorted by the op time.
+
+    Besides, the aggregated per-op-type table among all traced steps is dumped to `ops_summary.txt`, once the last
+    step of the window is traced, or when `dump_summary` is called (e.g. at the end of the training).
+
+    A typical usage is::
+
+        func.set_tracer(StepTracer(dump_dir, interval=1000))
+
+    """
+
+    def __init__(self, dump_dir, interval=None, window=None, show_memory=True, nr_top_ops=50, step_getter=None):
+        """
+        :param dump_dir: The directory to dump the traces.
+        :param interval: Trace every `interval` steps, None to disable.
+        :param window: A tuple (begin, end), trace steps in [begin, end), None to disable.
+        :param show_memory: Whether to include the memory usage in the timeline.
+        :param nr_top_ops: Number of ops to be listed in the per-step table.
+        :param step_getter: A function returning the current step, None to count the calls.
+        """
+        assert interval is not None or window is not None, 'Must provide either interval or window for tracing.'
+        self._dump_dir = dump_dir
+        self._interval = interval
+        self._window = window
+        self._show_memory = show_memory
+        self._nr_top_ops = nr_top_ops
+        self._step_getter = step_getter
+
+        self._step = 0
+        self._last_traced_step = None
+        self._nr_traced = 0
+        self._nr_summarized = 0
+        self._op_type_stats = collections.defaultdict(lambda: [0, 0, 0])
+
+    @property
+    def step(self):
+        return self._step
+
+    def should_trace(self, step):
+        if self._interval is not None and step % self._interval == 0:
+            return True
+        if self._window is not None and self._window[0] <= step < self._window[1]:
+            return True
+        return False
+
+    def run(self, session, fetches, feed_dict=None):
+        if self._step_getter is not None:
+            step = self._step = self._step_getter()
+        else:
+            step = self._step
+            self._step += 1
+
+        if step == self._last_traced_step or not self.should_trace(step):
+            return session.run(fetches, feed_dict=feed_dict)
+        self._last_traced_step = step
+
+        options = tf.RunOptions(trace_level=tf.RunOptions.FULL_TRACE)
+        run_metadata = tf.RunMetadata()
+        outputs = session.run(fetches, feed_dict=feed_dict, options=options, run_metadata=run_metadata)
+        self.dump(step, run_metadata)
+        return outputs
+
+    def dump(self, step, run_metadata):
+        mkdir(self._dump_dir)
+
+        tl = timeline.Timeline(run_metadata.step_stats)
+        fpath = osp.join(self._dump_dir, 'step_{}.timeline.json'.format(step))
+        with open(fpath, 'w') as f:
+            f.write(tl.generate_chrome_trace_format(show_memory=self._show_memory))
+
+        op_stats = self._collect_op_stats(run_metadata.step_stats)
+        with open(osp.join(self._dump_dir, 'step_{}.ops.txt'.format(step)), 'w') as f:
+            f.write(self._format_table(
+                ['name', 'type', 'device', 'time(ms)', 'memory(KB)'],
+                [(s['name'], s['type'], s['device'], s['time'] / 1000, s['memory'] / 1024)
+                 for s in op_stats[:self._nr_top_ops]]
+            ))
+
+        self._nr_traced += 1
+        for s in op_stats:
+            stat = self._op_type_stats[s['type']]
+            stat[0] += 1
+            stat[1] += s['time']
+            stat[2] += s['memory']
+        if self._window is not None and step == self._window[1] - 1:
+            self.dump_summary()
+
+        logger.info('Step {} traced, dumped to {}.'.format(step, fpath))
+
+    def dump_summary(self):
+        """Dump the aggregated per-op-type table, if any step has been traced since the last dump."""
+        if self._nr_traced == self._nr_summarized:
+            return
+        self._nr_summarized = self._nr_traced
+
+        rows = sorted(self._op_type_stats.items(), key=lambda x: -x[1][1])
+        total_time = sum(v[1] for _, v in rows) or 1
+        with open(osp.join(self._dump_dir, 'ops_summary.txt'), 'w') as f:
+            f.write('Aggregated over {} traced steps.\n'.format(self._nr_traced))
+            f.write(self._format_table(
+                ['type', 'count/step', 'time/step(ms)', 'time(%)', 'memory/step(KB)'],
+                [(k, v[0] / self._nr_traced, v[1] / self._nr_traced / 1000, v[1] / total_time * 100,
+                  v[2] / self._nr_traced / 1024) for k, v in rows]
+            ))
+        with open(osp.join(self._dump_dir, 'ops_summary.json'), 'w') as f:
+            json.dump({'nr_traced': self._nr_traced, 'op_types': {
+                k: {'count': v[0], 'time': v[1], 'memory': v[2]} for k, v in rows}}, f)
+
+    @staticmethod
+    def _collect_op_stats(step_stats):
+        op_stats = []
+        for dev_stats in step_stats.dev_stats:
+            for node_stats in dev_stats.node_stats:
+                # timeline_label is in the form of "name = Type(inputs)"
+                label = node_stats.timeline_label
+                if ' = ' in label:
+                    op_type = label.split(' = ', 1)[1].split('(', 1)[0]
+                else:
+                    op_type = node_stats.node_name
+                memory = sum(m.total_bytes for m in node_stats.memory)
+                op_stats.append({
+                    'name': node_stats.node_name,
+                    'type': op_type,
+                    'device': dev_stats.device,
+                    'time': node_stats.all_end_rel_micros,
+                    'memory': memory
+                })
+        op_stats.sort(key=lambda x: -x['time'])
+        return op_stats
+
+    @staticmethod
+    def _format_table(header, rows):
+        def fmt(v):
+            if isinstance(v, float):
+                return '{:.3f}'.format(v)
+            return str(v)
+
+        rows = [header] + [list(map(fmt, r)) for r in rows]
+        widths = [max(len(r[i]) for r in rows) for i in range(len(header))]
+        return '\n'.join('  '.join(c.ljust(w) for c, w in zip(r, widths)) for r in rows) + '\n'
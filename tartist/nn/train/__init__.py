@@ -7,4 +7,5 @@
 # This file is part of TensorArtist.
 
 from .env import *
+from .profiler import *
 from .trainer import *
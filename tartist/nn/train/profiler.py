@@ -0,0 +1,158 @@
+# -*- coding:utf8 -*-
+# File   : profiler.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from ...core.event import event_manager
+from ...core.logger import get_logger
+
+import collections
+import json
+import math
+import time
+
+logger = get_logger(__file__)
+
+__all__ = ['StageTimeHistogram', 'TrainerProfiler']
+
+
+class StageTimeHistogram(object):
+    """
+    A cheap wall-time histogram. Durations are accumulated into log2-spaced buckets (in microseconds), so that
+    recording costs O(1) and the memory does not grow with the number of records. Percentiles are approximated by the
+    upper bound of the bucket.
+    """
+
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+        self.buckets = collections.defaultdict(int)
+
+    def record(self, duration):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        self.buckets[math.frexp(duration * 1e6)[1]] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.
+
+    def percentile(self, q):
+        if self.count == 0:
+            return 0.
+        target = q * self.count
+        acc = 0
+        for b in sorted(self.buckets.keys()):
+            acc += self.buckets[b]
+            if acc >= target:
+                return min(math.ldexp(1, b) / 1e6, self.max)
+        return self.max
+
+    def as_dict(self):
+        return collections.OrderedDict([
+            ('count', self.count), ('total', self.total), ('mean', self.mean),
+            ('p50', self.percentile(0.5)), ('p90', self.percentile(0.9)), ('p99', self.percentile(0.99)),
+            ('max', self.max),
+            ('histogram', {'{:.6f}'.format(math.ldexp(1, b) / 1e6): c for b, c in sorted(self.buckets.items())})
+        ])
+
+
+class TrainerProfiler(object):
+    """
+    Per-stage wall-time profiler for the training loop. The trainer records the time spent in data fetching, the
+    step function (and its sub-stages, e.g. fn_train and summary parsing), and each iter:*/epoch:* event callback.
+    Every `interval` iterations, the histograms are aggregated into a report, which is put into the summary history
+    (as async scalars, in milliseconds) and appended to a JSON-lines file, and then reset.
+    """
+
+    __profiled_events__ = ('iter:', 'epoch:')
+
+    def __init__(self, interval=100, json_path=None, summary_prefix='profile'):
+        """
+        :param interval: Number of iterations to aggregate.
+        :param json_path: The path to the JSON-lines report, if None, the report will not be dumped.
+        :param summary_prefix: The prefix of the summary history keys.
+        """
+        self._interval = interval
+        self._json_path = json_path
+        self._summary_prefix = summary_prefix
+        self._histograms = collections.OrderedDict()
+        self._last_report = None
+        self._window_start = time.time()
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @property
+    def last_report(self):
+        return self._last_report
+
+    def record(self, stage, duration):
+        hist = self._histograms.get(stage, None)
+        if hist is None:
+            hist = self._histograms[stage] = StageTimeHistogram()
+        hist.record(duration)
+
+    def trigger_event(self, trainer, name, args, kwargs):
+        """Trigger the event on the trainer, record the time spent in each callback if the event is profiled."""
+        if not name.startswith(self.__profiled_events__):
+            event_manager.trigger_args(trainer, name, (trainer, ) + args, kwargs)
+            return
+
+        args = (trainer, ) + args
+        stage = 'event/' + name
+        event_start = time.time()
+        for callback in event_manager.iter_callbacks(trainer, name):
+            start = time.time()
+            callback(*args, **kwargs)
+            self.record(stage + '/' + getattr(callback, '__name__', type(callback).__name__), time.time() - start)
+        self.record(stage, time.time() - event_start)
+
+    def step(self, trainer):
+        """Called after each iteration, aggregate the histograms every `interval` iterations."""
+        if trainer.iter % self._interval == 0:
+            self.flush(trainer)
+
+    def flush(self, trainer):
+        now = time.time()
+        report = collections.OrderedDict()
+        report['iter'] = trainer.iter
+        report['epoch'] = trainer.epoch
+        report['wall_time'] = now - self._window_start
+        report['stages'] = collections.OrderedDict([(k, v.as_dict()) for k, v in self._histograms.items()])
+
+        mgr = trainer.runtime.get('summary_histories', None)
+        if mgr is not None:
+            for k, v in self._histograms.items():
+                tag = '{}/{}'.format(self._summary_prefix, k)
+                mgr.set_type(tag, 'async_scalar')
+                mgr.put_async_scalar(tag, v.mean * 1000)
+
+        if self._json_path is not None:
+            with open(self._json_path, 'a') as f:
+                f.write(json.dumps(report) + '\n')
+
+        self._last_report = report
+        self._histograms = collections.OrderedDict()
+        self._window_start = now
+        return report
+
+    def format_report(self, report=None):
+        report = report or self._last_report
+        if report is None:
+            return 'Trainer profiler: no report.'
+
+        log_strs = ['Trainer profiler: iter = {}, wall time = {:.3f}s'.format(report['iter'], report['wall_time'])]
+        for k, v in report['stages'].items():
+            log_strs.append('  {}: total = {:.3f}s, mean = {:.3f}ms, p90 = {:.3f}ms, max = {:.3f}ms'.format(
+                k, v['total'], v['mean'] * 1000, v['p90'] * 1000, v['max'] * 1000))
+        return '\n'.join(log_strs)
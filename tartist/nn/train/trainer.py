@@ -7,14 +7,18 @@
 # This file is part of TensorArtist.
 
 from .env import SimpleTrainerEnv
+from .profiler import TrainerProfiler
 from ..graph.env import Env
 from ..graph.tfqueue import QueuedInputFunction
+from ..graph.tracer import StepTracer
 from ...core.event import EventManager, register_event, trigger_event
 from ...core.utils.meta import assert_instance, notnone_property
 from ...core.utils.cache import cached_property
 
 import os
 import math
+import time
+import contextlib
 import tensorflow as tf
 
 __all__ = ['TrainerBase', 'SimpleTrainer']
@@ -28,6 +32,7 @@ class TrainerBase(object):
         self._stop_signal = False
         self._desc = desc
         self._need_feed = True
+        self._profiler = None
 
         assert_instance(self._env, Env)
 
@@ -104,12 +109,29 @@ class TrainerBase(object):
     def finalize(self):
         pass
 
+    @property
+    def profiler(self):
+        return self._profiler
+
+    def enable_profiler(self, interval=100, json_path=None):
+        """
+        Enable the built-in per-stage profiler, see TrainerProfiler for detail.
+
+        :param interval: Number of iterations to aggregate.
+        :param json_path: The path to the JSON-lines report.
+        """
+        self._profiler = TrainerProfiler(interval, json_path=json_path)
+        return self
+
     def register_event(self, name, callback, *args, priority=EventManager.DEF_PRIORITY, **kwargs):
         register_event(self, name, callback, *args, priority=priority, **kwargs)
         return self
 
     def trigger_event(self, name, *args, **kwargs):
-        trigger_event(self, name, self, *args, **kwargs)
+        if self._profiler is not None:
+            self._profiler.trigger_event(self, name, args, kwargs)
+        else:
+            trigger_event(self, name, self, *args, **kwargs)
         return self
 
     def dump_snapshot(self):
@@ -156,17 +178,34 @@ class TrainerBase(object):
         self.trigger_event('finalization:after')
 
     def _wrapped_run_step(self):
+        iter_start = time.time()
         if self.runtime['iter'] % self.epoch_size == 1:
             self.trigger_event('epoch:before')
 
-        inp = next(self._iter_train) if self._need_feed else {}
+        with self._profile_stage('data'):
+            inp = next(self._iter_train) if self._need_feed else {}
         self.trigger_event('iter:before', inp)
-        out = self._run_step(inp)
+        with self._profile_stage('step'):
+            out = self._run_step(inp)
         self.trigger_event('iter:after', inp, out)
 
         if self.runtime['iter'] % self.epoch_size == 0:
             self.trigger_event('epoch:after')
 
+        if self._profiler is not None:
+            self._profiler.record('iter', time.time() - iter_start)
+            self._profiler.step(self)
+
+    @contextlib.contextmanager
+    def _profile_stage(self, stage):
+        """Record the time spent in the stage, it is an empty context if the profiler is disabled."""
+        if self._profiler is None:
+            yield
+        else:
+            start = time.time()
+            yield
+            self._profiler.record(stage, time.time() - start)
+
     def _run_step(self, data):
         raise NotImplementedError()
 
@@ -190,14 +229,34 @@ class TrainerBase(object):
 
 class SimpleTrainer(TrainerBase):
     _fn_train = None
+    _tracer = None
+
+    def enable_tracing(self, dump_dir, interval=None, window=None, **kwargs):
+        """
+        Enable full tracing of the training function, see StepTracer for detail. The steps are the trainer iterations
+        (starting from 1). Should be called before the training.
+
+        :param dump_dir: The directory to dump the traces.
+        :param interval: Trace every `interval` iterations.
+        :param window: A tuple (begin, end), trace iterations in [begin, end).
+        """
+        self._tracer = StepTracer(dump_dir, interval=interval, window=window, step_getter=lambda: self.iter, **kwargs)
+        return self
 
     def initialize(self):
         self._initialize_train_func()
         # MJY(20170728): First create the training func and then do variable initialization.
         super().initialize()
 
+    def finalize(self):
+        if self._tracer is not None:
+            self._tracer.dump_summary()
+        super().finalize()
+
     def _initialize_train_func(self):
         self._fn_train = self.env.make_optimizable_func(self.network.loss)
+        if self._tracer is not None:
+            self._fn_train.set_tracer(self._tracer)
         if isinstance(self._fn_train, QueuedInputFunction):
             self._need_feed = False
 
@@ -213,10 +272,12 @@ class SimpleTrainer(TrainerBase):
 
     def _run_step(self, data):
         self._compile_fn_train()
-        out = self._fn_train.call_args(data)
+        with self._profile_stage('step/fn_train'):
+            out = self._fn_train.call_args(data)
         self.runtime['loss'] = out['loss']
         if 'summaries' in out:
-            summaries = tf.Summary.FromString(out['summaries'])
+            with self._profile_stage('step/summary'):
+                summaries = tf.Summary.FromString(out['summaries'])
             self.runtime['summaries'] = summaries
         return out
 
@@ -0,0 +1,89 @@
+# -*- coding:utf8 -*-
+# File   : input_queue.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+# 
+# This file is part of TensorArtist.
+
+from .summary import put_summary_history_scalar
+from tartist.core import get_logger
+from tartist.nn.graph.tfqueue import QueuedInputFunction
+
+logger = get_logger()
+
+
+def enable_input_queue_monitor(trainer, starvation_threshold=0.5):
+    """
+    Monitor the fill level of the input queue of the training function. The fill ratio and the starvation flag
+    (1 if the queue was empty when a step of the iter started, otherwise 0) of each iter are put into the summary
+    history as `input_queue/fill_ratio` and `input_queue/starved`. At the end of each epoch, the ratio of starved steps
+    in the epoch is put as the async scalar `input_queue/starved_ratio`, and a warning is printed if it exceeds the
+    threshold (i.e., the training is input-bound).
+
+    :param trainer: The trainer, its fn_train should be a QueuedInputFunction.
+    :param starvation_threshold: The ratio of starved steps in an epoch to print the warning.
+    """
+
+    last_stat = None
+    last_nr_starved = 0
+
+    def get_queued_func(trainer):
+        func = getattr(trainer, '_fn_train', None)
+        if isinstance(func, QueuedInputFunction) and func.queue_enabled:
+            return func
+        return None
+
+    def input_queue_monitor_on_iter_after(trainer, inp, out):
+        nonlocal last_nr_starved
+
+        func = get_queued_func(trainer)
+        if func is None:
+            return
+
+        stat = func.get_queue_stat()
+        starved = int(stat['nr_starved'] > last_nr_starved)
+        last_nr_starved = stat['nr_starved']
+        trainer.runtime['input_queue_stat'] = stat
+        if 'summary_histories' in trainer.runtime:
+            put_summary_history_scalar(trainer, 'input_queue/fill_ratio', stat['fill_ratio'])
+            put_summary_history_scalar(trainer, 'input_queue/starved', starved)
+
+    def input_queue_monitor_on_epoch_after(trainer):
+        nonlocal last_stat
+
+        func = get_queued_func(trainer)
+        if func is None:
+            return
+
+        stat = func.get_queue_stat()
+        if last_stat is not None:
+            nr_steps = stat['nr_dequeued'] - last_stat['nr_dequeued']
+            nr_starved = stat['nr_starved'] - last_stat['nr_starved']
+            nr_enqueued = stat['nr_enqueued'] - last_stat['nr_enqueued']
+            time_dataflow = stat['time_dataflow'] - last_stat['time_dataflow']
+        else:
+            nr_steps, nr_starved = stat['nr_dequeued'], stat['nr_starved']
+            nr_enqueued, time_dataflow = stat['nr_enqueued'], stat['time_dataflow']
+        last_stat = stat
+
+        if nr_steps == 0:
+            return
+
+        starved_ratio = nr_starved / nr_steps
+        if 'summary_histories' in trainer.runtime:
+            # a single value per epoch: as an async scalar, the echo reports exactly the ratio of this epoch
+            mgr = trainer.runtime['summary_histories']
+            mgr.set_type('input_queue/starved_ratio', 'async_scalar')
+            mgr.put_async_scalar('input_queue/starved_ratio', starved_ratio)
+
+        logger.info('Input queue: epoch = {}, size = {}/{}, threads = {}, starved = {}/{}, '
+                    'dataflow time = {:.4f}s/batch.'.format(
+                        trainer.epoch, stat['size'], stat['capacity'], stat['nr_threads'], nr_starved, nr_steps,
+                        time_dataflow / max(nr_enqueued, 1)))
+        if starved_ratio > starvation_threshold:
+            logger.warn('Input queue starved in {:.2f}% of steps, the training is input-bound, '
+                        'consider using more enqueue threads or a faster dataflow.'.format(starved_ratio * 100))
+
+    trainer.register_event('iter:after', input_queue_monitor_on_iter_after, priority=7)
+    trainer.register_event('epoch:after', input_queue_monitor_on_epoch_after, priority=7)
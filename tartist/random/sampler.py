@@ -6,7 +6,7 @@
 # 
 # This file is part of TensorArtist.
 
-from ..core.utils.nd import gather_list_batch
+from ..core.utils.nd import gather_dict_batch
 from .rng import gen_rng
 
 __all__ = ['EpochBatchSampler', 'SimpleBatchSampler']
@@ -48,7 +48,7 @@ class EpochBatchSampler(RenamedDictSamplerBase):
         n = len(data[keys[0]])
         for i in range(self._epoch_size):
             this_idx = self._rng.randint(n, size=self._batch_size)
-            this = {k: gather_list_batch(data[k], this_idx) for k in keys}
+            this = gather_dict_batch(data, keys, this_idx)
             yield this
 
     def __call__(self, data, keys, renames=None):
@@ -68,7 +68,7 @@ class SimpleBatchSampler(RenamedDictSamplerBase):
             idx = self._rng.permutation(n)
             for j in range(n // self._batch_size):
                 this_idx = idx[j * self._batch_size:j * self._batch_size + self._batch_size]
-                this = {k: gather_list_batch(data[k], this_idx) for k in keys}
+                this = gather_dict_batch(data, keys, this_idx)
                 yield this
 
     def _len(self, data, keys):
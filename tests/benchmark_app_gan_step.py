@@ -0,0 +1,86 @@
+# -*- coding:utf8 -*-
+# File   : benchmark_app_gan_step.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+"""Compare the iterations/sec of GANTrainer with and without the fused step, on a DCGAN-like network (the same shape
+as examples/generative-model/desc_gan_mnist_cnn.py) with random inputs. For the full examples, run tart-train with
+--profile N (the profiler interval in iterations) and set trainer.fused_step to True/False in the desc."""
+
+from tartist.app import gan
+from tartist.app.gan import GANGraphKeys
+from tartist.nn import Env, opr as O, optimizer
+
+import time
+import numpy as np
+
+batch_size = 64
+z_dim = 100
+
+
+def make_network(env):
+    with env.create_network() as net:
+        img = O.placeholder('img', shape=(None, 28, 28, 1))
+        z = O.random_normal([batch_size, z_dim])
+
+        def discriminator(x):
+            _ = O.conv2d('conv1', x, 64, (4, 4), stride=2, nonlin=O.relu)
+            _ = O.conv2d('conv2', _, 128, (4, 4), stride=2, nonlin=O.relu)
+            _ = O.fc('fc1', _, 1024, nonlin=O.relu)
+            return O.fc('fct', _, 1)
+
+        with env.variable_scope(GANGraphKeys.GENERATOR_VARIABLES):
+            _ = O.fc('fc1', z, 1024, nonlin=O.relu)
+            _ = O.fc('fc2', _, 28 * 28, nonlin=O.sigmoid)
+            img_gen = O.reshape(_, [-1, 28, 28, 1])
+
+        with env.variable_scope(GANGraphKeys.DISCRIMINATOR_VARIABLES):
+            logits_fake = discriminator(img_gen)
+        with env.variable_scope(GANGraphKeys.DISCRIMINATOR_VARIABLES, reuse=True):
+            logits_real = discriminator(img)
+
+        d_loss_real = O.sigmoid_cross_entropy_with_logits(logits=logits_real, labels=O.ones_like(logits_real)).mean()
+        d_loss_fake = O.sigmoid_cross_entropy_with_logits(logits=logits_fake, labels=O.zeros_like(logits_fake)).mean()
+        g_loss = O.sigmoid_cross_entropy_with_logits(logits=logits_fake, labels=O.ones_like(logits_fake)).mean()
+        net.add_output(.5 * (d_loss_real + d_loss_fake), name='d_loss')
+        net.add_output(g_loss, name='g_loss')
+
+
+def make_optimizer(env):
+    lr = optimizer.base.make_optimizer_variable('learning_rate', 2e-4)
+    wrapper = optimizer.OptimizerWrapper()
+    wrapper.set_base_optimizer(optimizer.base.AdamOptimizer(lr, beta1=0.5, epsilon=1e-3))
+    env.set_g_optimizer(wrapper)
+    env.set_d_optimizer(wrapper)
+
+
+def benchmark(fused, nr_iters=200):
+    env = gan.GANTrainerEnv(Env.Phase.TRAIN, '/cpu:0')
+    with env.as_default(activate_session=False):
+        make_network(env)
+        make_optimizer(env)
+
+    trainer = gan.GANTrainer(nr_iters, env=env)
+    if fused:
+        trainer.enable_fused_step()
+    trainer.initialize()
+
+    data = {'g': [{}], 'd': [{'img': np.random.uniform(size=(batch_size, 28, 28, 1)).astype('float32')}]}
+    for i in range(10):
+        trainer._run_step(data)
+    start = time.time()
+    for i in range(nr_iters):
+        trainer._run_step(data)
+    return nr_iters / (time.time() - start)
+
+
+def main():
+    for fused in (False, True):
+        print('fused={}: {:.1f} iter/s'.format(fused, benchmark(fused)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# -*- coding:utf8 -*-
+# File   : benchmark_core_io_compress.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.core import io
+
+import os
+import os.path as osp
+import tempfile
+import time
+
+import numpy as np
+
+
+def make_weights():
+    shapes = [(64, 3, 3, 3), (128, 64, 3, 3), (256, 128, 3, 3), (256, 256, 3, 3), (512, 256, 3, 3), (4096, 512),
+              (1000, 4096)]
+    weights = {}
+    for i, s in enumerate(shapes):
+        weights['layer{}/W'.format(i)] = (np.random.randn(*s) * 0.01).astype('float32')
+        weights['layer{}/b'.format(i)] = np.zeros(s[0], dtype='float32')
+    return weights
+
+
+def make_snapshot(weights):
+    # a snapshot holds the weights and the optimizer states, e.g. momentums, which are mostly zeros in early epochs
+    variables = dict(weights)
+    for k, v in weights.items():
+        m = np.zeros_like(v)
+        m.reshape(-1)[::10] = v.reshape(-1)[::10]
+        variables[k + '/Momentum'] = m
+    return {'variables': variables, 'runtime': {'epoch': 10, 'iter': 10000}}
+
+
+def benchmark(name, content, exts, nr_repeat=3):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for ext in exts:
+            path = osp.join(tmpdir, 'content' + ext)
+
+            start = time.time()
+            for i in range(nr_repeat):
+                io.dump(path, content)
+            t_dump = (time.time() - start) / nr_repeat
+
+            start = time.time()
+            for i in range(nr_repeat):
+                io.load(path)
+            t_load = (time.time() - start) / nr_repeat
+
+            size = os.path.getsize(path)
+            print('{:<10} {:<10} size={:8.2f}MB dump={:8.2f}ms load={:8.2f}ms'.format(
+                name, ext, size / 1024 ** 2, t_dump * 1000, t_load * 1000))
+
+
+def main():
+    exts = ['.pkl', '.pkl.gz', '.pkl.zst', '.pkl.lz4', '.pkl.zlib', '.pkl.xz']
+    weights = make_weights()
+    benchmark('weights', weights, exts)
+    benchmark('snapshot', make_snapshot(weights), exts)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# -*- coding:utf8 -*-
+# File   : benchmark_core_nd_gather.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.core.utils.nd import gather_list_batch, FieldArrayBuffer
+
+import collections
+import time
+
+import numpy as np
+
+
+def benchmark(name, func, nr_repeat=20):
+    func()
+    start = time.time()
+    for i in range(nr_repeat):
+        func()
+    return (time.time() - start) / nr_repeat * 1000
+
+
+def gather_with_next_state(buf, indices, keys):
+    # as the replay memory of QLearningDataFlow: the next state is the state of the following slot
+    batch = buf.gather(indices, keys)
+    next_indices = np.where(batch['is_over'], indices, (indices + 1) % buf.maxsize)
+    batch['next_state'] = buf.gather(next_indices, ['state'])['state']
+    return batch
+
+
+def main():
+    maxsize = 50000
+    keys = ('state', 'action', 'reward', 'is_over')
+    # the next states in the deques are references to the states of the following samples, without extra memory
+    memory = {k: collections.deque(maxlen=maxsize) for k in keys + ('next_state', )}
+    buf = FieldArrayBuffer(maxsize, dtypes={'reward': 'float32'})
+
+    last_state = None
+    for i in range(maxsize):
+        sample = dict(state=np.random.randint(256, size=(84, 84, 4), dtype='uint8'), action=i % 4,
+                      reward=float(i % 2), is_over=False)
+        if last_state is not None:
+            memory['next_state'].append(sample['state'])
+        for k in keys:
+            memory[k].append(sample[k])
+        buf.append(**sample)
+        last_state = sample['state']
+    memory['next_state'].append(last_state)
+
+    print('memory: list-of-samples={:.1f}MB field-arrays={:.1f}MB'.format(
+        sum(x.nbytes for x in memory['state']) / 1024 ** 2, sum(buf[k].nbytes for k in keys) / 1024 ** 2))
+
+    rng = np.random.RandomState(0)
+    all_keys = keys + ('next_state', )
+    for batch_size in (32, 128, 512, 2048):
+        indices = rng.randint(maxsize, size=batch_size)
+        t_deque = benchmark('deque', lambda: {k: gather_list_batch(memory[k], indices) for k in all_keys})
+        t_buffer = benchmark('buffer', lambda: gather_with_next_state(buf, indices, keys))
+        print('batch_size={:<5} list-of-samples={:8.2f}ms field-arrays={:8.2f}ms speedup={:.2f}x'.format(
+            batch_size, t_deque, t_buffer, t_deque / t_buffer))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+# -*- coding:utf8 -*-
+# File   : benchmark_data_rflow.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+"""
+The benchmark suite of rflow, on loopback with a local name server. Each case runs the peers in separate processes
+and reports the throughput and the p50/p99/p999 latencies as one json line, e.g.,
+
+    python tests/benchmark_data_rflow.py --topologies push_pull,query --sizes 1024,1048576 --output base.jsonl
+
+The topologies and their modes:
+
+    - push_pull: make_push_pair (as MPPrefetchDataFlow) with `peers` workers; modes: tcp, ipc, shm.
+    - fan_in: `peers` controllers with OutputPipe to a single InputPipe; modes: pickle, shm.
+    - fan_out: a controller with a credit-routed OutputPipe to `peers` InputPipe; modes: pickle, shm.
+    - query: `peers` QueryReqPipe clients to a QueryRepPipe echo server; modes: sync, pipelined.
+
+The payload is a uint8 nd array of `size` bytes. For the pipes, the latency is measured from the creation of the
+data to its arrival, with the producers running at full speed (i.e., the latency under saturation, including the
+queueing in the buffers); for the queries, it is the round-trip time.
+"""
+
+from tartist.data.rflow import configs, control, make_push_pair
+from tartist.data.rflow import InputPipe, OutputPipe, QueryRepPipe, QueryReqPipe, ReactorNameServer
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+import uuid
+import numpy as np
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--topologies', default='push_pull,fan_in,fan_out,query')
+parser.add_argument('--modes', default=None, help='comma-separated modes, default to all modes of each topology')
+parser.add_argument('--sizes', default='16,4096,262144,4194304', help='comma-separated payload sizes in bytes')
+parser.add_argument('--peers', default='1,4', help='comma-separated number of peers')
+parser.add_argument('--duration', type=float, default=2, help='the duration of each case in seconds')
+parser.add_argument('--output', default=None, help='the output jsonl file, default to stdout')
+
+all_modes = {
+    'push_pull': ['tcp', 'ipc', 'shm'],
+    'fan_in': ['pickle', 'shm'],
+    'fan_out': ['pickle', 'shm'],
+    'query': ['sync', 'pipelined']
+}
+
+# the window of the pipelined queries
+nr_pipelined = 8
+_shm_ring_size = configs.SHM_PUSH_RING_SIZE
+
+
+def _make_payload(size):
+    return {'time': time.time(), 'data': np.random.randint(256, size=size, dtype='uint8')}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def _start(target, *args):
+    proc = multiprocessing.Process(target=_run_quietly, args=(target, ) + args, daemon=True)
+    proc.start()
+    return proc
+
+
+def _run_quietly(target, *args):
+    # the name server and the pipes print debug information to stdout, keep it for the results
+    sys.stdout = open(os.devnull, 'w')
+    target(*args)
+
+
+def _stop(procs, stop_event=None):
+    if stop_event is not None:
+        stop_event.set()
+    for p in procs:
+        p.join(5)
+        if p.is_alive():
+            p.terminate()
+            p.join()
+
+
+def _set_serialization(mode):
+    configs.SHM_RING_SIZE = _shm_ring_size if mode == 'shm' else 0
+
+
+def _put_until(pipe, size, stop_event):
+    while not stop_event.is_set():
+        payload = _make_payload(size)
+        while not pipe.put_nowait(payload):
+            if stop_event.is_set():
+                return
+            time.sleep(1e-4)
+
+
+def _collect(get, duration):
+    latencies = []
+    for i in range(10):
+        get()
+    start = time.time()
+    while time.time() - start < duration:
+        payload = get()
+        if payload is not None:
+            latencies.append(time.time() - payload['time'])
+    return latencies, time.time() - start
+
+
+def _name_server(port):
+    ReactorNameServer(port=str(port)).mainloop()
+
+
+def _push_worker(push, size):
+    with push.activate():
+        while True:
+            push.send(_make_payload(size))
+
+
+def bench_push_pull(mode, size, nr_peers, duration):
+    pull, pushs = make_push_pair('rflow-benchmark', nr_peers, mode=mode)
+    procs = [_start(_push_worker, push, size) for push in pushs]
+    with pull.activate():
+        latencies, elapsed = _collect(pull.recv, duration)
+    _stop(procs)
+    return latencies, elapsed
+
+
+def _fan_in_producer(name, mode, size, stop_event):
+    _set_serialization(mode)
+    pipe = OutputPipe(name)
+    with control([pipe]):
+        _put_until(pipe, size, stop_event)
+
+
+def bench_fan_in(mode, size, nr_peers, duration):
+    name = 'rflow-benchmark-{}'.format(uuid.uuid4().hex[:8])
+    stop_event = multiprocessing.Event()
+    procs = [_start(_fan_in_producer, name, mode, size, stop_event) for i in range(nr_peers)]
+
+    _set_serialization(mode)
+    pipe = InputPipe(name)
+    with control([pipe]):
+        latencies, elapsed = _collect(pipe.get, duration)
+    _stop(procs, stop_event)
+    return latencies, elapsed
+
+
+def _fan_out_producer(name, mode, size, stop_event):
+    _set_serialization(mode)
+    pipe = OutputPipe(name, route='credit')
+    with control([pipe]):
+        _put_until(pipe, size, stop_event)
+
+
+def _fan_out_consumer(name, mode, duration, results):
+    _set_serialization(mode)
+    pipe = InputPipe(name)
+    with control([pipe]):
+        results.put(_collect(pipe.get, duration))
+
+
+def bench_fan_out(mode, size, nr_peers, duration):
+    name = 'rflow-benchmark-{}'.format(uuid.uuid4().hex[:8])
+    stop_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    consumers = [_start(_fan_out_consumer, name, mode, duration, results) for i in range(nr_peers)]
+    producer = _start(_fan_out_producer, name, mode, size, stop_event)
+    return _gather(results, nr_peers, [producer] + consumers, stop_event)
+
+
+def _gather(results, nr_peers, procs, stop_event=None):
+    latencies, elapsed = [], 0
+    for i in range(nr_peers):
+        l, e = results.get()
+        latencies.extend(l)
+        elapsed = max(elapsed, e)
+    _stop(procs, stop_event)
+    return latencies, elapsed
+
+
+def _query_server(conn_info_queue):
+    rep = QueryRepPipe('rflow-benchmark')
+    rep.dispatcher.register('echo', lambda pipe, identifier, inp: pipe.send(identifier, inp))
+    with rep.activate():
+        conn_info_queue.put(rep.conn_info)
+        while True:
+            time.sleep(1)
+
+
+def _query_client(cid, conn_info, mode, size, duration, results):
+    # the name is the identity of the sockets, thus should be unique
+    req = QueryReqPipe('rflow-benchmark-{}'.format(cid), conn_info=conn_info)
+    payload = _make_payload(size)['data']
+    latencies = []
+    with req.activate():
+        for i in range(10):
+            req.query('echo', payload)
+        start = time.time()
+        if mode == 'sync':
+            while time.time() - start < duration:
+                t = time.time()
+                req.query('echo', payload)
+                latencies.append(time.time() - t)
+        else:
+            window = collections.deque()
+            while time.time() - start < duration or len(window):
+                if len(window) < nr_pipelined and time.time() - start < duration:
+                    window.append((time.time(), req.query_async('echo', payload)))
+                    continue
+                t, future = window.popleft()
+                future.result()
+                latencies.append(time.time() - t)
+        results.put((latencies, time.time() - start))
+
+
+def bench_query(mode, size, nr_peers, duration):
+    conn_info_queue = multiprocessing.Queue()
+    server = _start(_query_server, conn_info_queue)
+    conn_info = conn_info_queue.get()
+
+    results = multiprocessing.Queue()
+    clients = [_start(_query_client, i, conn_info, mode, size, duration, results) for i in range(nr_peers)]
+    return _gather(results, nr_peers, clients + [server])
+
+
+def summarize(topology, mode, size, nr_peers, latencies, elapsed):
+    latencies = np.array(latencies) * 1000
+    res = collections.OrderedDict([
+        ('topology', topology), ('mode', mode), ('size', size), ('peers', nr_peers),
+        ('nr_msgs', len(latencies)), ('duration', round(elapsed, 3)),
+        ('msgs_per_sec', round(len(latencies) / elapsed, 1)),
+        ('mb_per_sec', round(len(latencies) * size / elapsed / 1024 / 1024, 2))
+    ])
+    for name, q in [('p50', 50), ('p99', 99), ('p999', 99.9)]:
+        res['latency_{}_ms'.format(name)] = round(float(np.percentile(latencies, q)), 3) if len(latencies) else None
+    return res
+
+
+def main():
+    args = parser.parse_args()
+
+    port = _free_port()
+    os.environ['TART_NAME_SERVER'] = 'tcp://localhost:{}'.format(port)
+    name_server = _start(_name_server, port)
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for topology in args.topologies.split(','):
+            bench = globals()['bench_' + topology]
+            modes = args.modes.split(',') if args.modes else all_modes[topology]
+            for mode in modes:
+                if mode not in all_modes[topology]:
+                    continue
+                for nr_peers in map(int, args.peers.split(',')):
+                    for size in map(int, args.sizes.split(',')):
+                        latencies, elapsed = bench(mode, size, nr_peers, args.duration)
+                        output.write(json.dumps(summarize(topology, mode, size, nr_peers, latencies, elapsed)) + '\n')
+                        output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        _stop([name_server])
+
+
+if __name__ == '__main__':
+    main()
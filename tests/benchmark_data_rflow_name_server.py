@@ -0,0 +1,113 @@
+# -*- coding:utf8 -*-
+# File   : benchmark_data_rflow_name_server.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+"""Compare the NameServer and the ReactorNameServer with hundreds of simulated controllers. Each simulated controller is
+a REQ socket speaking the name-server protocol: it registers itself and its pipes, then sends heartbeats and opipe
+queries. All controllers send their requests concurrently in each round, and the requests per second and the
+latencies are reported."""
+
+from tartist.data.rflow import NameServer, ReactorNameServer, configs, utils
+
+import argparse
+import contextlib
+import io
+import socket
+import threading
+import time
+import zmq
+import numpy as np
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n', '--nr-controllers', dest='nr_controllers', type=int, default=300)
+parser.add_argument('-r', '--nr-rounds', dest='nr_rounds', type=int, default=20)
+parser.add_argument('--nr-pipes', dest='nr_pipes', type=int, default=10)
+args = parser.parse_args()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def _round(socks, make_request):
+    start = dict()
+    for i, sock in enumerate(socks):
+        utils.req_send_json(sock, make_request(i))
+        start[sock] = time.time()
+
+    latencies = []
+    poller = zmq.Poller()
+    for sock in socks:
+        poller.register(sock, zmq.POLLIN)
+    while len(latencies) < len(socks):
+        for sock, _ in poller.poll(10000):
+            utils.req_recv_json(sock)
+            latencies.append(time.time() - start[sock])
+            poller.unregister(sock)
+    return latencies
+
+
+def benchmark(server_class):
+    port = _free_port()
+    server = server_class(host='127.0.0.1', port=port)
+    threading.Thread(target=server.mainloop, daemon=True).start()
+
+    context = zmq.Context()
+    # the name-server will connect to the controllers for the notifications, which are not replied in the benchmark
+    ctl_router = context.socket(zmq.ROUTER)
+    ctl_port = ctl_router.bind_to_random_port('tcp://127.0.0.1')
+
+    socks = []
+    for i in range(args.nr_controllers):
+        sock = context.socket(zmq.REQ)
+        sock.connect('tcp://127.0.0.1:{}'.format(port))
+        socks.append(sock)
+    uids = ['bench/{}'.format(i) for i in range(args.nr_controllers)]
+
+    def pipe_name(i):
+        return 'pipe-{}'.format(i % args.nr_pipes)
+
+    _round(socks, lambda i: {
+        'action': configs.Actions.NS_REGISTER_CTL_REQ, 'uid': uids[i],
+        'ctl_protocal': 'tcp', 'ctl_addr': '127.0.0.1', 'ctl_port': ctl_port, 'meta': {}})
+    _round(socks, lambda i: {
+        'action': configs.Actions.NS_REGISTER_PIPE_REQ, 'uid': uids[i],
+        'ipipes': [pipe_name(i + 1)] if i % 2 else [], 'opipes': [] if i % 2 else [pipe_name(i)]})
+
+    results = {}
+    for action, make_request in [
+            ('heartbeat', lambda i: {'action': configs.Actions.NS_HEARTBEAT_REQ, 'uid': uids[i]}),
+            ('query', lambda i: {'action': configs.Actions.NS_QUERY_OPIPE_REQ, 'ipipes': [pipe_name(i)]})]:
+        latencies = []
+        start = time.time()
+        for r in range(args.nr_rounds):
+            latencies.extend(_round(socks, make_request))
+        results[action] = (len(latencies) / (time.time() - start), np.median(latencies), np.percentile(latencies, 99))
+
+    if isinstance(server, ReactorNameServer):
+        server.stop()
+    for sock in socks + [ctl_router]:
+        utils.graceful_close(sock)
+    context.term()
+    return results
+
+
+def main():
+    # the ReactorNameServer first, as the mainloop of the NameServer can not be stopped
+    for server_class in (ReactorNameServer, NameServer):
+        # the NameServer prints every heartbeat
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = benchmark(server_class)
+        for action, (qps, p50, p99) in results.items():
+            print('{}: {}: {:.0f} req/s, p50={:.2f}ms, p99={:.2f}ms'.format(
+                server_class.__name__, action, qps, p50 * 1000, p99 * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# -*- coding:utf8 -*-
+# File   : benchmark_data_rflow_shm.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+"""Compare the bandwidth of the push-pull pairs (as used by MPPrefetchDataFlow) in the tcp, ipc and shm modes, with
+batches of nd arrays of different sizes sent from a worker process."""
+
+from tartist.data.rflow import make_push_pair
+
+import time
+import multiprocessing
+import numpy as np
+
+# the total size of the batches of each run
+nr_bytes = 256 * 1024 * 1024
+
+
+def _worker(push, size):
+    batch = {'img': np.random.uniform(size=(size // 4, )).astype('float32'), 'label': np.arange(16)}
+    with push.activate():
+        while True:
+            push.send(batch)
+
+
+def benchmark(mode, size):
+    pull, push = make_push_pair('benchmark', mode=mode)
+    proc = multiprocessing.Process(target=_worker, args=(push, size), daemon=True)
+    proc.start()
+    with pull.activate():
+        nr_batches = nr_bytes // size
+        for i in range(10):
+            pull.recv()
+        start = time.time()
+        for i in range(nr_batches):
+            pull.recv()
+        elapsed = time.time() - start
+    proc.terminate()
+    proc.join()
+    return nr_batches / elapsed, nr_batches * size / elapsed / 1024 / 1024
+
+
+def main():
+    for size in (64 * 1024, 1024 * 1024, 16 * 1024 * 1024):
+        for mode in ('tcp', 'ipc', 'shm'):
+            bps, mbps = benchmark(mode, size)
+            print('size={}KB, mode={}: {:.0f} batch/s, {:.0f} MB/s'.format(size // 1024, mode, bps, mbps))
+
+
+if __name__ == '__main__':
+    main()
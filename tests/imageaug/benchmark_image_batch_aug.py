@@ -0,0 +1,59 @@
+# -*- coding:utf8 -*-
+# File   : benchmark_image_batch_aug.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+# 
+# This file is part of TensorArtist.
+
+from tartist.image.aug import cblk
+from tartist.image.aug import shape as shape_augment
+from tartist.image.aug import photography as photography_augment
+from tartist.image.aug import batch as batch_augment
+
+import time
+import numpy as np
+
+
+def benchmark(name, per_image_func, batch_func, imgs, nr_repeat=5):
+    start = time.time()
+    for i in range(nr_repeat):
+        np.stack([per_image_func(img) for img in imgs])
+    t_single = (time.time() - start) / nr_repeat
+
+    start = time.time()
+    for i in range(nr_repeat):
+        batch_func(imgs)
+    t_batch = (time.time() - start) / nr_repeat
+
+    print('{:<24} batch_size={:<4} per-image={:.2f}ms batched={:.2f}ms speedup={:.2f}x'.format(
+        name, len(imgs), t_single * 1000, t_batch * 1000, t_single / t_batch))
+
+
+def fbaug_float(img, target_shape=(224, 224)):
+    """The per-image fbaug in float, as the batched one (cblk.fbaug uses the uint8 lookup tables for colors)."""
+    img = shape_augment.random_size_crop(img, target_shape, area_range=0.08, aspect_ratio=[3/4, 4/3])
+    img = photography_augment.color_augment_pack(img, brightness=0.4, contrast=0.4, saturation=0.4, use_lut=False)
+    img = photography_augment.lighting_augment(img, 0.1)
+    img = shape_augment.horizontal_flip_augment(img, 0.5)
+    return np.clip(img, 0, 255).astype('uint8')
+
+
+def main():
+    for batch_size in [16, 64, 256]:
+        imgs = (np.random.rand(batch_size, 256, 256, 3) * 255).astype('uint8')
+        benchmark('random_crop', lambda x: shape_augment.random_crop(x, (224, 224)),
+                  lambda x: batch_augment.batch_random_crop(x, 224), imgs)
+        benchmark('horizontal_flip', lambda x: shape_augment.horizontal_flip_augment(x, 0.5),
+                  lambda x: batch_augment.batch_horizontal_flip_augment(x, 0.5), imgs)
+        # the per-image baselines run in float, the same arithmetic as the batched ones
+        benchmark('color_augment_pack',
+                  lambda x: photography_augment.color_augment_pack(x, 0.4, 0.4, 0.4, use_lut=False),
+                  lambda x: batch_augment.batch_color_augment_pack(x, 0.4, 0.4, 0.4), imgs)
+        benchmark('lighting_augment', lambda x: photography_augment.lighting_augment(x, 0.1),
+                  lambda x: batch_augment.batch_lighting_augment(x, 0.1), imgs)
+        benchmark('fbaug', fbaug_float, cblk.batch_fbaug, imgs)
+
+
+if __name__ == '__main__':
+    main()
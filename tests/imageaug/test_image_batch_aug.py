@@ -0,0 +1,72 @@
+# -*- coding:utf8 -*-
+# File   : test_image_batch_aug.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+# 
+# This file is part of TensorArtist.
+
+from tartist import image
+from tartist.image.aug import batch as batch_aug
+
+import numpy as np
+import unittest
+import functools
+
+
+class TestImageBatchAug(unittest.TestCase):
+    @functools.wraps(np.allclose)
+    def assertTensorClose(self, *args, **kwargs):
+        return self.assertTrue(np.allclose(*args, **kwargs))
+
+    def setUp(self):
+        self.imgs = (np.random.rand(8, 32, 48, 3) * 255).astype('uint8')
+
+    def testRandomCrop(self):
+        out = batch_aug.batch_random_crop(self.imgs, (16, 20))
+        self.assertEqual(out.shape, (8, 16, 20, 3))
+        for i in range(8):
+            # each crop must be a sub-window of the corresponding image
+            found = False
+            for y in range(32 - 16 + 1):
+                for x in range(48 - 20 + 1):
+                    if np.array_equal(self.imgs[i, y:y + 16, x:x + 20], out[i]):
+                        found = True
+            self.assertTrue(found)
+
+    def testRandomSizeCrop(self):
+        out = batch_aug.batch_random_size_crop(self.imgs, (24, 24), area_range=0.08, aspect_ratio=[3/4, 4/3])
+        self.assertEqual(out.shape, (8, 24, 24, 3))
+        self.assertEqual(out.dtype, self.imgs.dtype)
+
+    def testHorizontalFlip(self):
+        out = batch_aug.batch_horizontal_flip_augment(self.imgs, 1)
+        self.assertTensorClose(out, self.imgs[:, :, ::-1])
+        out = batch_aug.batch_horizontal_flip_augment(self.imgs, 0)
+        self.assertTensorClose(out, self.imgs)
+
+    def testColor(self):
+        alpha = np.linspace(0.6, 1.4, 8).astype('float32')
+        imgs = self.imgs.astype('float32')
+        out = batch_aug._batch_brightness(imgs, alpha)
+        for i in range(8):
+            self.assertTensorClose(out[i], image.brightness(imgs[i], alpha[i]), atol=1e-3)
+        out = batch_aug._batch_contrast(imgs, alpha)
+        for i in range(8):
+            self.assertTensorClose(out[i], image.contrast(imgs[i], alpha[i]), atol=1e-2)
+        out = batch_aug._batch_saturation(imgs, alpha)
+        for i in range(8):
+            self.assertTensorClose(out[i], image.saturation(imgs[i], alpha[i]), atol=1e-2)
+
+        out = batch_aug.batch_color_augment_pack(self.imgs, 0.4, 0.4, 0.4)
+        self.assertEqual(out.shape, self.imgs.shape)
+        self.assertTrue(out.min() >= 0 and out.max() <= 255)
+
+    def testLighting(self):
+        # no shift along the zero eigenvalues
+        out = batch_aug.batch_lighting_augment(self.imgs, 0.1, eigval=np.zeros(3), eigvec=np.eye(3))
+        self.assertTensorClose(out, self.imgs.astype('float32'))
+
+
+if __name__ == '__main__':
+    unittest.main()
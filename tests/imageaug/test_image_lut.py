@@ -0,0 +1,57 @@
+# -*- coding:utf8 -*-
+# File   : test_image_lut.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist import image
+from tartist.image import lut as image_lut
+
+import numpy as np
+import unittest
+
+
+class TestImageLUT(unittest.TestCase):
+    def setUp(self):
+        self.img = (np.random.rand(32, 48, 3) * 255).astype('uint8')
+
+    def assertImageClose(self, a, b, atol):
+        self.assertEqual(a.dtype, np.uint8)
+        diff = np.abs(a.astype('float64') - b.astype('float64'))
+        self.assertLessEqual(diff.max(), atol)
+
+    def testApplyLUT(self):
+        lut = np.random.randint(256, size=(3, 256)).astype('uint8')
+        out = image_lut.apply_lut(self.img, lut)
+        for c in range(3):
+            self.assertTrue(np.array_equal(out[:, :, c], lut[c][self.img[:, :, c]]))
+
+        out = image_lut.apply_lut(self.img, lut[0])
+        self.assertTrue(np.array_equal(out, lut[0][self.img]))
+
+    def testSingleOp(self):
+        self.assertImageClose(image_lut.lut_brightness(self.img, 1.3), image.brightness(self.img, 1.3), 1)
+        self.assertImageClose(image_lut.lut_contrast(self.img, 0.7), image.contrast(self.img, 0.7), 1)
+        self.assertImageClose(image_lut.lut_gamma(self.img, 0.8), image.gamma(self.img, 0.8), 1)
+        self.assertImageClose(image_lut.lut_saturation(self.img, 1.2), image.saturation(self.img, 1.2), 2)
+
+    def testComposed(self):
+        out = image_lut.ColorLUTTransform().brightness(1.2).contrast(0.8).gamma(1.1).saturation(1.3).contrast(1.2)(
+            self.img)
+
+        ref = self.img.astype('float64')
+        ref = image.contrast(image.saturation(image.gamma(image.contrast(image.brightness(
+            ref, 1.2), 0.8), 1.1), 1.3), 1.2)
+        self.assertImageClose(out, ref, 3)
+
+    def testGrayscaleImage(self):
+        img = self.img[:, :, 0]
+        out = image_lut.ColorLUTTransform().brightness(0.8).saturation(1.5)(img)
+        self.assertEqual(out.shape, img.shape)
+        self.assertImageClose(out, np.clip(img * 0.8, 0, 255), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# -*- coding:utf8 -*-
+# File   : test_app_hpref_stacked_ensemble.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+import os.path as osp
+import sys
+sys.path.insert(0, osp.join(osp.dirname(osp.dirname(osp.abspath(__file__))), 'examples', 'human-preference'))
+
+from libhpref.rpredictor import PredictorDesc, StackedEnsemblePredictor
+from tartist.nn import opr as O, optimizer
+from tartist.nn.train import SimpleTrainerEnv
+
+import unittest
+import numpy as np
+
+
+def make_network(env):
+    with env.create_network() as net:
+        dpc = env.create_dpcontroller()
+        with dpc.activate():
+            def inputs():
+                return [O.placeholder('state', shape=(None, 4))]
+
+            def forward(x):
+                dpc.add_output(x, name='feature')
+
+            dpc.set_input_maker(inputs).set_forward_func(forward)
+
+        action = O.placeholder('action', shape=(None, ))
+        reward = O.fc('fc_reward', O.concat([dpc.outputs['feature'], action.add_axis(1)], axis=1), 1)
+        net.add_output(reward, name='reward')
+        net.set_loss(reward.mean())
+
+
+def make_optimizer(env):
+    wrapper = optimizer.OptimizerWrapper()
+    wrapper.set_base_optimizer(optimizer.base.SGDOptimizer(0.1))
+    env.set_optimizer(wrapper)
+
+
+class TestStackedEnsemblePredictor(unittest.TestCase):
+    def setUp(self):
+        owner_env = SimpleTrainerEnv(SimpleTrainerEnv.Phase.TRAIN, '/cpu:0')
+        desc = PredictorDesc(make_network, make_optimizer, None, None, None)
+        self.predictor = StackedEnsemblePredictor(owner_env, None, desc, nr_ensembles=2, devices=['/cpu:0'] * 2,
+                                                  nr_epochs=1, epoch_size=1)
+        self.predictor.initialize()
+
+    def testFeedNames(self):
+        p = self.predictor
+        data = dict(state=np.random.uniform(size=(5, 4)), action=np.zeros(5))
+        feed_dict = p._make_feed_dict([data] * 2)
+
+        graph = p._envs[0].graph
+        self.assertEqual(len(feed_dict), 4)
+        for k in feed_dict:
+            self.assertEqual(graph.get_tensor_by_name(k + ':0').op.type, 'Placeholder')
+        self.assertIn('ensemble1/action', feed_dict)
+
+        self.assertEqual(len(p._loss_func(**feed_dict)), 2)
+        p._get_train_func([1])(**p._make_feed_dict([data], [1]))
+
+    def testPredictBatch(self):
+        rs = self.predictor.predict_batch(np.random.uniform(size=(5, 4)), np.zeros(5), ret_variance=True)
+        self.assertEqual(len(rs), 5)
+        self.assertEqual(len(rs[0]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding:utf8 -*-
+# File   : test_core_fs_cache.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.core import with_env
+from tartist.core.utils.cache import fs_cached_result
+
+import glob
+import os.path as osp
+import tempfile
+import unittest
+
+import numpy as np
+
+
+class TestFSCachedResult(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.env = with_env({'dir': {'cache': self.tmpdir.name}})
+        self.env.__enter__()
+
+    def tearDown(self):
+        self.env.__exit__(None, None, None)
+        self.tmpdir.cleanup()
+
+    def testKeyedByArgs(self):
+        nr_calls = [0]
+
+        @fs_cached_result('square')
+        def square(x, scale=1):
+            nr_calls[0] += 1
+            return np.arange(x) ** 2 * scale
+
+        for i in range(2):
+            self.assertTrue(np.array_equal(square(3), [0, 1, 4]))
+            self.assertTrue(np.array_equal(square(3, scale=2), [0, 2, 8]))
+        self.assertEqual(nr_calls[0], 2)
+
+    def testKeyFunc(self):
+        nr_calls = [0]
+
+        @fs_cached_result('apply')
+        def apply(func, x):
+            return func(x)
+
+        with self.assertRaises(TypeError):
+            apply(lambda x: x + 1, 1)
+
+        @fs_cached_result('apply_keyed', key_func=lambda func, x: (func.__name__, x))
+        def apply_keyed(func, x):
+            nr_calls[0] += 1
+            return func(x)
+
+        for i in range(2):
+            self.assertEqual(apply_keyed(lambda x: x + 1, 1), 2)
+        self.assertEqual(nr_calls[0], 1)
+
+    def testInvalidation(self):
+        nr_calls = [0]
+        input_file = osp.join(self.tmpdir.name, 'input.txt')
+        with open(input_file, 'w') as f:
+            f.write('1')
+
+        @fs_cached_result('read', input_files=[input_file])
+        def read():
+            nr_calls[0] += 1
+            with open(input_file) as f:
+                return f.read()
+
+        self.assertEqual(read(), '1')
+        self.assertEqual(read(), '1')
+        with open(input_file, 'w') as f:
+            f.write('22')
+        self.assertEqual(read(), '22')
+        self.assertEqual(nr_calls[0], 2)
+
+    def testEviction(self):
+        @fs_cached_result('blob', max_size=2500)
+        def blob(i):
+            return b'x' * 1000
+
+        for i in range(5):
+            blob(i)
+        files = glob.glob(osp.join(self.tmpdir.name, '*.cache.pkl'))
+        self.assertEqual(len(files), 2)
+        self.assertEqual(len(glob.glob(osp.join(self.tmpdir.name, '*.tmp'))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
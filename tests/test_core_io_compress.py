@@ -0,0 +1,48 @@
+# -*- coding:utf8 -*-
+# File   : test_core_io_compress.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.core import io
+from tartist.core.io import compress
+
+import os.path as osp
+import tempfile
+import unittest
+
+import numpy as np
+
+
+class TestIOCompress(unittest.TestCase):
+    def setUp(self):
+        self.content = {'conv1/W': np.random.randn(64, 3, 3, 3).astype('float32'), 'step': 100, 'name': 'test'}
+
+    def assertContentEqual(self, a, b):
+        self.assertEqual(sorted(a.keys()), sorted(b.keys()))
+        self.assertTrue(np.array_equal(a['conv1/W'], b['conv1/W']))
+        self.assertEqual(a['step'], b['step'])
+        self.assertEqual(a['name'], b['name'])
+
+    def testDumpLoad(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for ext in ('.pkl.zst', '.pkl.lz4', '.pkl.xz', '.pkl.zlib'):
+                path = osp.join(tmpdir, 'weights' + ext)
+                io.dump(path, self.content, compress_level=1)
+                self.assertContentEqual(io.load(path), self.content)
+
+    def testFallback(self):
+        codec = compress._codecs['zstd']
+        available, codec.available = codec.available, False
+        try:
+            data = compress.compress(b'tartist' * 100, 'zstd', level=19)
+            self.assertEqual(compress.detect_codec(data), 'zlib')
+            self.assertEqual(compress.decompress(data), b'tartist' * 100)
+        finally:
+            codec.available = available
+
+
+if __name__ == '__main__':
+    unittest.main()
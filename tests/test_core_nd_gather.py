@@ -0,0 +1,55 @@
+# -*- coding:utf8 -*-
+# File   : test_core_nd_gather.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.core.utils.nd import gather_list_batch, FieldArrayBuffer
+from tartist.random.sampler import EpochBatchSampler, SimpleBatchSampler
+
+import unittest
+
+import numpy as np
+
+
+class TestNDGather(unittest.TestCase):
+    def testGatherListBatch(self):
+        data = [np.full((2, 3), i) for i in range(10)]
+        indices = np.array([3, 1, 7])
+        ref = np.stack([data[i] for i in indices])
+        self.assertTrue(np.array_equal(gather_list_batch(data, indices), ref))
+        self.assertTrue(np.array_equal(gather_list_batch(np.stack(data), indices), ref))
+
+        out = np.empty_like(ref)
+        self.assertIs(gather_list_batch(np.stack(data), indices, out=out), out)
+        self.assertTrue(np.array_equal(out, ref))
+
+    def testFieldArrayBuffer(self):
+        buf = FieldArrayBuffer(5, dtypes={'reward': 'float32'})
+        for i in range(7):
+            buf.append(state=np.full((2, 2), i, dtype='uint8'), reward=i)
+        self.assertEqual(len(buf), 5)
+        self.assertEqual(buf['reward'].dtype, np.float32)
+        # the two oldest samples are overwritten
+        self.assertEqual(sorted(buf['reward'].tolist()), [2, 3, 4, 5, 6])
+
+        batch = buf.gather([0, 1, 4])
+        self.assertEqual(batch['state'].shape, (3, 2, 2))
+        self.assertTrue(np.array_equal(batch['state'][:, 0, 0], batch['reward']))
+
+        buf.extend(state=np.zeros((3, 2, 2), dtype='uint8'), reward=[7, 8, 9])
+        self.assertEqual(sorted(buf['reward'].tolist()), [5, 6, 7, 8, 9])
+
+    def testSamplers(self):
+        buf = FieldArrayBuffer(100)
+        buf.extend(a=np.arange(100), b=np.arange(100) * 2)
+        for sampler in (EpochBatchSampler(8, 3), SimpleBatchSampler(8, 2)):
+            for batch in sampler(buf, keys=['a', 'b'], renames=['x', 'y']):
+                self.assertEqual(batch['x'].shape, (8, ))
+                self.assertTrue(np.array_equal(batch['x'] * 2, batch['y']))
+
+
+if __name__ == '__main__':
+    unittest.main()
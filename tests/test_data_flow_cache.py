@@ -0,0 +1,87 @@
+# -*- coding:utf8 -*-
+# File   : test_data_flow_cache.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.data import flow, kvstore
+
+import tempfile
+import unittest
+
+import numpy as np
+
+
+class TestDecodedImageCache(unittest.TestCase):
+    def testLRU(self):
+        cache = flow.DecodedImageCache(memory_budget=300)
+        for i in range(3):
+            cache.put(i, np.full(100, i, dtype='uint8'))
+        cache.get(0)
+        cache.put(3, np.full(100, 3, dtype='uint8'))
+
+        self.assertLessEqual(cache.memory_used, 300)
+        self.assertIsNone(cache.get(1))
+        for i in (0, 2, 3):
+            self.assertEqual(cache.get(i)[0], i)
+
+    def testSpill(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            cache = flow.DecodedImageCache(memory_budget=1000, spill_dir=spill_dir, spill_budget=10000)
+            imgs = [np.random.randint(256, size=(10, 10, 3)).astype('uint8') for _ in range(10)]
+            for i, img in enumerate(imgs):
+                cache.put(i, img)
+
+            self.assertLessEqual(cache.memory_used, 1000)
+            self.assertEqual(len(cache), 10)
+            for i, img in enumerate(imgs):
+                self.assertTrue(np.array_equal(cache.get(i), img))
+            stat = cache.get_stat()
+            self.assertEqual(stat['nr_misses'], 0)
+            self.assertGreater(stat['nr_spill_hits'], 0)
+            # the entries loaded back from the spill file are not counted twice
+            self.assertEqual(len(cache), 10)
+            self.assertEqual(stat['nr_entries'] + stat['nr_spill_entries'], 10)
+            cache.clear()
+
+    def testOverwriteSpilled(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            cache = flow.DecodedImageCache(memory_budget=100, spill_dir=spill_dir, spill_budget=1000)
+            cache.put('a', np.zeros(100, dtype='uint8'))
+            cache.put('b', np.zeros(100, dtype='uint8'))
+            cache.put('a', np.ones(100, dtype='uint8'))
+            cache.put('c', np.zeros(100, dtype='uint8'))
+
+            # the overwritten value is spilled again instead of resolving to the stale copy
+            self.assertEqual(cache.get('a')[0], 1)
+            cache.clear()
+
+    def testReadOnly(self):
+        cache = flow.DecodedImageCache(memory_budget=1000)
+        img = cache.put('a', np.zeros(10, dtype='uint8'))
+        with self.assertRaises(ValueError):
+            img[0] = 1
+
+
+class TestKVStoreImageCacheDataFlow(unittest.TestCase):
+    def testDecodeOnce(self):
+        kv = kvstore.MemKVStore()
+        for i in range(5):
+            kv.put(i, i)
+
+        nr_decoded = [0]
+
+        def decode(value):
+            nr_decoded[0] += 1
+            return np.full((2, 2, 3), value, dtype='uint8')
+
+        df = flow.KVStoreImageCacheDataFlow(lambda: kv, decode_func=decode, random_sample=False)
+        for epoch in range(3):
+            self.assertEqual([int(x[0, 0, 0]) for x in df], list(range(5)))
+        self.assertEqual(nr_decoded[0], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+# -*- coding:utf8 -*-
+# File   : test_data_flow_profiler.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+# 
+# This file is part of TensorArtist.
+
+from tartist.data import flow
+
+import time
+import unittest
+
+
+class SlowDataFlow(flow.SimpleDataFlowBase):
+    def _gen(self):
+        while True:
+            time.sleep(0.005)
+            yield {'a': 1}
+
+
+class TestDataFlowProfiler(unittest.TestCase):
+    def testBottleneck(self):
+        df = SlowDataFlow()
+        df = flow.MapDataFlow(df, lambda x: x)
+        df = flow.EpochDataFlow(df, 20)
+
+        profiler = flow.DataFlowProfiler(df)
+        self.assertEqual(len(list(profiler.dataflow)), 20)
+
+        names = [s['name'] for s in profiler.report()['stages']]
+        self.assertEqual(names, ['SlowDataFlow', 'MapDataFlow', 'EpochDataFlow'])
+        for s in profiler.stats:
+            self.assertEqual(s.count, 20)
+        self.assertEqual(profiler.bottleneck.name, 'SlowDataFlow')
+
+        profiler.reset()
+        self.assertIsNone(profiler.bottleneck)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# -*- coding:utf8 -*-
+# File   : test_data_iterator.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.data.iterator import ArrayIterator, ListOfArrayIterator, DictOfArrayIterator
+
+import unittest
+
+import numpy as np
+
+
+class TestDataIterator(unittest.TestCase):
+    def setUp(self):
+        self.data = np.arange(50).reshape(10, 5)
+
+    def testView(self):
+        batches = list(ArrayIterator(self.data, 4, use_all_data=True, copy=False))
+        self.assertEqual([len(b) for b in batches], [4, 4, 2])
+        self.assertTrue(np.array_equal(np.concatenate(batches), self.data))
+        for b in batches:
+            self.assertTrue(np.shares_memory(b, self.data))
+            self.assertFalse(b.flags.writeable)
+
+    def testCopy(self):
+        for b in ArrayIterator(self.data, 4):
+            self.assertFalse(np.shares_memory(b, self.data))
+            self.assertTrue(b.flags.writeable)
+
+    def testShuffledBuffer(self):
+        it = DictOfArrayIterator({'a': self.data, 'b': self.data[:, 0]}, 3, use_all_data=True, shuffle=True,
+                                 copy=False, rng=np.random.RandomState(0))
+        rows, buffers = [], set()
+        for b in it:
+            self.assertTrue(np.array_equal(b['a'][:, 0], b['b']))
+            rows.extend(b['b'].tolist())
+            buffers.add(id(b['a'].base if b['a'].base is not None else b['a']))
+        self.assertEqual(sorted(rows), self.data[:, 0].tolist())
+        self.assertEqual(len(buffers), 1)
+
+    def testListOfArray(self):
+        batches = list(ListOfArrayIterator([self.data, self.data[:, 0].tolist()], 5, copy=False))
+        self.assertEqual(len(batches), 2)
+        for b in batches:
+            self.assertTrue(np.array_equal(b[0][:, 0], b[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# -*- coding:utf8 -*-
+# File   : test_data_kvstore_builder.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.data import kvstore
+
+import os.path as osp
+import tempfile
+import unittest
+
+
+def _encode(payload):
+    return {'value': payload * 2}
+
+
+class TestLMDBBulkBuild(unittest.TestCase):
+    def testBuild(self):
+        for codec in (None, 'zlib'):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                path = osp.join(tmpdir, 'db.lmdb')
+                records = [('key{:04d}'.format(i), i) for i in reversed(range(100))]
+                stat = kvstore.lmdb_bulk_build(path, records, encode_func=_encode, codec=codec, nr_workers=2,
+                                               batch_size=16)
+                self.assertEqual(stat['nr_records'], 100)
+
+                db = kvstore.LMDBKVStore(path)
+                self.assertEqual(len(db.keys()), 100)
+                for i in range(100):
+                    self.assertEqual(db.get('key{:04d}'.format(i)), {'value': i * 2})
+
+    def testExtend(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = osp.join(tmpdir, 'db.lmdb')
+            kvstore.lmdb_bulk_build(path, [('b', 1), ('c', 2)], nr_workers=0)
+            # 'a' is less than the existing keys, thus it falls back to the non-append mode
+            kvstore.lmdb_bulk_build(path, [('d', 3), ('a', 0)], nr_workers=0)
+
+            db = kvstore.LMDBKVStore(path)
+            self.assertEqual(sorted(db.keys()), ['a', 'b', 'c', 'd'])
+            self.assertEqual([db.get(k) for k in 'abcd'], [0, 1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
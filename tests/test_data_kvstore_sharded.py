@@ -0,0 +1,51 @@
+# -*- coding:utf8 -*-
+# File   : test_data_kvstore_sharded.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.data import kvstore
+
+import os.path as osp
+import tempfile
+import unittest
+
+
+class TestShardedLMDBKVStore(unittest.TestCase):
+    def testPutGet(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = kvstore.ShardedLMDBKVStore(osp.join(tmpdir, 'db'), nr_shards=3, readonly=False)
+            self.assertEqual(db.nr_shards, 3)
+            with db.transaction():
+                for i in range(30):
+                    db.put('key{}'.format(i), i)
+                self.assertEqual(sorted(db.keys()), sorted('key{}'.format(i) for i in range(30)))
+                for i in range(30):
+                    self.assertEqual(db.get('key{}'.format(i)), i)
+
+    def testWorkerShards(self):
+        for route in ('hash', 'range'):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                root = osp.join(tmpdir, 'db')
+                records = [('key{:03d}'.format(i), i) for i in range(100)]
+                kvstore.sharded_lmdb_bulk_build(root, records, nr_shards=4, route=route, nr_workers=0)
+
+                db = kvstore.ShardedLMDBKVStore(root)
+                all_keys = []
+                for wid in range(2):
+                    sub = db.for_worker(wid, 2)
+                    self.assertEqual(sub.shard_indices, list(range(wid, 4, 2)))
+                    keys = list(sub.keys())
+                    for k in keys:
+                        self.assertEqual(sub.get(k), int(k[3:]))
+                    all_keys.extend(keys)
+                self.assertEqual(sorted(all_keys), [r[0] for r in records])
+
+                if route == 'range':
+                    self.assertEqual(len(db.subset([0]).keys()), 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# -*- coding:utf8 -*-
+# File   : test_data_rflow_credit.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.data.rflow import NameServer, InputPipe, OutputPipe, control
+
+import os
+import socket
+import threading
+import time
+import unittest
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+class TestCreditRoute(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        port = _free_port()
+        os.environ['TART_NAME_SERVER'] = 'tcp://localhost:{}'.format(port)
+        cls.name_server = NameServer(port=str(port))
+        threading.Thread(target=cls.name_server.mainloop, daemon=True).start()
+
+    def testLoadAware(self):
+        nr_items = 200
+        received = {'fast': [], 'slow': []}
+        done = threading.Event()
+        stats = {}
+
+        def consumer(key, delay):
+            pipe = InputPipe('credit-test', bufsize=4)
+            with control([pipe]):
+                while not done.is_set():
+                    data = pipe.get_nowait()
+                    if data is None:
+                        time.sleep(0.001)
+                        continue
+                    received[key].append(data)
+                    if sum(map(len, received.values())) == nr_items:
+                        done.set()
+                    time.sleep(delay)
+
+        consumers = [threading.Thread(target=consumer, args=('fast', 0)),
+                     threading.Thread(target=consumer, args=('slow', 0.02))]
+        for t in consumers:
+            t.start()
+
+        pipe = OutputPipe('credit-test', bufsize=4, route='credit')
+        with control([pipe]) as ctl:
+            for i in range(nr_items):
+                pipe.put(i)
+            self.assertTrue(done.wait(30))
+            stats = ctl.get_peer_stats()['credit-test']
+
+        for t in consumers:
+            t.join()
+
+        # each data is routed to exactly one consumer
+        self.assertEqual(sorted(received['fast'] + received['slow']), list(range(nr_items)))
+        self.assertGreater(len(received['fast']), len(received['slow']))
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(sum(s['nr_sent'] for s in stats.values()), nr_items)
+        for s in stats.values():
+            self.assertLessEqual(s['in_flight'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
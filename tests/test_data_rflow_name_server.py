@@ -0,0 +1,82 @@
+# -*- coding:utf8 -*-
+# File   : test_data_rflow_name_server.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.data.rflow import ReactorNameServer, InputPipe, OutputPipe, control
+from tartist.data.rflow.name_server import ReactorNameServerStorage
+
+import os
+import socket
+import threading
+import unittest
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def _make_info(uid):
+    return {'uid': uid, 'ctl_protocal': 'tcp', 'ctl_addr': 'localhost', 'ctl_port': 0}
+
+
+class TestReactorNameServer(unittest.TestCase):
+    def testExpire(self):
+        storage = ReactorNameServerStorage(cleanup_wait=10)
+        for i, uid in enumerate(['a', 'b', 'c']):
+            storage.register(_make_info(uid), None)
+            storage.heartbeat(uid, now=100 + i)
+
+        self.assertEqual(storage.pop_expired(now=105), [])
+        # the heartbeat of a is refreshed
+        storage.heartbeat('a', now=108)
+        self.assertEqual(storage.pop_expired(now=111.5), ['b'])
+        storage.unregister('b')
+        self.assertEqual(storage.pop_expired(now=117), ['c'])
+        storage.unregister('c')
+        self.assertEqual(storage.pop_expired(now=118), ['a'])
+        storage.unregister('a')
+        # the stale entries are discarded
+        self.assertEqual(storage.pop_expired(now=float('inf')), [])
+        self.assertIsNone(storage.next_deadline())
+
+    def testOPipeCache(self):
+        storage = ReactorNameServerStorage()
+        storage.register(_make_info('a'), None)
+        storage.register(_make_info('b'), None)
+        storage.register_pipes({'uid': 'a', 'ipipes': [], 'opipes': ['x']})
+        self.assertEqual([r['uid'] for r in storage.get_opipe_records('x')], ['a'])
+        storage.register_pipes({'uid': 'b', 'ipipes': [], 'opipes': ['x', 'y']})
+        self.assertEqual([r['uid'] for r in storage.get_opipe_records('x')], ['a', 'b'])
+        self.assertEqual([r['uid'] for r in storage.get_opipe_records('y')], ['b'])
+        storage.register_pipes({'uid': 'b', 'ipipes': [], 'opipes': ['y']})
+        self.assertEqual([r['uid'] for r in storage.get_opipe_records('x')], ['a'])
+        storage.unregister('b')
+        self.assertEqual(storage.get_opipe_records('y'), [])
+
+    def testPipes(self):
+        port = _free_port()
+        os.environ['TART_NAME_SERVER'] = 'tcp://localhost:{}'.format(port)
+        ns = ReactorNameServer(port=str(port))
+        thread = threading.Thread(target=ns.mainloop)
+        thread.start()
+
+        try:
+            opipe = OutputPipe('ns-test', route='credit')
+            ipipe = InputPipe('ns-test')
+            with control([opipe]), control([ipipe]):
+                for i in range(20):
+                    opipe.put(i)
+                self.assertEqual([ipipe.get() for i in range(20)], list(range(20)))
+        finally:
+            ns.stop()
+            thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
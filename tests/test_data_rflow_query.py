@@ -0,0 +1,88 @@
+# -*- coding:utf8 -*-
+# File   : test_data_rflow_query.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.data.rflow import QueryRepPipe, QueryReqPipe
+
+import collections
+import threading
+import unittest
+
+
+class TestQueryPipe(unittest.TestCase):
+    def testPipelined(self):
+        pending = []
+        counter = collections.Counter()
+        lock = threading.Lock()
+
+        def answer(pipe, identifier, inp):
+            # reply in the reverse order of every 8 requests
+            with lock:
+                counter[identifier] += 1
+                pending.append((identifier, inp))
+                if len(pending) == 8:
+                    for identifier, inp in reversed(pending):
+                        pipe.send(identifier, dict(out=inp['a'] + inp['b'], identifier=bytes(identifier)))
+                    pending.clear()
+
+        rep = QueryRepPipe('test-rep')
+        rep.dispatcher.register('calc', answer)
+        with rep.activate():
+            req = QueryReqPipe('test-req', conn_info=rep.conn_info)
+            with req.activate():
+                futures = [req.query_async('calc', dict(a=i, b=1), identity='env-{}'.format(i % 4))
+                           for i in range(64)]
+                for i, future in enumerate(futures):
+                    out = future.result(timeout=10)
+                    self.assertEqual(out['out'], i + 1)
+                    self.assertEqual(out['identifier'], 'env-{}'.format(i % 4).encode('utf-8'))
+                self.assertEqual(req.nr_pending, 0)
+
+        self.assertEqual(sorted(counter.keys()), [b'env-0', b'env-1', b'env-2', b'env-3'])
+        self.assertEqual(counter[b'env-0'], 16)
+
+    def testSyncAndRetry(self):
+        attempts = collections.Counter()
+
+        def answer(pipe, identifier, inp):
+            attempts[inp] += 1
+            # drop the first attempt of each request
+            if attempts[inp] > 1:
+                pipe.send(identifier, inp * 2)
+
+        def answer_sync(pipe, identifier, inp):
+            pipe.send(identifier, inp * 3)
+
+        rep = QueryRepPipe('test-rep')
+        rep.dispatcher.register('flaky', answer)
+        rep.dispatcher.register('calc', answer_sync)
+        with rep.activate():
+            req = QueryReqPipe('test-req', conn_info=rep.conn_info, timeout=0.2, retries=1)
+            with req.activate():
+                self.assertEqual(req.query('calc', 2), 6)
+                self.assertEqual(req.query_async('flaky', 5).result(), 10)
+                self.assertEqual(attempts[5], 2)
+                with self.assertRaises(TimeoutError):
+                    req.query_async('flaky', 7, retries=0).result()
+
+    def testNoRecv(self):
+        def answer(pipe, identifier, inp):
+            pipe.send(identifier, inp * 2)
+
+        rep = QueryRepPipe('test-rep')
+        rep.dispatcher.register('calc', answer)
+        with rep.activate():
+            req = QueryReqPipe('test-req', conn_info=rep.conn_info)
+            with req.activate():
+                # the unrouted reply of the first query must be skipped rather than breaking the polling
+                self.assertIsNone(req.query('calc', 1, do_recv=False))
+                self.assertEqual(req.query('calc', 2), 4)
+                self.assertEqual(req.nr_pending, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding:utf8 -*-
+# File   : test_data_rflow_shm.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.data.rflow import configs, NameServer, InputPipe, OutputPipe, control, make_push_pair
+from tartist.data.rflow.shm_ring import SharedMemoryRing
+
+import os
+import socket
+import threading
+import multiprocessing
+import unittest
+import numpy as np
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def _push_worker(push, wid, done):
+    with push.activate():
+        for i in range(20):
+            push.send({'wid': wid, 'i': i, 'data': np.full((256, 256), i, dtype='float32')})
+        # wait for the receiver, as the pending data are dropped at finalize
+        done.wait()
+
+
+class TestSharedMemoryRing(unittest.TestCase):
+    def testRing(self):
+        producer = SharedMemoryRing(create=True, size=4096)
+        consumer = SharedMemoryRing(producer.name)
+        try:
+            for i in range(100):
+                a = np.random.uniform(size=(i % 7 + 1, 20))
+                desc = producer.dump({'a': a, 'b': a[:, ::2], 'i': i})
+                self.assertIsNotNone(desc)
+                out = consumer.load(desc)
+                self.assertTrue(np.array_equal(out['a'], a))
+                self.assertTrue(np.array_equal(out['b'], a[:, ::2]))
+                self.assertEqual(out['i'], i)
+            self.assertEqual(producer.nr_used, 0)
+
+            descs = []
+            while True:
+                desc = producer.dump(np.arange(100))
+                if desc is None:
+                    break
+                descs.append(desc)
+            self.assertLessEqual(producer.nr_used, producer.capacity)
+            producer.rollback(descs.pop())
+            for desc in descs:
+                self.assertTrue(np.array_equal(consumer.load(desc), np.arange(100)))
+            self.assertIsNotNone(producer.dump(np.arange(100)))
+        finally:
+            consumer.close()
+            producer.close()
+
+    def testPushPair(self):
+        pull, pushs = make_push_pair('shm-test', 2, mode='shm')
+        done = multiprocessing.Event()
+        procs = [multiprocessing.Process(target=_push_worker, args=(pushs[i], i, done)) for i in range(2)]
+        for p in procs:
+            p.start()
+
+        with pull.activate():
+            received = {0: [], 1: []}
+            for i in range(40):
+                data = pull.recv()
+                received[data['wid']].append(data['i'])
+                self.assertTrue(np.all(data['data'] == data['i']))
+        done.set()
+        for p in procs:
+            p.join()
+        self.assertEqual(received, {0: list(range(20)), 1: list(range(20))})
+
+    def testControllerPipes(self):
+        port = _free_port()
+        os.environ['TART_NAME_SERVER'] = 'tcp://localhost:{}'.format(port)
+        ns = NameServer(port=str(port))
+        threading.Thread(target=ns.mainloop, daemon=True).start()
+
+        # the shared memory of the controller pipes is opt-in
+        configs.SHM_RING_SIZE = 16 * 1024 * 1024
+        try:
+            opipe = OutputPipe('shm-test', route='credit')
+            ipipe = InputPipe('shm-test')
+            with control([opipe]) as producer, control([ipipe]):
+                for i in range(20):
+                    opipe.put(np.full((128, 128), i))
+                for i in range(20):
+                    self.assertTrue(np.all(ipipe.get() == i))
+                self.assertEqual(len(producer._opipe_rings['shm-test']), 1)
+        finally:
+            configs.SHM_RING_SIZE = 0
+
+
+if __name__ == '__main__':
+    unittest.main()
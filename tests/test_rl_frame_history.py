@@ -0,0 +1,100 @@
+# -*- coding:utf8 -*-
+# File   : test_rl_frame_history.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.app.rl.base import SimpleRLEnvironBase
+from tartist.app.rl.utils import FrameHistoryBuffer, HistoryFrameProxyRLEnviron
+
+import collections
+import multiprocessing
+import unittest
+import numpy as np
+
+
+class CounterEnviron(SimpleRLEnvironBase):
+    def __init__(self, shape, use_tuple=False):
+        super().__init__()
+        self._shape = shape
+        self._use_tuple = use_tuple
+        self._cnt = 0
+
+    def _make_state(self):
+        frame = np.full(self._shape, self._cnt, dtype='uint8')
+        if self._use_tuple:
+            return frame, np.array([self._cnt], dtype='float32')
+        return frame
+
+    def _action(self, action):
+        self._cnt += 1
+        self._set_current_state(self._make_state())
+        return 0, False
+
+    def _restart(self):
+        self._cnt = 0
+        self._set_current_state(self._make_state())
+
+
+def _reference(frames, length):
+    frames = list(frames)[-length:]
+    frames = [np.zeros_like(frames[0])] * (length - len(frames)) + frames
+    return np.concatenate(frames, axis=-1)
+
+
+def _shared_writer(buffer, nr_frames):
+    for i in range(nr_frames):
+        buffer.push(np.full(buffer.frame_shape, i + 1, dtype=buffer.dtype))
+
+
+class TestFrameHistory(unittest.TestCase):
+    def testBuffer(self):
+        buffer = FrameHistoryBuffer(4, (5, 6, 3), 'uint8')
+        frames = []
+        for i in range(10):
+            frames.append(np.random.randint(256, size=(5, 6, 3)).astype('uint8'))
+            buffer.push(frames[-1])
+            state = buffer.get()
+            self.assertEqual(state.shape, (5, 6, 12))
+            self.assertTrue(np.shares_memory(state, buffer.get()))
+            self.assertFalse(state.flags.writeable)
+            self.assertTrue(np.array_equal(state, _reference(frames, 4)))
+            self.assertTrue(np.array_equal(buffer.get(copy=True), state))
+
+    def testProxy(self):
+        for use_tuple in (False, True):
+            for copy in (False, True):
+                env = HistoryFrameProxyRLEnviron(CounterEnviron((2, 3, 1), use_tuple), 3, copy=copy)
+                env.restart()
+                frames = [env.proxy.current_state]
+                for i in range(5):
+                    env.action(0)
+                    frames.append(env.proxy.current_state)
+                    state = env.current_state
+                    if use_tuple:
+                        for j in range(2):
+                            self.assertTrue(np.array_equal(state[j], _reference([f[j] for f in frames], 3)))
+                    else:
+                        self.assertTrue(np.array_equal(state, _reference(frames, 3)))
+
+                history = env.copy_history()
+                self.assertIsInstance(history, collections.deque)
+                state = np.copy(env.current_state[0] if use_tuple else env.current_state)
+                env.restart()
+                env.restore_history(history)
+                self.assertTrue(np.array_equal(env.current_state[0] if use_tuple else env.current_state, state))
+
+    def testSharedBuffer(self):
+        buffer = FrameHistoryBuffer(4, (8, 8, 3), 'uint8', shared=True)
+        proc = multiprocessing.Process(target=_shared_writer, args=(buffer, 6))
+        proc.start()
+        proc.join()
+
+        frames = [np.full((8, 8, 3), i + 1, dtype='uint8') for i in range(6)]
+        self.assertTrue(np.array_equal(buffer.get(), _reference(frames, 4)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# -*- coding:utf8 -*-
+# File   : test_rl_normalizer.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.app.rl.utils.math import RunningMoments, BatchedObservationNormalizer
+
+import threading
+import unittest
+import numpy as np
+
+
+class TestBatchedObservationNormalizer(unittest.TestCase):
+    def testMomentsMerge(self):
+        data = np.random.normal(3, 2, size=(1000, 5))
+        moments = RunningMoments()
+        for part in np.array_split(data, 7):
+            moments.merge(RunningMoments.from_batch(part))
+        self.assertEqual(moments.n, 1000)
+        self.assertTrue(np.allclose(moments.mean, data.mean(axis=0)))
+        self.assertTrue(np.allclose(moments.var, data.var(axis=0)))
+
+    def testThreads(self):
+        normalizer = BatchedObservationNormalizer(update_interval=16, clip=None)
+        data = np.random.normal(-1, 4, size=(8, 100, 3))
+
+        def worker(i):
+            for o in data[i]:
+                normalizer(o)
+            normalizer.flush()
+
+        threads = [threading.Thread(target=worker, args=(i, )) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        snapshot = normalizer.snapshot
+        flat = data.reshape(-1, 3)
+        self.assertEqual(snapshot.n, 800)
+        self.assertTrue(np.allclose(snapshot.mean, flat.mean(axis=0)))
+        self.assertTrue(np.allclose(snapshot.std, flat.std(axis=0), rtol=1e-4))
+
+        normalized = normalizer.normalize(flat)
+        self.assertTrue(np.allclose(normalized.mean(axis=0), 0, atol=1e-6))
+        self.assertTrue(np.allclose(normalized.std(axis=0), 1, rtol=1e-4))
+
+    def testClip(self):
+        normalizer = BatchedObservationNormalizer(clip=10.)
+        normalizer.update(np.array([[0.], [1.]]))
+        self.assertEqual(float(normalizer.normalize(np.array([100.]))[0]), 10.)
+        self.assertEqual(float(normalizer.normalize(np.array([-100.]))[0]), -10.)
+
+
+if __name__ == '__main__':
+    unittest.main()
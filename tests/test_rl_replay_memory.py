@@ -0,0 +1,54 @@
+# -*- coding:utf8 -*-
+# File   : test_rl_replay_memory.py
+# Author : Jiayuan Mao
+# Email  : maojiayuan@gmail.com
+# Date   : 10/18/26
+#
+# This file is part of TensorArtist.
+
+from tartist.app.rl.train.experience import Experience
+from tartist.app.rl.train.q_learning import QLearningDataFlow
+
+import unittest
+
+import numpy as np
+
+
+class FakeCollector(object):
+    mode = 'EPISODE'
+
+    def initialize(self):
+        pass
+
+
+def make_trajectory(start, length, is_over):
+    return [Experience(np.full((2, 2), start + i, dtype='uint8'), i % 3, None, start + i, is_over and i == length - 1)
+            for i in range(length)]
+
+
+class TestReplayMemory(unittest.TestCase):
+    def testNextState(self):
+        df = QLearningDataFlow(FakeCollector(), 1, maxsize=16, batch_size=4, epoch_size=1)
+        df._initialize()
+
+        # a state is always followed by the state of value + 1, unless it is terminal
+        raw_data = [make_trajectory(0, 5, True), make_trajectory(10, 4, False), make_trajectory(20, 1, False),
+                    make_trajectory(30, 6, True), make_trajectory(40, 3, False), make_trajectory(50, 4, True)]
+        df._add_to_memory(raw_data)
+        memory = df._memory
+        self.assertEqual(len(memory), 16)
+
+        batch = memory.gather(np.arange(len(memory)), ['state', 'next_state', 'reward', 'is_over'])
+        self.assertEqual(batch['next_state'].shape, (16, 2, 2))
+        for state, next_state, reward, is_over in zip(
+                batch['state'][:, 0, 0], batch['next_state'][:, 0, 0], batch['reward'], batch['is_over']):
+            self.assertEqual(reward, state)
+            self.assertEqual(next_state, state if is_over else state + 1)
+
+        # the kept-aside next states are released when the slots are overwritten
+        df._add_to_memory([make_trajectory(60, 16, True)])
+        self.assertEqual(len(memory._tail_next_states), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()